@@ -7,3 +7,6 @@ class MainConfig(AppConfig):
 
     def ready(self):
         import main.signals
+        import main.checks
+        from main.utils.metrics import install_stripe_timing
+        install_stripe_timing()
@@ -0,0 +1,28 @@
+import ast
+from pathlib import Path
+
+from django.core.checks import Tags, Warning, register
+
+VIEWS_DIR = Path(__file__).resolve().parent / 'views'
+
+
+def _print_calls(path):
+    tree = ast.parse(path.read_text(), filename=str(path))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'print':
+            yield node.lineno
+
+
+@register(Tags.compatibility)
+def check_no_print_in_views(app_configs, **kwargs):
+    """Views must log through the module logger; print() blocks on stdout in the request thread."""
+    warnings = []
+    for path in sorted(VIEWS_DIR.glob('*.py')):
+        for lineno in _print_calls(path):
+            warnings.append(Warning(
+                f'print() call in {path.name}:{lineno}',
+                hint='Use logger = logging.getLogger(__name__) and logger.debug/info/error instead.',
+                obj=f'main.views.{path.stem}',
+                id='main.W001',
+            ))
+    return warnings
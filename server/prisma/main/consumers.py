@@ -0,0 +1,92 @@
+"""
+WebSocket consumers.
+NotificationConsumer (ws/notifications/?token=<access token>[&last_id=<notification id>]) joins the
+user's notifications group and forwards every notification created for them:
+
+    {"type": "notification", "notification": {...}, "unread_count": 3}
+
+On connect, and whenever the client sends {"action": "resume", "last_id": "..."}, notifications newer
+than last_id are replayed oldest first, followed by {"type": "resumed", "unread_count": n,
+"reset": bool}. "reset" is true when last_id is unknown (e.g. archived) or more than
+RESUME_LIMIT notifications were missed; the client should then refetch through
+notifications/get_notifications. The group is joined before the replay, so a notification can arrive
+twice around a reconnect; clients dedupe by id.
+"""
+import logging
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from main.models import Notification
+from main.services import NotificationInbox
+from main.utils.sync import serialize_notifications
+
+logger = logging.getLogger(__name__)
+
+RESUME_LIMIT = 100
+CLOSE_UNAUTHORIZED = 4401
+
+
+@database_sync_to_async
+def _missed_notifications(user_id, last_id):
+    """(notifications newer than last_id oldest first, reset flag)."""
+    if not last_id:
+        # Fresh connection: the client loads its list over HTTP, only the badge is needed
+        return [], False
+    notifications = Notification.objects.filter(user_id=user_id)
+    last = notifications.filter(id=last_id).values('timestamp', 'id').first()
+    if last is None:
+        return [], True
+    notifications = notifications.filter(timestamp__gte=last['timestamp']).exclude(
+        timestamp=last['timestamp'], id__lte=last['id']
+    )
+    rows = list(notifications.order_by('timestamp', 'id')[:RESUME_LIMIT + 1])
+    if len(rows) > RESUME_LIMIT:
+        return [], True
+    return serialize_notifications(rows), False
+
+
+@database_sync_to_async
+def _unread_count(user_id):
+    return NotificationInbox.unread_count(user_id)
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHORIZED)
+            return
+        self.user_id = user.id
+        self.group_name = NotificationInbox.user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        await self._resume((query.get('last_id') or [None])[0])
+
+    async def disconnect(self, code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('action') == 'resume':
+            await self._resume(content.get('last_id'))
+        else:
+            await self.send_json({'type': 'error', 'error': 'Invalid action'})
+
+    async def _resume(self, last_id):
+        try:
+            missed, reset = await _missed_notifications(self.user_id, last_id)
+        except Exception as e:
+            # A malformed id is not a UUID; treat it like an unknown one
+            logger.debug("Resume from %s failed: %s", last_id, e)
+            missed, reset = [], True
+        unread = await _unread_count(self.user_id)
+        for notification in missed:
+            await self.send_json({'type': 'notification', 'notification': notification, 'unread_count': unread})
+        await self.send_json({'type': 'resumed', 'unread_count': unread, 'reset': reset})
+
+    async def notification_created(self, event):
+        unread = await _unread_count(self.user_id)
+        await self.send_json({'type': 'notification', 'notification': event['notification'], 'unread_count': unread})
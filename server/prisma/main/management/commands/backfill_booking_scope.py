@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from main.models import BookedAppointment, FleetVehicle
+
+
+class Command(BaseCommand):
+    help = 'Backfill BookedAppointment.branch and .fleet from each vehicle\'s FleetVehicle association'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Vehicle ids per UPDATE statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        self.stdout.write(self.style.SUCCESS('Backfilling booking branch/fleet keys...'))
+
+        # Group vehicles by their (fleet, branch) so each group is a single UPDATE per chunk
+        groups = defaultdict(list)
+        for row in FleetVehicle.objects.values('vehicle_id', 'fleet_id', 'branch_id').iterator():
+            groups[(row['fleet_id'], row['branch_id'])].append(row['vehicle_id'])
+
+        updated = 0
+        for (fleet_id, branch_id), vehicle_ids in groups.items():
+            for i in range(0, len(vehicle_ids), chunk_size):
+                updated += BookedAppointment.objects.filter(
+                    vehicle_id__in=vehicle_ids[i:i + chunk_size]
+                ).update(fleet_id=fleet_id, branch_id=branch_id)
+
+        # Bookings whose vehicle is no longer in any fleet
+        cleared = BookedAppointment.objects.filter(fleet__isnull=False).exclude(
+            vehicle__fleet_associations__isnull=False
+        ).update(fleet=None, branch=None)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Stamped {updated} bookings across {len(groups)} branch groups'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Cleared {cleared} bookings with no fleet vehicle'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from main.models import BulkOrder
+
+
+class Command(BaseCommand):
+    help = 'Backfill BulkOrder.appointment_date/start_time/end_time from order_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk_update')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write(self.style.SUCCESS('Backfilling bulk order schedule columns...'))
+
+        batch = []
+        updated = 0
+        for bulk_order in BulkOrder.objects.only('id', 'order_data').iterator(chunk_size=batch_size):
+            bulk_order.sync_schedule_fields()
+            batch.append(bulk_order)
+            if len(batch) >= batch_size:
+                BulkOrder.objects.bulk_update(batch, ['appointment_date', 'start_time', 'end_time'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            BulkOrder.objects.bulk_update(batch, ['appointment_date', 'start_time', 'end_time'])
+            updated += len(batch)
+
+        missing = BulkOrder.objects.filter(appointment_date__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated {updated} bulk orders'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} bulk orders have no parseable date in order_data'))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from main.services.EmailRendering import EmailRenderer
+
+NAMES = ['Alex Morgan', 'Sam <Taylor> & Co', 'Jordan Lee']
+
+
+def _renders_per_second(render, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        render(NAMES[i % len(NAMES)])
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed if elapsed else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Measure email renders per second: render_to_string vs precompiled templates vs a precomputed shell'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', default='promotional_email.html')
+        parser.add_argument('--slot', default='customer_name', help='Per-recipient context variable')
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        template, slot, iterations = options['template'], options['slot'], options['iterations']
+        renderer = EmailRenderer()
+        started = time.perf_counter()
+        loaded = renderer.preload()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Preloaded {loaded} templates in {(time.perf_counter() - started) * 1000:.1f} ms'
+        ))
+        shell = renderer.get_shell(template, (slot,))
+
+        # The shell must produce exactly what a full render does
+        for name in NAMES:
+            if shell.fill(**{slot: name}) != renderer.render(template, {slot: name}):
+                self.stdout.write(self.style.WARNING(
+                    f'Shell output differs from a full render for {name!r}; {slot} is not a plain slot'
+                ))
+                break
+
+        results = [
+            ('render_to_string', _renders_per_second(lambda name: render_to_string(template, {slot: name}), iterations)),
+            ('precompiled', _renders_per_second(lambda name: renderer.render(template, {slot: name}), iterations)),
+            ('shell', _renders_per_second(lambda name: shell.fill(**{slot: name}), iterations)),
+        ]
+        baseline = results[0][1]
+        for label, rate in results:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {label}: {rate:,.0f} renders/s ({rate / baseline if baseline else 0:.1f}x)'
+            ))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.functional import SimpleLazyObject
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from main.models import User
+from main.renderers import FastJSONRenderer, orjson
+from main.utils.scope import get_scope
+from main.views.dashboard import DashboardView
+from main.views.fleet import FleetView
+from main.views.service_history import ServiceHistoryView
+
+# label -> (view, action, url)
+PAYLOADS = [
+    ('fleet dashboard', FleetView, 'get_fleet_dashboard', '/api/v1/fleet/get_fleet_dashboard/'),
+    ('service history', ServiceHistoryView, 'get_service_history', '/api/v1/service-history/get_service_history/'),
+    ('upcoming appointments', DashboardView, 'get_upcoming_appointments', '/api/v1/dashboard/get_upcoming_appointments/'),
+]
+
+
+def _fetch_payload(user, view_class, action, url):
+    request = APIRequestFactory().get(url)
+    force_authenticate(request, user=user)
+    request.scope = SimpleLazyObject(lambda: get_scope(user))
+    response = view_class.as_view()(request, action=action)
+    if response.status_code != 200:
+        return None
+    return response.data
+
+
+def _time_render(renderer, data, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = renderer.render(data)
+    return (time.perf_counter() - started) / iterations, len(body)
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF JSONRenderer and FastJSONRenderer on real fleet dashboard, service history and upcoming appointment payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='User whose payloads to render (use a large fleet owner)')
+        parser.add_argument('--iterations', type=int, default=200, help='Renders per payload and renderer')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; FastJSONRenderer would fall back to the stdlib renderer')
+        user = User.objects.filter(email=options['email']).first()
+        if not user:
+            raise CommandError(f"No user with email {options['email']}")
+        iterations = options['iterations']
+        baseline, fast = JSONRenderer(), FastJSONRenderer()
+
+        for label, view_class, action, url in PAYLOADS:
+            data = _fetch_payload(user, view_class, action, url)
+            if data is None:
+                self.stdout.write(self.style.WARNING(f'- {label}: not available for this user, skipped'))
+                continue
+            base_seconds, base_bytes = _time_render(baseline, data, iterations)
+            fast_seconds, fast_bytes = _time_render(fast, data, iterations)
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {label}: {base_bytes} bytes, json {base_seconds * 1000:.3f} ms, '
+                f'orjson {fast_seconds * 1000:.3f} ms ({fast_bytes} bytes), '
+                f'{base_seconds / fast_seconds if fast_seconds else 0:.1f}x faster'
+            ))
@@ -0,0 +1,190 @@
+import uuid
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from main.models import (
+    Address, AddOns, BookedAppointment, Branch, DetailerProfile, Fleet, FleetMember, FleetVehicle,
+    ServiceType, User, ValetType, Vehicle, VehicleOwnership,
+)
+from main.utils.scope import build_scope
+from main.views.dashboard import DashboardView
+from main.views.fleet import FleetView
+from main.views.service_history import ServiceHistoryView
+
+# Queries allowed per endpoint against the seeded data (SEED_BRANCHES branches), including the
+# ETag version queries. The fleet dashboard still runs its spend and analytics queries per branch.
+SEED_BRANCHES = 2
+QUERY_BUDGETS = {
+    'upcoming appointments': 6,
+    'service history': 3,
+    'vehicle bookings': 5,
+    'fleet dashboard': 50,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _Seed:
+    """Throwaway fleet, branches, users and bookings; created with bulk_create so no signals fire."""
+
+    def __init__(self):
+        tag = uuid.uuid4().hex[:8]
+        self.service_type = ServiceType.objects.create(
+            name=f'Budget wash {tag}', description={}, price=Decimal('30.00'), duration=60
+        )
+        self.valet_type = ValetType.objects.create(name=f'Budget valet {tag}', description='')
+        self.detailer = DetailerProfile.objects.create(name='Budget detailer', phone=tag)
+        self.add_ons = AddOns.objects.bulk_create([
+            AddOns(name=f'Budget add-on {i}', description='', price=Decimal('5.00'), extra_duration=10)
+            for i in range(2)
+        ])
+
+        users = [
+            User(name='Budget owner', email=f'owner-{tag}@budget.invalid', is_fleet_owner=True),
+            User(name='Budget admin', email=f'admin-{tag}@budget.invalid', is_branch_admin=True),
+            User(name='Budget customer', email=f'customer-{tag}@budget.invalid'),
+        ]
+        for user in users:
+            user.set_unusable_password()
+        self.owner, self.admin, self.customer = User.objects.bulk_create(users)
+        self.fleet = Fleet.objects.create(name=f'Budget fleet {tag}', owner=self.owner)
+        self.branches = Branch.objects.bulk_create([
+            Branch(fleet=self.fleet, name=f'Budget branch {i}', spend_limit=Decimal('1000.00'))
+            for i in range(SEED_BRANCHES)
+        ])
+        FleetMember.objects.create(fleet=self.fleet, user=self.admin, role='admin', branch=self.branches[0])
+
+        self.fleet_vehicles = Vehicle.objects.bulk_create([
+            self._vehicle(f'FLEET{i}') for i in range(SEED_BRANCHES)
+        ])
+        FleetVehicle.objects.bulk_create([
+            FleetVehicle(fleet=self.fleet, vehicle=vehicle, branch=branch)
+            for vehicle, branch in zip(self.fleet_vehicles, self.branches)
+        ])
+        self.customer_vehicle = Vehicle.objects.bulk_create([self._vehicle('CUST')])[0]
+        VehicleOwnership.objects.create(
+            vehicle=self.customer_vehicle, owner=self.customer, start_date=timezone.now().date()
+        )
+        self.customer_address, self.admin_address = Address.objects.bulk_create([
+            Address(user=self.customer, address='1 Budget Street', post_code='B1', city='Dublin', country='Ireland'),
+            Address(user=self.admin, address='2 Budget Street', post_code='B2', city='Dublin', country='Ireland'),
+        ])
+
+    @staticmethod
+    def _vehicle(label):
+        return Vehicle(
+            registration_number=label, country='Ireland', vin=uuid.uuid4().hex[:17].upper(),
+            make='Budget', model=label, year=2020, color='Grey',
+        )
+
+    def _booking(self, user, vehicle, address, status, days, branch=None):
+        return BookedAppointment(
+            booking_reference=f'QB-{uuid.uuid4().hex[:12].upper()}',
+            user=user, vehicle=vehicle, address=address, branch=branch, fleet=self.fleet if branch else None,
+            valet_type=self.valet_type, service_type=self.service_type, detailer=self.detailer,
+            appointment_date=timezone.now().date() + timedelta(days=days), start_time=time(10, 0),
+            duration=60, status=status, total_amount=Decimal('30.00'),
+        )
+
+    def add_bookings(self, count):
+        """Add `count` upcoming and completed bookings for the customer and for each branch."""
+        bookings = []
+        for i in range(count):
+            bookings.append(self._booking(self.customer, self.customer_vehicle, self.customer_address, 'confirmed', i + 1))
+            bookings.append(self._booking(self.customer, self.customer_vehicle, self.customer_address, 'completed', -i - 1))
+            for vehicle, branch in zip(self.fleet_vehicles, self.branches):
+                bookings.append(self._booking(self.admin, vehicle, self.admin_address, 'completed', -i - 1, branch))
+        BookedAppointment.objects.bulk_create(bookings)
+        through = BookedAppointment.add_ons.through
+        through.objects.bulk_create([
+            through(bookedappointment_id=booking.id, addons_id=add_on.id)
+            for booking in bookings for add_on in self.add_ons
+        ])
+
+    def endpoints(self):
+        """(label, view class, handler, user, query params, handler kwargs)."""
+        return [
+            ('upcoming appointments', DashboardView, '_get_upcoming_appointments', self.customer, {}, {}),
+            ('service history', ServiceHistoryView, 'get_service_history', self.customer, {}, {}),
+            ('vehicle bookings', FleetView, 'get_vehicle_bookings', self.owner, {},
+             {'vehicle_id': str(self.fleet_vehicles[0].id)}),
+            ('fleet dashboard', FleetView, 'get_fleet_dashboard', self.owner, {}, {}),
+        ]
+
+
+def _count_queries(view_class, handler, user, params, kwargs):
+    """Run one handler the way home.build_home does and return (status code, queries)."""
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    # Scopes are normally served from Redis; resolve it outside the measured block
+    request.scope = build_scope(user)
+    view = view_class()
+    view.request = request
+    view.args = ()
+    view.kwargs = {'action': handler}
+    view.format_kwarg = None
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(view, handler)(request, **kwargs)
+    return response.status_code, len(queries)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed throwaway bookings, run the booking list endpoints and fail if any exceeds its query budget '
+        'or issues more queries as the number of bookings grows. All seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=5, help='Bookings per customer/branch in the first pass')
+
+    def handle(self, *args, **options):
+        count = max(1, options['bookings'])
+        failures = []
+        try:
+            with transaction.atomic():
+                seed = _Seed()
+                seed.add_bookings(count)
+                first = {
+                    label: _count_queries(*endpoint)
+                    for label, *endpoint in seed.endpoints()
+                }
+                # Same endpoints with three times the rows: any per-row query shows up as growth
+                seed.add_bookings(count * 2)
+                for label, *endpoint in seed.endpoints():
+                    failure = self._check(label, first[label], _count_queries(*endpoint))
+                    if failure:
+                        failures.append(failure)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} endpoints over their query budget: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('\nAll booking endpoints are within their query budget'))
+
+    def _check(self, label, first, second):
+        """Report one endpoint; returns the label when it fails."""
+        budget = QUERY_BUDGETS[label]
+        (first_status, first_queries), (second_status, second_queries) = first, second
+        if first_status != 200 or second_status != 200:
+            self.stdout.write(self.style.ERROR(f'✗ {label}: HTTP {first_status}/{second_status}'))
+            return label
+        if second_queries > first_queries:
+            self.stdout.write(self.style.ERROR(
+                f'✗ {label}: {first_queries} → {second_queries} queries as bookings grew (N+1)'
+            ))
+            return label
+        if second_queries > budget:
+            self.stdout.write(self.style.ERROR(f'✗ {label}: {second_queries} queries, budget {budget}'))
+            return label
+        self.stdout.write(self.style.SUCCESS(f'✓ {label}: {second_queries} queries (budget {budget})'))
+        return None
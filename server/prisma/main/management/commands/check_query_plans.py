@@ -0,0 +1,68 @@
+import uuid
+from datetime import time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from main.models import BookedAppointment, Notification, PaymentTransaction, Promotions
+
+
+def _hot_queries():
+    """Querysets mirroring the hot filters in views and scheduled tasks."""
+    some_id = uuid.uuid4()
+    today = timezone.now().date()
+    now = timezone.now()
+    return [
+        ('upcoming appointments (user)', BookedAppointment.objects.filter(
+            user_id=some_id, status__in=['confirmed', 'scheduled', 'in_progress', 'pending']
+        ).order_by('appointment_date', 'start_time')),
+        ('upcoming appointments (branch)', BookedAppointment.objects.filter(
+            branch_id=some_id, status__in=['confirmed', 'scheduled', 'in_progress', 'pending']
+        )),
+        ('fleet bookings', BookedAppointment.objects.filter(fleet_id=some_id).order_by('-created_at')),
+        ('vehicle completed bookings', BookedAppointment.objects.filter(vehicle_id=some_id, status='completed')),
+        ('service reminders', BookedAppointment.objects.filter(
+            appointment_date=today, start_time__gte=time(9, 0), start_time__lte=time(9, 10), status='confirmed'
+        )),
+        ('payments in range', PaymentTransaction.objects.filter(
+            transaction_type='payment', status='succeeded', created_at__gte=now - timedelta(days=30)
+        )),
+        ('unread notifications', Notification.objects.filter(user_id=some_id, is_read=False).order_by('-timestamp')),
+        ('active promotions (user)', Promotions.objects.filter(user_id=some_id, is_active=True, valid_until__gte=today)),
+        ('expiring promotions', Promotions.objects.filter(
+            is_active=True, is_used=False, valid_until__gte=today, valid_until__lte=today + timedelta(days=1)
+        )),
+    ]
+
+
+def _full_scans(plan, table):
+    """Return plan lines that read the whole table instead of using an index."""
+    scans = []
+    for line in plan.splitlines():
+        text = line.strip()
+        # SQLite: "SCAN main_table" (vs "SEARCH ... USING INDEX"); PostgreSQL: "Seq Scan on main_table"
+        if (f'SCAN {table}' in text and 'INDEX' not in text) or f'Seq Scan on {table}' in text:
+            scans.append(text)
+    return scans
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on hot booking/payment/notification queries and fail if any falls back to a full table scan'
+
+    def handle(self, *args, **options):
+        failures = []
+        for label, queryset in _hot_queries():
+            table = queryset.model._meta.db_table
+            plan = queryset.explain()
+            scans = _full_scans(plan, table)
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'✗ {label}: full scan on {table}'))
+                for line in scans:
+                    self.stdout.write(f'    {line}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {label}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries fall back to a full table scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('\nAll hot queries use an index'))
@@ -0,0 +1,76 @@
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local stand-in for the Microsoft Graph sendMail and $batch endpoints. '
+        'Point GRAPH_API_ENDPOINT at it and set GRAPH_STATIC_TOKEN to send mail without Azure AD.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--throttle-every', type=int, default=0,
+                            help='Answer every Nth message with 429 and Retry-After: 1 to exercise retries')
+
+    def handle(self, *args, **options):
+        command = self
+        counter = itertools.count(1)
+        counter_lock = threading.Lock()
+        throttle_every = options['throttle_every']
+
+        def throttled():
+            with counter_lock:
+                n = next(counter)
+            return throttle_every and n % throttle_every == 0
+
+        def log_message(message, status):
+            recipient = message['message']['toRecipients'][0]['emailAddress']['address']
+            command.stdout.write(f"{status} {recipient}: {message['message']['subject']}")
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, body=None, headers=None):
+                data = json.dumps(body).encode() if body is not None else b''
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if not self.headers.get('Authorization', '').startswith('Bearer '):
+                    return self._reply(401, {'error': {'code': 'InvalidAuthenticationToken'}})
+                if self.path.endswith('/sendMail'):
+                    if throttled():
+                        return self._reply(429, {'error': {'code': 'TooManyRequests'}}, {'Retry-After': '1'})
+                    log_message(payload, 202)
+                    return self._reply(202)
+                if self.path.endswith('/$batch'):
+                    responses = []
+                    for request in payload.get('requests', []):
+                        if throttled():
+                            responses.append({'id': request['id'], 'status': 429, 'headers': {'Retry-After': '1'}})
+                            continue
+                        log_message(request['body'], 202)
+                        responses.append({'id': request['id'], 'status': 202, 'headers': {}, 'body': None})
+                    return self._reply(200, {'responses': responses})
+                return self._reply(404, {'error': {'code': 'NotFound'}})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(f"✓ Graph mail stub listening on http://127.0.0.1:{options['port']}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
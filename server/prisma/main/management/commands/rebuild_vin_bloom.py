@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Vehicle
+from main.utils import vin_bloom
+from main.utils.metrics import registry
+from main.utils.redis_streams import get_redis
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the VIN bloom filter used by check_vin_exists and report its false-positive rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stats', action='store_true', help='Only report filter size and false-positive rates')
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            self.stdout.write(self.style.SUCCESS('Rebuilding VIN bloom filter...'))
+            result = vin_bloom.rebuild(Vehicle.objects.values_list('vin', flat=True).iterator(chunk_size=5000))
+            if result is None:
+                self.stdout.write(self.style.WARNING('Another rebuild is running; reporting the current filter'))
+            else:
+                count, bits, hashes = result
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Loaded {count} VINs into {bits} bits ({bits // 8 // 1024} KiB) with {hashes} hashes'
+                ))
+
+        r = get_redis()
+        try:
+            meta = r.hgetall(vin_bloom.BLOOM_META_KEY)
+        finally:
+            r.close()
+        if not meta:
+            self.stdout.write(self.style.WARNING('VIN bloom filter has not been built'))
+            return
+        count = int(meta.get('count', 0))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {count} VINs, expected false-positive rate {vin_bloom.expected_false_positive_rate(count):.5%} '
+            f'(target {vin_bloom.ERROR_RATE:.3%} at {vin_bloom.CAPACITY} VINs)'
+        ))
+
+        values = registry.collect()
+        checks = {
+            labels[0]: amount for (name, labels), amount in values.items()
+            if name == 'prisma_vin_bloom_checks_total'
+        }
+        maybe = checks.get(vin_bloom.RESULT_MAYBE, 0)
+        false_positives = checks.get(vin_bloom.RESULT_FALSE_POSITIVE, 0)
+        definite_misses = checks.get(vin_bloom.RESULT_DEFINITE_MISS, 0)
+        negatives = definite_misses + false_positives
+        observed = false_positives / negatives if negatives else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Probes: {int(definite_misses)} answered without the database, {int(maybe)} checked, '
+            f'{int(false_positives)} false positives (observed rate {observed:.5%})'
+        ))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from main.models import MarketingCampaign
+from main.tasks import start_campaign
+from main.tasks.notifications.campaigns import eligible_users
+
+
+class Command(BaseCommand):
+    help = 'Start a marketing campaign to all opted-in users, or report the progress of one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', help='Push title and email subject')
+        parser.add_argument('--message', help='Push body and email text')
+        parser.add_argument('--no-push', action='store_true', help='Email only')
+        parser.add_argument('--no-email', action='store_true', help='Push only')
+        parser.add_argument('--status', metavar='CAMPAIGN_ID', help='Report progress and throughput of a campaign')
+        parser.add_argument('--cancel', metavar='CAMPAIGN_ID', help='Stop a running campaign after the current batches')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            return self._report(options['status'])
+        if options['cancel']:
+            updated = MarketingCampaign.objects.filter(
+                id=options['cancel'], status__in=['pending', 'planning', 'running']
+            ).update(status='cancelled', finished_at=timezone.now())
+            if not updated:
+                raise CommandError(f"No active campaign {options['cancel']}")
+            self.stdout.write(self.style.SUCCESS(f"✓ Cancelled campaign {options['cancel']}"))
+            return
+
+        if not options['subject'] or not options['message']:
+            raise CommandError('--subject and --message are required to start a campaign')
+        campaign = MarketingCampaign.objects.create(
+            subject=options['subject'],
+            message=options['message'],
+            send_push=not options['no_push'],
+            send_email=not options['no_email'],
+        )
+        audience = eligible_users(campaign).count()
+        start_campaign.delay(str(campaign.id))
+        self.stdout.write(self.style.SUCCESS(f'✓ Campaign {campaign.id} queued for {audience} users'))
+        self.stdout.write(f'  Follow it with: manage.py send_campaign --status {campaign.id}')
+
+    def _report(self, campaign_id):
+        campaign = MarketingCampaign.objects.filter(id=campaign_id).first()
+        if not campaign:
+            raise CommandError(f'No campaign {campaign_id}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {campaign.subject}: {campaign.status}, {campaign.chunks_done}/{campaign.total_chunks} chunks'
+        ))
+        self.stdout.write(
+            f'  {campaign.recipients} recipients, {campaign.pushes_sent} pushes, '
+            f'{campaign.emails_sent} emails, {campaign.failures} failures'
+        )
+        if campaign.started_at:
+            elapsed = ((campaign.finished_at or timezone.now()) - campaign.started_at).total_seconds()
+            rate = campaign.recipients / elapsed if elapsed else 0.0
+            self.stdout.write(f'  {elapsed:.0f}s elapsed, {rate:,.0f} recipients/s')
@@ -4,7 +4,7 @@ import logging
 import re
 
 from main.models import BookedAppointment, BookedAppointmentImage, Notification, User, Address, BulkOrder
-from main.tasks import send_booking_confirmation_email, send_push_notification
+from main.tasks import send_booking_confirmation_email, enqueue_push
 from main.utils.bulk_appointments import get_or_create_bulk_appointment_for_slot
 from main.services.NotificationServices import NotificationService
 from asgiref.sync import async_to_sync
@@ -147,7 +147,7 @@ class Command(BaseCommand):
                         booking.total_amount,
                         booking.detailer.name,
                     )
-                send_push_notification.delay(
+                enqueue_push(
                     booking.user.id,
                     "Booking Confirmed! 🎉",
                     f"Your valet service is confirmed for {booking.appointment_date} at {booking.start_time}. Your detailer is {booking.detailer.name}",
@@ -180,7 +180,7 @@ class Command(BaseCommand):
                         )
                     except Exception as e:
                         self.stderr.write(f"Error saving before image: {e}")
-                send_push_notification.delay(
+                enqueue_push(
                     booking.user.id,
                     "Service Started! 🚀",
                     _job_started_message(booking, vehicle_display),
@@ -232,7 +232,7 @@ class Command(BaseCommand):
                         )
                     except Exception as e:
                         self.stderr.write(f"Error saving fleet maintenance: {e}")
-                send_push_notification.delay(
+                enqueue_push(
                     booking.user.id,
                     "Service Completed! ✨",
                     f"Your valet service has been completed! Thank you for choosing PRISMA VALET.",
@@ -273,7 +273,7 @@ class Command(BaseCommand):
                                     )
                                 except Exception as e:
                                     self.stderr.write(f"Error saving before image: {e}")
-                            send_push_notification.delay(
+                            enqueue_push(
                                 booking.user.id,
                                 "Service Started! 🚀",
                                 _job_started_message(booking, vehicle_display),
@@ -324,7 +324,7 @@ class Command(BaseCommand):
                                     )
                                 except Exception as e:
                                     self.stderr.write(f"Error saving fleet maintenance: {e}")
-                            send_push_notification.delay(
+                            enqueue_push(
                                 booking.user.id,
                                 "Service Completed! ✨",
                                 f"Your valet service has been completed! Thank you for choosing PRISMA VALET.",
@@ -378,7 +378,7 @@ class Command(BaseCommand):
                                 bulk.save()
                                 self.stdout.write(f"Detailer {detailer.name} added to bulk order {base_ref}")
                                 if len(assigned) == 1:
-                                    send_push_notification.delay(
+                                    enqueue_push(
                                         bulk.user.id,
                                         "Bulk booking team assigned",
                                         "Your bulk booking team has been assigned.",
@@ -0,0 +1,90 @@
+"""Project middleware."""
+import time
+from urllib.parse import parse_qs
+
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+
+from main.utils import metrics
+from main.utils.scope import get_scope
+
+
+class ScopeMiddleware:
+    """
+    Attach a lazily resolved fleet/branch scope to each request as request.scope.
+    Resolution is deferred until first access so it sees the user set by DRF (JWT) authentication.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.scope = SimpleLazyObject(lambda: get_scope(request.user))
+        return self.get_response(request)
+
+
+class ActionMetricsMiddleware:
+    """
+    Record latency, DB queries/time, external HTTP time and response bytes per (view, action).
+    The action comes from the URL kwarg the views dispatch on through action_handlers; actions a view
+    does not handle are counted as 'invalid' so arbitrary URLs cannot grow the label set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample, token = metrics.start_sample()
+        request._action_metrics = sample
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(sample.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            metrics.end_sample(token)
+        if sample.view is not None:
+            size = len(response.content) if not response.streaming else 0
+            metrics.registry.observe_request(sample, response.status_code, time.perf_counter() - started, size)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        sample = getattr(request, '_action_metrics', None)
+        if view_class is None or sample is None:
+            return None
+        action = view_kwargs.get('action')
+        # TermsView names its dict action_handler
+        handlers = getattr(view_class, 'action_handlers', None) or getattr(view_class, 'action_handler', None)
+        if action is None:
+            action = '-'
+        elif handlers is not None and action not in handlers:
+            action = 'invalid'
+        sample.view = view_class.__name__
+        sample.action = action
+        return None
+
+
+class JWTWebSocketMiddleware:
+    """
+    Channels middleware authenticating WebSocket connections from a simplejwt access token passed as
+    ?token=<access token>, since apps cannot set headers on the handshake. Connections without a valid
+    token keep the user from the session middleware (usually AnonymousUser).
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        from channels.db import database_sync_to_async
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+        token = (parse_qs(scope.get('query_string', b'').decode()).get('token') or [None])[0]
+        if token:
+            auth = JWTAuthentication()
+            try:
+                user = await database_sync_to_async(lambda: auth.get_user(auth.get_validated_token(token)))()
+                scope = dict(scope, user=user)
+            except (InvalidToken, AuthenticationFailed):
+                pass
+        return await self.inner(scope, receive, send)
@@ -0,0 +1,32 @@
+# Generated manually for denormalized branch/fleet scoping on bookings
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_allow_payment_transaction_null_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookedappointment',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='main.branch'),
+        ),
+        migrations.AddField(
+            model_name='bookedappointment',
+            name='fleet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='main.fleet'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['branch', 'status', 'appointment_date'], name='main_booked_branch__aca26c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['fleet', 'status', 'appointment_date'], name='main_booked_fleet_i_bb0e3f_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated manually for composite indexes on hot booking, payment and notification queries
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_bookedappointment_branch_fleet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['user', 'status', 'appointment_date'], name='main_booked_user_id_ab51e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['vehicle', 'status'], name='main_booked_vehicle_3d2205_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['appointment_date', 'status', 'start_time'], name='main_booked_appoint_b07185_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['transaction_type', 'status', 'created_at'], name='main_paymen_transac_57b629_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'timestamp'], name='main_notifi_user_id_04224a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promotions',
+            index=models.Index(fields=['user', 'is_active', 'valid_until'], name='main_promot_user_id_9dbc9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promotions',
+            index=models.Index(fields=['is_active', 'valid_until'], name='main_promot_is_acti_c8bf03_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated manually for indexed bulk order schedule columns
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkorder',
+            name='appointment_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bulkorder',
+            name='start_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bulkorder',
+            name='end_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bulkorder',
+            index=models.Index(fields=['user', 'payment_status', 'appointment_date'], name='main_bulkor_user_id_528fb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bulkorder',
+            index=models.Index(fields=['branch', 'payment_status', 'appointment_date'], name='main_bulkor_branch__8ba66e_idx'),
+        ),
+    ]
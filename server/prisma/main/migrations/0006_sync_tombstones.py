@@ -0,0 +1,70 @@
+# Generated manually for the delta-sync API
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_bulkorder_schedule_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'updated_at'], name='main_notifi_user_id_d825de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['user', 'updated_at'], name='main_addres_user_id_3b9bc9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='promotions',
+            index=models.Index(fields=['user', 'updated_at'], name='main_promot_user_id_00fbf9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['user', 'updated_at'], name='main_booked_user_id_f79ba6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['branch', 'updated_at'], name='main_booked_branch__fe9e6f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookedappointment',
+            index=models.Index(fields=['fleet', 'updated_at'], name='main_booked_fleet_i_f90b99_idx'),
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('notifications', 'Notifications'), ('bookings', 'Bookings'), ('vehicles', 'Vehicles'), ('addresses', 'Addresses'), ('promotions', 'Promotions')], max_length=32)),
+                ('object_id', models.CharField(max_length=64)),
+                ('owner_id', models.UUIDField(blank=True, null=True)),
+                ('fleet_id', models.UUIDField(blank=True, null=True)),
+                ('branch_id', models.UUIDField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['resource', 'owner_id', 'id'], name='main_syncto_resourc_b242f4_idx'),
+                    models.Index(fields=['resource', 'fleet_id', 'id'], name='main_syncto_resourc_06ae69_idx'),
+                    models.Index(fields=['resource', 'branch_id', 'id'], name='main_syncto_resourc_8db25c_idx'),
+                    models.Index(fields=['deleted_at'], name='main_syncto_deleted_93eb37_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated manually for keyset pagination indexes on notifications and fleet vehicles
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'timestamp'], name='main_notifi_user_id_5a51f2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fleetvehicle',
+            index=models.Index(fields=['fleet', 'added_at'], name='main_fleetv_fleet_i_ce450b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fleetvehicle',
+            index=models.Index(fields=['fleet', 'branch', 'added_at'], name='main_fleetv_fleet_i_824023_idx'),
+        ),
+    ]
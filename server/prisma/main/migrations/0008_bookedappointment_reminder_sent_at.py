@@ -0,0 +1,18 @@
+# Generated manually for exact-time service reminders
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookedappointment',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
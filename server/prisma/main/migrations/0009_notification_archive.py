@@ -0,0 +1,33 @@
+# Generated manually for notification inbox retention
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_bookedappointment_reminder_sent_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('type', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=255)),
+                ('timestamp', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user', 'timestamp'], name='main_notifi_user_id_3ece05_idx'),
+                ],
+            },
+        ),
+    ]
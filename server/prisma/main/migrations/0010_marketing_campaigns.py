@@ -0,0 +1,56 @@
+# Generated manually for the streaming marketing campaign sender
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_notification_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketingCampaign',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('send_push', models.BooleanField(default=True)),
+                ('send_email', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('planning', 'Planning'), ('running', 'Running'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('total_chunks', models.IntegerField(default=0)),
+                ('chunks_done', models.IntegerField(default=0)),
+                ('recipients', models.IntegerField(default=0)),
+                ('pushes_sent', models.IntegerField(default=0)),
+                ('emails_sent', models.IntegerField(default=0)),
+                ('failures', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CampaignChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField()),
+                ('first_user_id', models.UUIDField()),
+                ('last_user_id', models.UUIDField()),
+                ('cursor', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('recipients', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='main.marketingcampaign')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['campaign', 'status', 'updated_at'], name='main_campai_campaig_da57a4_idx'),
+                ],
+                'unique_together': {('campaign', 'index')},
+            },
+        ),
+    ]
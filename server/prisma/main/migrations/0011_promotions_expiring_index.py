@@ -0,0 +1,25 @@
+# Generated manually for a partial index on expiring, unused promotions
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_marketing_campaigns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='promotions',
+            name='main_promot_is_acti_c8bf03_idx',
+        ),
+        migrations.AddIndex(
+            model_name='promotions',
+            index=models.Index(
+                condition=models.Q(('is_active', True), ('is_used', False)),
+                fields=['valid_until'],
+                name='main_promot_valid_u_21d02a_idx',
+            ),
+        ),
+    ]
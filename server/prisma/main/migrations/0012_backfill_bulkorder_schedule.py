@@ -0,0 +1,36 @@
+# Generated manually to backfill the bulk order schedule columns added in 0005
+
+from django.db import migrations
+
+from main.models.vehicle import parse_order_schedule
+
+BATCH_SIZE = 500
+
+
+def backfill_schedule(apps, schema_editor):
+    BulkOrder = apps.get_model('main', 'BulkOrder')
+    rows = BulkOrder.objects.filter(appointment_date__isnull=True).only('id', 'order_data')
+    batch = []
+    for bulk_order in rows.iterator(chunk_size=BATCH_SIZE):
+        bulk_order.appointment_date, bulk_order.start_time, bulk_order.end_time = parse_order_schedule(
+            bulk_order.order_data
+        )
+        if bulk_order.appointment_date is None:
+            continue
+        batch.append(bulk_order)
+        if len(batch) >= BATCH_SIZE:
+            BulkOrder.objects.bulk_update(batch, ['appointment_date', 'start_time', 'end_time'])
+            batch = []
+    if batch:
+        BulkOrder.objects.bulk_update(batch, ['appointment_date', 'start_time', 'end_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_promotions_expiring_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,7 @@ from .user import (
     LoyaltyProgram,
     Promotions,
     Notification,
+    NotificationArchive,
     TermsAndConditions,
     PrivacyPolicy,
     PasswordResetToken,
@@ -49,10 +50,12 @@ from .partner import (
     PartnerMetricsCache,
     CommissionAdminLog,
 )
+from .sync import SyncTombstone
+from .campaign import MarketingCampaign, CampaignChunk
 
 __all__ = [
     'User', 'UserManager', 'Referral', 'Address', 'LoyaltyProgram', 'Promotions',
-    'Notification', 'TermsAndConditions', 'PrivacyPolicy', 'PasswordResetToken',
+    'Notification', 'NotificationArchive', 'TermsAndConditions', 'PrivacyPolicy', 'PasswordResetToken',
     'Vehicle', 'VehicleOwnership', 'VehicleEvent', 'VehicleTransfer',
     'ServiceType', 'ValetType', 'DetailerProfile', 'AddOns',
     'BookedAppointment', 'BookedAppointmentImage', 'EventDataManagement',
@@ -61,4 +64,6 @@ __all__ = [
     'SubscriptionTier', 'SubscriptionPlan', 'FleetSubscription', 'SubscriptionBilling',
     'Partner', 'PartnerBankAccount', 'PartnerPayoutRequest', 'ReferralAttribution', 'CommissionPayout', 'CommissionEarning',
     'PartnerMetricsCache', 'CommissionAdminLog',
+    'SyncTombstone',
+    'MarketingCampaign', 'CampaignChunk',
 ]
@@ -0,0 +1,59 @@
+"""Marketing campaigns - one row per campaign plus the user-id ranges it is sent in."""
+import uuid
+
+from django.db import models
+
+
+class MarketingCampaign(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('planning', 'Planning'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    send_push = models.BooleanField(default=True)
+    send_email = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_chunks = models.IntegerField(default=0)
+    chunks_done = models.IntegerField(default=0)
+    recipients = models.IntegerField(default=0)
+    pushes_sent = models.IntegerField(default=0)
+    emails_sent = models.IntegerField(default=0)
+    failures = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class CampaignChunk(models.Model):
+    """
+    Users with first_user_id <= id <= last_user_id, sent by one send_campaign_chunk task.
+    cursor is the last user id already sent, so a restarted chunk continues after it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+    campaign = models.ForeignKey(MarketingCampaign, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    first_user_id = models.UUIDField()
+    last_user_id = models.UUIDField()
+    cursor = models.UUIDField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    recipients = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [['campaign', 'index']]
+        indexes = [
+            models.Index(fields=['campaign', 'status', 'updated_at']),
+        ]
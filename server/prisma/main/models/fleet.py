@@ -132,6 +132,10 @@ class FleetVehicle(models.Model):
 
     class Meta:
         unique_together = [['fleet', 'vehicle']]
+        indexes = [
+            models.Index(fields=['fleet', 'added_at']),
+            models.Index(fields=['fleet', 'branch', 'added_at']),
+        ]
 
     def __str__(self):
         return f"{self.fleet.name} - {self.vehicle.registration_number}"
@@ -0,0 +1,33 @@
+"""Sync tombstones - deletions and lost visibility recorded for the delta-sync API."""
+from django.db import models
+
+
+class SyncTombstone(models.Model):
+    """
+    A record removed from a client's view: deleted, or no longer visible to the owner/fleet/branch.
+    Scope ids are plain UUIDs rather than FKs so tombstones can be written while the owner is being deleted.
+    """
+    RESOURCE_CHOICES = [
+        ('notifications', 'Notifications'),
+        ('bookings', 'Bookings'),
+        ('vehicles', 'Vehicles'),
+        ('addresses', 'Addresses'),
+        ('promotions', 'Promotions'),
+    ]
+    resource = models.CharField(max_length=32, choices=RESOURCE_CHOICES)
+    object_id = models.CharField(max_length=64)
+    owner_id = models.UUIDField(null=True, blank=True)
+    fleet_id = models.UUIDField(null=True, blank=True)
+    branch_id = models.UUIDField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource', 'owner_id', 'id']),
+            models.Index(fields=['resource', 'fleet_id', 'id']),
+            models.Index(fields=['resource', 'branch_id', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.resource}:{self.object_id} deleted {self.deleted_at}"
@@ -188,6 +188,12 @@ class Address(models.Model):
     country = models.CharField(max_length=100)
     latitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
     longitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.address}"
@@ -276,6 +282,18 @@ class Promotions(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_active', 'valid_until']),
+            # Expiry reminders scan a valid_until range of unused active promotions
+            models.Index(
+                fields=['valid_until'],
+                condition=models.Q(is_active=True, is_used=False),
+                name='main_promot_valid_u_21d02a_idx',
+            ),
+            models.Index(fields=['user', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.discount_percentage}%"
 
@@ -318,11 +336,39 @@ class Notification(models.Model):
     status = models.CharField(max_length=255, choices=NOTIFICATION_STATUS_CHOICES, default='info')
     timestamp = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'timestamp']),
+            models.Index(fields=['user', 'updated_at']),
+            models.Index(fields=['user', 'timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.user.name} - {self.title}"
 
 
+class NotificationArchive(models.Model):
+    """Read notifications moved out of the inbox by archive_read_notifications; keeps the original id."""
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    type = models.CharField(max_length=255)
+    status = models.CharField(max_length=255)
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title}"
+
+
 class TermsAndConditions(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     version = models.CharField(max_length=20, unique=True)
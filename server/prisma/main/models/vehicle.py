@@ -1,6 +1,7 @@
 """Vehicle, booking, service, payment - vehicle and booking related models."""
 import time
 import uuid
+from datetime import datetime
 
 from django.db import models
 from django.utils import timezone
@@ -157,6 +158,9 @@ class BookedAppointment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True)
     bulk_order = models.ForeignKey('BulkOrder', on_delete=models.CASCADE, null=True, blank=True, related_name='appointments')
+    # Denormalized from the vehicle's FleetVehicle row; restamped when the vehicle moves branch
+    branch = models.ForeignKey('Branch', on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments')
+    fleet = models.ForeignKey('Fleet', on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments')
     valet_type = models.ForeignKey(ValetType, on_delete=models.CASCADE)
     service_type = models.ForeignKey(ServiceType, on_delete=models.CASCADE)
     add_ons = models.ManyToManyField(AddOns, blank=True)
@@ -178,6 +182,20 @@ class BookedAppointment(models.Model):
     is_reviewed = models.BooleanField(default=False)
     review_rating = models.IntegerField(null=True, blank=True)
     review_submitted_at = models.DateTimeField(null=True, blank=True)
+    # Set when the service reminder push goes out; cleared when the booking is rescheduled
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'status', 'appointment_date']),
+            models.Index(fields=['fleet', 'status', 'appointment_date']),
+            models.Index(fields=['user', 'status', 'appointment_date']),
+            models.Index(fields=['vehicle', 'status']),
+            models.Index(fields=['appointment_date', 'status', 'start_time']),
+            models.Index(fields=['user', 'updated_at']),
+            models.Index(fields=['branch', 'updated_at']),
+            models.Index(fields=['fleet', 'updated_at']),
+        ]
 
     def __str__(self):
         vehicle = getattr(self, "vehicle", None)
@@ -194,8 +212,17 @@ class BookedAppointment(models.Model):
     def save(self, *args, **kwargs):
         if not self.booking_reference:
             self.booking_reference = f"APT{int(time.time() * 1000)}{str(uuid.uuid4())[:8].upper()}"
+        if self._state.adding and self.vehicle_id and not self.fleet_id:
+            self.stamp_fleet_scope()
         super().save(*args, **kwargs)
 
+    def stamp_fleet_scope(self):
+        """Copy branch/fleet from the vehicle's fleet association onto this booking."""
+        from main.models import FleetVehicle
+        fleet_vehicle = FleetVehicle.objects.filter(vehicle_id=self.vehicle_id).values('branch_id', 'fleet_id').first()
+        self.branch_id = fleet_vehicle['branch_id'] if fleet_vehicle else None
+        self.fleet_id = fleet_vehicle['fleet_id'] if fleet_vehicle else None
+
 
 class VehicleEvent(models.Model):
     EVENT_TYPE_CHOICES = [
@@ -355,6 +382,11 @@ class PaymentTransaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['transaction_type', 'status', 'created_at']),
+        ]
+
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} {self.currency} - {self.status}"
 
@@ -441,6 +473,10 @@ class BulkOrder(models.Model):
     number_of_vehicles = models.PositiveIntegerField(default=0)
     order_data = models.JSONField(default=dict)  # date, window, start_time, end_time, service_type, suggested_team_size, etc.
     assigned_detailers = models.JSONField(default=list, blank=True)  # list of {"id", "name", "rating", "phone", "image"} from job_acceptance
+    # Promoted from order_data on save so schedule filters run in the database
+    appointment_date = models.DateField(null=True, blank=True)
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -450,11 +486,53 @@ class BulkOrder(models.Model):
             models.Index(fields=['user', 'payment_status']),
             models.Index(fields=['branch']),
             models.Index(fields=['fleet']),
+            models.Index(fields=['user', 'payment_status', 'appointment_date']),
+            models.Index(fields=['branch', 'payment_status', 'appointment_date']),
         ]
 
     def __str__(self):
         return f"BulkOrder {self.booking_reference} - {self.payment_status}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'order_data' in update_fields:
+            self.sync_schedule_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + ['appointment_date', 'start_time', 'end_time']
+        super().save(*args, **kwargs)
+
+    def sync_schedule_fields(self):
+        """Copy date / start_time / end_time from order_data onto the indexed columns."""
+        self.appointment_date, self.start_time, self.end_time = parse_order_schedule(self.order_data)
+
+
+def parse_order_schedule(order_data):
+    """(appointment_date, start_time, end_time) from a bulk order's order_data; None for missing parts."""
+    order_data = order_data if isinstance(order_data, dict) else {}
+    date_str = order_data.get('date') or order_data.get('appointment_date')
+    appointment_date = None
+    if isinstance(date_str, str) and len(date_str) >= 10:
+        try:
+            appointment_date = datetime.strptime(date_str[:10], '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    start_time = _parse_order_time(order_data.get('start_time') or order_data.get('best_start_time'))
+    end_time = _parse_order_time(order_data.get('end_time'))
+    return appointment_date, start_time, end_time
+
+
+def _parse_order_time(value):
+    """Parse HH:MM or HH:MM:SS(.ffffff) from order_data; None when missing or invalid."""
+    if not isinstance(value, str) or not value:
+        return None
+    value = value.split('.')[0]
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
 
 class VinLookupPurchase(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
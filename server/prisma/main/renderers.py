@@ -0,0 +1,35 @@
+"""
+JSON renderer backed by orjson.
+orjson serializes dicts, lists, str/int/float, UUID, date and datetime natively in C; anything else
+(Decimal, timedelta, lazy translations, querysets, ...) goes through DRF's encoder so payloads stay
+the same shape as with rest_framework.renderers.JSONRenderer. Falls back to that renderer when
+orjson is not installed.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+
+if orjson is not None:
+    # UTC datetimes as "...Z" like DRF; dict keys may be UUIDs/ints as with the stdlib encoder
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    return _drf_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer using orjson. Pretty printing (indent) is only honoured on the stdlib path."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
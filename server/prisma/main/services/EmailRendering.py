@@ -0,0 +1,116 @@
+"""
+Email rendering with templates compiled once per worker.
+preload() compiles every email template (and the base_email.html layout they extend) when a
+Celery worker process starts; render_email() then only evaluates the compiled node tree.
+
+For bulk sends where only a few values differ per recipient, get_shell() renders the template
+once with placeholder markers in the per-recipient slots and fill() splices escaped values into
+the precomputed static HTML. A slot must be output as a plain {{ name }}: filters, conditions or
+loops on a slot would run on the marker rather than the real value.
+"""
+import logging
+import secrets
+import threading
+
+from django.template import engines
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils.html import conditional_escape
+
+logger = logging.getLogger(__name__)
+
+# Email templates in main/templates. The subscription emails name templates that are not in the tree
+# yet, so they are left out rather than logged as missing on every worker start.
+EMAIL_TEMPLATES = (
+    'base_email.html',
+    'booking_confirmation.html',
+    'branch_admin_credentials.html',
+    'marketing_email.html',
+    'password_reset_email.html',
+    'promotional_email.html',
+    'refund_failed_email.html',
+    'refund_success_email.html',
+    'vehicle_transfer_approved.html',
+    'vehicle_transfer_rejected.html',
+    'vehicle_transfer_request.html',
+    'welcome_email.html',
+)
+
+
+class EmailShell:
+    """Pre-rendered template split around per-recipient slots."""
+
+    def __init__(self, parts, slots):
+        self.parts = parts  # literal HTML, alternating with slot names
+        self.slots = slots
+
+    def fill(self, **values):
+        out = []
+        for i, part in enumerate(self.parts):
+            # Odd positions are slot names; escape like the template's autoescape would
+            out.append(conditional_escape(values.get(part, '')) if i % 2 else part)
+        return ''.join(out)
+
+
+class EmailRenderer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._shells = {}
+
+    def get_template(self, name):
+        template = self._templates.get(name)
+        if template is None:
+            template = engines['django'].get_template(name)
+            with self._lock:
+                self._templates[name] = template
+        return template
+
+    def preload(self, names=EMAIL_TEMPLATES):
+        """Compile templates up front; missing ones are logged and rendered lazily (and fail) later."""
+        loaded = 0
+        for name in names:
+            try:
+                self.get_template(name)
+                loaded += 1
+            except TemplateDoesNotExist:
+                logger.warning("Email template %s not found", name)
+        return loaded
+
+    def render(self, name, context=None):
+        return self.get_template(name).render(context or {})
+
+    def get_shell(self, name, slots, static_context=None):
+        """
+        Shell of `name` with `slots` (context variable names) left open.
+        static_context must be hashable values only; shells are cached per (name, slots, static_context).
+        """
+        static_context = static_context or {}
+        key = (name, tuple(slots), tuple(sorted(static_context.items())))
+        shell = self._shells.get(key)
+        if shell is not None:
+            return shell
+        token = secrets.token_hex(8)
+        markers = {slot: f"@@slot-{token}-{slot}@@" for slot in slots}
+        html = self.render(name, {**static_context, **markers})
+        parts = []
+        rest = html
+        while True:
+            found = [(rest.find(marker), slot, marker) for slot, marker in markers.items() if marker in rest]
+            if not found:
+                parts.append(rest)
+                break
+            position, slot, marker = min(found)
+            parts.extend([rest[:position], slot])
+            rest = rest[position + len(marker):]
+        shell = EmailShell(parts, tuple(slots))
+        with self._lock:
+            self._shells[key] = shell
+        return shell
+
+
+renderer = EmailRenderer()
+
+
+def render_email(name, context=None):
+    """Drop-in replacement for render_to_string for email templates."""
+    return renderer.render(name, context)
@@ -0,0 +1,137 @@
+"""
+Per-user notification inbox counters.
+The unread count lives in Redis under notif:unread:<user id>. It is filled from the database on the
+first read and expires after UNREAD_TTL_SECONDS; while it exists, creates increment it and mark-read
+/ delete decrement it. Writes never create the key, so a missing counter is always rebuilt from the
+(user, is_read, timestamp) index rather than starting from a wrong value, and any drift lasts at most
+one TTL.
+
+New notifications are also published to the owner's channel-layer group, which NotificationConsumer
+forwards to connected apps.
+"""
+import logging
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+UNREAD_KEY_PREFIX = "notif:unread:"
+UNREAD_TTL_SECONDS = 24 * 60 * 60
+
+# Adjust only an existing counter and never below zero
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+  redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+  return 0
+end
+return value
+"""
+
+
+def _key(user_id):
+    return f"{UNREAD_KEY_PREFIX}{user_id}"
+
+
+def unread_count(user_id):
+    """Unread notifications for the user, from Redis when cached."""
+    from main.models import Notification
+
+    try:
+        r = get_redis()
+        try:
+            cached = r.get(_key(user_id))
+            if cached is not None:
+                return max(int(cached), 0)
+            count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+            r.set(_key(user_id), count, nx=True, ex=UNREAD_TTL_SECONDS)
+            return count
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Unread counter unavailable for %s: %s", user_id, e)
+        return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def adjust_unread(deltas):
+    """Apply {user id: delta} to the cached counters that exist."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        r = get_redis()
+        try:
+            script = r.register_script(_ADJUST_SCRIPT)
+            pipe = r.pipeline(transaction=False)
+            for user_id, delta in deltas.items():
+                script(keys=[_key(user_id)], args=[int(delta)], client=pipe)
+            pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        # Stale counters are dropped so the next read recounts
+        logger.warning("Failed to update unread counters: %s", e)
+        invalidate(deltas.keys())
+
+
+def record_created(notifications):
+    """Count and publish new notifications; call after bulk_create, which sends no post_save."""
+    notifications = list(notifications)
+    adjust_unread(Counter(n.user_id for n in notifications if not n.is_read))
+    # Consumers read from the database on resume, so only publish rows that are committed
+    transaction.on_commit(lambda: publish(notifications))
+
+
+def record_read(user_id, count=1):
+    adjust_unread({user_id: -count})
+
+
+def invalidate(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    try:
+        r = get_redis()
+        try:
+            r.delete(*[_key(user_id) for user_id in user_ids])
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to invalidate unread counters: %s", e)
+
+
+def user_group(user_id):
+    return f"notifications_{user_id}"
+
+
+def publish(notifications):
+    """Send notifications to their owners' WebSocket groups in one event loop pass."""
+    from main.utils.sync import serialize_notifications
+
+    if not notifications:
+        return
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    events = [
+        (user_group(n.user_id), {'type': 'notification.created', 'notification': payload})
+        for n, payload in zip(notifications, serialize_notifications(notifications))
+    ]
+
+    async def send_all():
+        for group, event in events:
+            await channel_layer.group_send(group, event)
+
+    try:
+        async_to_sync(send_all)()
+    except Exception as e:
+        # Clients still get these on their next resume or poll
+        logger.warning("Failed to publish %s notifications: %s", len(events), e)
@@ -1,15 +1,16 @@
-from exponent_server_sdk import PushClient, PushMessage
+from exponent_server_sdk import PushMessage
 from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.models import User, BookedAppointment
+from main.tasks.notifications.push import get_push_client
 import logging
 
 logger = logging.getLogger(__name__)
 
 class NotificationService:
     def __init__(self):
-        self.push_client = PushClient()
+        self.push_client = get_push_client()
     
     def send_booking_confirmation(self, user, booking):
         """Send booking confirmation via push notification and email"""
@@ -254,7 +255,7 @@ class NotificationService:
             raise ValueError("No email address")
         
         # Render email template
-        html_message = render_to_string(f'emails/{template}', context or {})
+        html_message = render_email(f'emails/{template}', context or {})
         
         # Send email
         result = send_mail(
@@ -3,3 +3,6 @@ from . import vehicle
 from . import user
 from . import partner
 from . import fleet
+from . import cache
+from . import sync
+from . import notifications
@@ -0,0 +1,64 @@
+"""Response cache invalidation - bump the tags declared by @cached_action handlers when their source rows change."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.models import (
+    AddOns,
+    LoyaltyProgram,
+    PrivacyPolicy,
+    Promotions,
+    ReferralAttribution,
+    ServiceType,
+    SubscriptionTier,
+    TermsAndConditions,
+    ValetType,
+)
+from main.utils.response_cache import (
+    TAG_ADD_ONS,
+    TAG_LOYALTY,
+    TAG_PRIVACY_POLICY,
+    TAG_PROMOTIONS,
+    TAG_REFERRAL,
+    TAG_SERVICE_TYPES,
+    TAG_SUBSCRIPTION_PLANS,
+    TAG_TERMS,
+    TAG_VALET_TYPES,
+    bump_tags,
+    user_tag,
+)
+
+CATALOG_TAGS = {
+    ServiceType: TAG_SERVICE_TYPES,
+    ValetType: TAG_VALET_TYPES,
+    AddOns: TAG_ADD_ONS,
+    SubscriptionTier: TAG_SUBSCRIPTION_PLANS,
+    TermsAndConditions: TAG_TERMS,
+    PrivacyPolicy: TAG_PRIVACY_POLICY,
+}
+
+
+def bump_catalog_tag(sender, **kwargs):
+    bump_tags(CATALOG_TAGS[sender])
+
+
+for _model in CATALOG_TAGS:
+    post_save.connect(bump_catalog_tag, sender=_model, dispatch_uid=f'rcache_save_{_model.__name__}')
+    post_delete.connect(bump_catalog_tag, sender=_model, dispatch_uid=f'rcache_delete_{_model.__name__}')
+
+
+@receiver(post_save, sender=Promotions)
+@receiver(post_delete, sender=Promotions)
+def bump_promotions_tag(sender, instance, **kwargs):
+    bump_tags(user_tag(TAG_PROMOTIONS, instance.user_id))
+
+
+@receiver(post_save, sender=LoyaltyProgram)
+@receiver(post_delete, sender=LoyaltyProgram)
+def bump_loyalty_tag(sender, instance, **kwargs):
+    bump_tags(user_tag(TAG_LOYALTY, instance.user_id))
+
+
+@receiver(post_save, sender=ReferralAttribution)
+@receiver(post_delete, sender=ReferralAttribution)
+def bump_referral_tag(sender, instance, **kwargs):
+    bump_tags(user_tag(TAG_REFERRAL, instance.referred_user_id))
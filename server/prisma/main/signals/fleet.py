@@ -1,9 +1,12 @@
-"""Fleet related signals - trial activation, branch admin flag."""
+"""Fleet related signals - trial activation, branch admin flag, scope cache invalidation, booking scope stamping (with sync tombstones)."""
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from main.models import FleetMember, FleetSubscription, User
+from main.models import BookedAppointment, Branch, Fleet, FleetMember, FleetSubscription, FleetVehicle, User
 from main.tasks import send_trial_subscription_welcome_email
+from main.utils.scope import invalidate_fleet_scopes, invalidate_scope
+from main.utils.sync import RESOURCE_BOOKINGS, record_tombstones
 
 
 @receiver(post_save, sender=FleetSubscription)
@@ -34,3 +37,56 @@ def clear_branch_admin_flag_on_removal(sender, instance, **kwargs):
     if not has_other_admin:
         user.is_branch_admin = False
         user.save(update_fields=['is_branch_admin'])
+
+
+@receiver(post_save, sender=Fleet)
+@receiver(post_delete, sender=Fleet)
+def invalidate_scope_on_fleet_change(sender, instance, **kwargs):
+    invalidate_scope(instance.owner_id)
+
+
+@receiver(post_save, sender=FleetMember)
+@receiver(post_delete, sender=FleetMember)
+def invalidate_scope_on_member_change(sender, instance, **kwargs):
+    invalidate_scope(instance.user_id)
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+@receiver(post_save, sender=FleetSubscription)
+@receiver(post_delete, sender=FleetSubscription)
+@receiver(post_save, sender=FleetVehicle)
+@receiver(post_delete, sender=FleetVehicle)
+def invalidate_scope_on_fleet_data_change(sender, instance, **kwargs):
+    invalidate_fleet_scopes(instance.fleet_id)
+
+
+def _tombstone_bookings_leaving_scope(bookings, new_fleet_id=None, new_branch_id=None):
+    """
+    Bookings moving to another branch/fleet disappear from the old scope's delta sync.
+    Only the scope actually left is tombstoned: a move between branches of one fleet must not
+    delete the booking on the fleet owner's devices.
+    """
+    for booking_id, branch_id, fleet_id in bookings.values_list('id', 'branch_id', 'fleet_id'):
+        old_fleet_id = fleet_id if fleet_id != new_fleet_id else None
+        old_branch_id = branch_id if branch_id != new_branch_id else None
+        if old_fleet_id or old_branch_id:
+            record_tombstones(RESOURCE_BOOKINGS, [booking_id], fleet_id=old_fleet_id, branch_id=old_branch_id)
+
+
+@receiver(post_save, sender=FleetVehicle)
+def restamp_bookings_on_fleet_vehicle_save(sender, instance, **kwargs):
+    bookings = BookedAppointment.objects.filter(vehicle_id=instance.vehicle_id).exclude(
+        branch_id=instance.branch_id, fleet_id=instance.fleet_id
+    )
+    _tombstone_bookings_leaving_scope(bookings, instance.fleet_id, instance.branch_id)
+    bookings.update(branch_id=instance.branch_id, fleet_id=instance.fleet_id, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=FleetVehicle)
+def clear_bookings_on_fleet_vehicle_delete(sender, instance, **kwargs):
+    bookings = BookedAppointment.objects.filter(
+        vehicle_id=instance.vehicle_id, fleet_id=instance.fleet_id
+    )
+    _tombstone_bookings_leaving_scope(bookings)
+    bookings.update(branch=None, fleet=None, updated_at=timezone.now())
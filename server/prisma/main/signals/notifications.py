@@ -0,0 +1,18 @@
+"""Notification inbox signals - keep the cached unread counters in step with creates and deletes."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.models import Notification
+from main.services import NotificationInbox
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created:
+        NotificationInbox.record_created([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationInbox.record_read(instance.user_id)
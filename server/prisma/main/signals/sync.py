@@ -0,0 +1,93 @@
+"""Delta sync signals - tombstones for rows that are deleted or leave a user's / branch's / fleet's view."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from main.models import (
+    Address, BookedAppointment, Branch, FleetVehicle, Notification, Promotions, Vehicle, VehicleOwnership,
+)
+from main.utils.sync import (
+    RESOURCE_ADDRESSES, RESOURCE_BOOKINGS, RESOURCE_NOTIFICATIONS, RESOURCE_PROMOTIONS, RESOURCE_VEHICLES,
+    record_tombstones,
+)
+
+
+def _touch_vehicle(vehicle_id):
+    """Bump updated_at so the vehicle shows up in the new owner's / branch's next sync."""
+    Vehicle.objects.filter(id=vehicle_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Notification)
+def tombstone_notification(sender, instance, **kwargs):
+    record_tombstones(RESOURCE_NOTIFICATIONS, [instance.id], owner_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Promotions)
+def tombstone_promotion(sender, instance, **kwargs):
+    record_tombstones(RESOURCE_PROMOTIONS, [instance.id], owner_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Address)
+def tombstone_address(sender, instance, **kwargs):
+    record_tombstones(RESOURCE_ADDRESSES, [instance.id], owner_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Branch)
+def tombstone_branch_address(sender, instance, **kwargs):
+    # Branches are the bookable addresses of fleet owners and branch admins
+    record_tombstones(RESOURCE_ADDRESSES, [instance.id], fleet_id=instance.fleet_id, branch_id=instance.id)
+
+
+@receiver(post_delete, sender=BookedAppointment)
+def tombstone_booking(sender, instance, **kwargs):
+    record_tombstones(
+        RESOURCE_BOOKINGS, [instance.id],
+        owner_id=instance.user_id, fleet_id=instance.fleet_id, branch_id=instance.branch_id,
+    )
+
+
+@receiver(post_delete, sender=VehicleOwnership)
+def tombstone_vehicle_on_ownership_delete(sender, instance, **kwargs):
+    # Also covers vehicle deletion, which cascades to its ownerships (ended ones were tombstoned already)
+    if instance.end_date is None:
+        record_tombstones(RESOURCE_VEHICLES, [instance.vehicle_id], owner_id=instance.owner_id)
+
+
+@receiver(post_save, sender=VehicleOwnership)
+def tombstone_vehicle_on_ownership_change(sender, instance, created, **kwargs):
+    if instance.end_date is not None:
+        record_tombstones(RESOURCE_VEHICLES, [instance.vehicle_id], owner_id=instance.owner_id)
+        return
+    if created:
+        # VehicleOwnership.save() ends the previous ownership with a queryset update, which sends no signal
+        previous_owner_ids = set(
+            VehicleOwnership.objects.filter(vehicle_id=instance.vehicle_id, end_date=timezone.now().date())
+            .exclude(owner_id=instance.owner_id).values_list('owner_id', flat=True)
+        )
+        for owner_id in previous_owner_ids:
+            record_tombstones(RESOURCE_VEHICLES, [instance.vehicle_id], owner_id=owner_id)
+        _touch_vehicle(instance.vehicle_id)
+
+
+@receiver(pre_save, sender=FleetVehicle)
+def remember_fleet_vehicle_branch(sender, instance, **kwargs):
+    instance._previous_branch_id = (
+        FleetVehicle.objects.filter(pk=instance.pk).values_list('branch_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=FleetVehicle)
+def tombstone_vehicle_on_branch_change(sender, instance, created, **kwargs):
+    previous_branch_id = getattr(instance, '_previous_branch_id', None)
+    if not created and previous_branch_id and previous_branch_id != instance.branch_id:
+        record_tombstones(RESOURCE_VEHICLES, [instance.vehicle_id], branch_id=previous_branch_id)
+    if created or previous_branch_id != instance.branch_id:
+        _touch_vehicle(instance.vehicle_id)
+
+
+@receiver(post_delete, sender=FleetVehicle)
+def tombstone_vehicle_on_fleet_removal(sender, instance, **kwargs):
+    record_tombstones(
+        RESOURCE_VEHICLES, [instance.vehicle_id], fleet_id=instance.fleet_id, branch_id=instance.branch_id,
+    )
@@ -7,7 +7,7 @@ from django.dispatch import receiver
 from django.utils import timezone
 
 from main.models import BookedAppointment, PaymentTransaction, Promotions
-from main.tasks import send_push_notification
+from main.tasks import enqueue_push
 
 
 def check_referral_rewards(user):
@@ -46,7 +46,7 @@ def check_referral_rewards(user):
                     terms_conditions="Valid for 30 days. Cannot be combined with other offers.",
                 )
                 if referrer.allow_push_notifications and referrer.notification_token:
-                    send_push_notification.delay(
+                    enqueue_push(
                         referrer.id,
                         "Referral Reward Earned! 🎉",
                         f"Your friend {user.name} has completed services worth €100+! You've earned a 10% discount on your next service!",
@@ -1,7 +1,8 @@
-"""Vehicle/booking related signals - loyalty, activity bonus, status change, create event."""
+"""Vehicle/booking related signals - loyalty, activity bonus, service reminders, create event, VIN bloom filter."""
 from datetime import datetime, timedelta
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -11,9 +12,11 @@ from main.models import (
     LoyaltyProgram,
     Notification,
     Promotions,
+    Vehicle,
     VehicleEvent,
 )
-from main.tasks import send_promotional_email, send_push_notification
+from main.tasks import send_promotional_email, enqueue_push
+from main.utils import reminders, vin_bloom
 
 
 @receiver(post_save, sender=BookedAppointment)
@@ -53,7 +56,7 @@ def handle_booking_completion(sender, instance, created, **kwargs):
 
         if old_tier != loyalty.current_tier:
             if user.allow_push_notifications and user.notification_token:
-                send_push_notification.delay(
+                enqueue_push(
                     user.id,
                     f"Tier Upgraded to {loyalty.current_tier.title()}! ⭐",
                     f"Congratulations! You've been upgraded to {loyalty.current_tier.title()} tier!",
@@ -89,7 +92,7 @@ def handle_booking_completion(sender, instance, created, **kwargs):
                 if user.allow_email_notifications:
                     send_promotional_email.delay(user.email, user.name)
                 if user.allow_push_notifications and user.notification_token:
-                    send_push_notification.delay(
+                    enqueue_push(
                         user.id,
                         "Activity Bonus Earned!🎉",
                         "Great job! You've completed 3 washes in 30 days. You've earned a 10% discount on your next wash!",
@@ -113,24 +116,24 @@ def handle_booking_completion(sender, instance, created, **kwargs):
             )
 
 
+@receiver(pre_save, sender=BookedAppointment)
+def reset_reminder_on_reschedule(sender, instance, **kwargs):
+    if not instance.pk or not instance.reminder_sent_at:
+        return
+    previous = BookedAppointment.objects.filter(pk=instance.pk).values('appointment_date', 'start_time').first()
+    if previous and (previous['appointment_date'], previous['start_time']) != (instance.appointment_date, instance.start_time):
+        instance.reminder_sent_at = None
+
+
 @receiver(post_save, sender=BookedAppointment)
-def handle_booking_status_change(sender, instance, created, **kwargs):
-    if not created and instance.status == 'confirmed':
-        appointment_datetime = timezone.datetime.combine(
-            instance.appointment_date,
-            instance.start_time or timezone.datetime.min.time()
-        )
-        appointment_datetime = timezone.make_aware(appointment_datetime)
-        now = timezone.now()
-        end_time = appointment_datetime + timedelta(minutes=instance.duration or 0)
-        closing_notification_time = end_time - timedelta(minutes=15)
-        if closing_notification_time > now:
-            send_push_notification.delay(
-                instance.user.id,
-                "Appointment Reminder ⏰",
-                f"Your appointment is starting in 15 minutes at {instance.start_time}",
-                "appointment_reminder"
-            )
+def schedule_booking_reminder(sender, instance, created, **kwargs):
+    # Sets, moves or cancels the timer depending on status and appointment time
+    reminders.schedule(instance)
+
+
+@receiver(post_delete, sender=BookedAppointment)
+def cancel_booking_reminder(sender, instance, **kwargs):
+    reminders.cancel(instance.pk)
 
 
 @receiver(post_save, sender=BookedAppointment)
@@ -158,3 +161,11 @@ def handle_booking_completion_create_event(sender, instance, created, **kwargs):
                 }
             )
             BookedAppointmentImage.objects.filter(booking=instance).update(vehicle_event=event)
+
+
+@receiver(post_save, sender=Vehicle)
+def add_vin_to_bloom_filter(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'vin' in update_fields:
+        # After commit, so a bloom rebuild either reads the row or sees this add in its delta
+        vin = instance.vin
+        transaction.on_commit(lambda: vin_bloom.add(vin))
@@ -1,6 +1,6 @@
 from celery import shared_task
 from django.conf import settings
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
@@ -10,7 +10,7 @@ def send_password_reset_email(user_email, user_name, reset_token):
     base_url = getattr(settings, 'BASE_URL', 'https://yourdomain.com')
     web_reset_url = f"{base_url}/api/v1/auth/web-reset-password/?token={reset_token}"
 
-    html_message = render_to_string('password_reset_email.html', {
+    html_message = render_email('password_reset_email.html', {
         'user_name': user_name,
         'web_reset_url': web_reset_url,
         'expires_in': '1 hour'
@@ -1,12 +1,12 @@
 from celery import shared_task
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
 @shared_task
 def send_booking_confirmation_email(user_email, customer_name, booking_reference, vehicle_make, vehicle_model, booking_date, start_time, service_type_name, valet_type_name, total_cost, detailer_name):
     subject = f'Booking Confirmation - #{booking_reference}'
-    html_message = render_to_string('booking_confirmation.html', {
+    html_message = render_email('booking_confirmation.html', {
         'customer_name': customer_name,
         'booking_reference': booking_reference,
         'vehicle_make': vehicle_make,
@@ -1,5 +1,5 @@
 from celery import shared_task
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
@@ -15,7 +15,7 @@ def send_branch_admin_credentials_email(
     """Send login credentials to a new branch admin or manager when the fleet owner creates their account."""
     try:
         subject = "Your Prisma Branch Account – Login Details"
-        html_message = render_to_string("branch_admin_credentials.html", {
+        html_message = render_email("branch_admin_credentials.html", {
             "recipient_name": recipient_name,
             "recipient_email": recipient_email,
             "branch_name": branch_name or "—",
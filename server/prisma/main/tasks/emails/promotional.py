@@ -1,12 +1,14 @@
 from celery import shared_task
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
+PROMOTIONAL_SUBJECT = 'Promotional Email - 10% Off Your Next Washes'
+
 
 @shared_task
 def send_promotional_email(user_email, customer_name):
-    subject = f'Promotional Email - 10% Off Your Next Washes'
-    html_message = render_to_string('promotional_email.html', {
+    subject = PROMOTIONAL_SUBJECT
+    html_message = render_email('promotional_email.html', {
         'customer_name': customer_name,
     })
     try:
@@ -1,5 +1,5 @@
 from celery import shared_task
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from django.utils import timezone
 from main.util.graph_mail import send_mail as graph_send_mail
 
@@ -8,7 +8,7 @@ from main.util.graph_mail import send_mail as graph_send_mail
 def send_refund_success_email(user_email, customer_name, booking_reference, original_date, vehicle_make, vehicle_model, service_type_name, refund_amount, refund_date):
     """Send refund success email to user when refund is processed."""
     subject = f'Refund Processed Successfully - #{booking_reference}'
-    html_message = render_to_string('refund_success_email.html', {
+    html_message = render_email('refund_success_email.html', {
         'customer_name': customer_name,
         'booking_reference': booking_reference,
         'original_date': original_date.strftime('%B %d, %Y') if original_date else '',
@@ -29,7 +29,7 @@ def send_refund_success_email(user_email, customer_name, booking_reference, orig
 def send_refund_failed_email(user_email, customer_name, booking_reference, original_date, vehicle_make, vehicle_model, service_type_name, refund_amount, failure_reason):
     """Send refund failed email to user when refund processing fails."""
     subject = f'Refund Issue - Action Required - #{booking_reference}'
-    html_message = render_to_string('refund_failed_email.html', {
+    html_message = render_email('refund_failed_email.html', {
         'customer_name': customer_name,
         'booking_reference': booking_reference,
         'original_date': original_date.strftime('%B %d, %Y') if original_date else '',
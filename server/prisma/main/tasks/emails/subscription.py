@@ -1,33 +1,38 @@
 from celery import shared_task
 from datetime import timedelta
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from django.utils.dateparse import parse_datetime
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
+def _trial_ending_soon_message(fleet_name, trial_end_date, plan_name, billing_amount):
+    """(subject, html) for the 7-day trial reminder."""
+    if isinstance(trial_end_date, str):
+        trial_end_dt = parse_datetime(trial_end_date)
+    else:
+        trial_end_dt = trial_end_date
+
+    if trial_end_dt:
+        billing_start_date = trial_end_dt + timedelta(days=1)
+    else:
+        billing_start_date = None
+
+    subject = "Your trial ends in 7 days - Prisma Fleet Subscription"
+    html_message = render_email('trial_ending_soon.html', {
+        'fleet_name': fleet_name,
+        'trial_end_date': trial_end_dt.strftime('%B %d, %Y') if trial_end_dt else 'N/A',
+        'billing_start_date': billing_start_date.strftime('%B %d, %Y') if billing_start_date else 'N/A',
+        'plan_name': plan_name,
+        'billing_amount': billing_amount,
+    })
+    return subject, html_message
+
+
 @shared_task
 def send_trial_ending_soon_email(user_email, fleet_name, trial_end_date, plan_name, billing_amount):
     """Send email notification 7 days before trial ends."""
     try:
-        if isinstance(trial_end_date, str):
-            trial_end_dt = parse_datetime(trial_end_date)
-        else:
-            trial_end_dt = trial_end_date
-
-        if trial_end_dt:
-            billing_start_date = trial_end_dt + timedelta(days=1)
-        else:
-            billing_start_date = None
-
-        subject = "Your trial ends in 7 days - Prisma Fleet Subscription"
-        html_message = render_to_string('trial_ending_soon.html', {
-            'fleet_name': fleet_name,
-            'trial_end_date': trial_end_dt.strftime('%B %d, %Y') if trial_end_dt else 'N/A',
-            'billing_start_date': billing_start_date.strftime('%B %d, %Y') if billing_start_date else 'N/A',
-            'plan_name': plan_name,
-            'billing_amount': billing_amount,
-        })
-
+        subject, html_message = _trial_ending_soon_message(fleet_name, trial_end_date, plan_name, billing_amount)
         graph_send_mail(subject, html_message, user_email)
         return f"Trial ending soon email sent successfully to {user_email}"
     except Exception as e:
@@ -44,7 +49,7 @@ def send_trial_ended_email(user_email, fleet_name, plan_name, billing_amount, ne
             next_billing_dt = next_billing_date
 
         subject = "Trial ended - Your subscription is now active"
-        html_message = render_to_string('trial_ended.html', {
+        html_message = render_email('trial_ended.html', {
             'fleet_name': fleet_name,
             'plan_name': plan_name,
             'billing_amount': billing_amount,
@@ -72,7 +77,7 @@ def send_subscription_cancelled_email(user_email, fleet_name, plan_name, cancell
             access_until_dt = access_until_date
 
         subject = "Subscription cancelled - Prisma Fleet"
-        html_message = render_to_string('subscription_cancelled.html', {
+        html_message = render_email('subscription_cancelled.html', {
             'fleet_name': fleet_name,
             'plan_name': plan_name,
             'cancellation_date': cancellation_dt.strftime('%B %d, %Y') if cancellation_dt else 'N/A',
@@ -100,7 +105,7 @@ def send_payment_failed_email(user_email, fleet_name, plan_name, failed_amount,
             grace_period_dt = grace_period_until
 
         subject = "Payment failed - Update your payment method"
-        html_message = render_to_string('payment_failed.html', {
+        html_message = render_email('payment_failed.html', {
             'fleet_name': fleet_name,
             'plan_name': plan_name,
             'failed_amount': failed_amount,
@@ -120,7 +125,7 @@ def send_payment_method_updated_email(user_email, fleet_name):
     """Send email notification when payment method is updated."""
     try:
         subject = "Payment method updated successfully"
-        html_message = render_to_string('payment_method_updated.html', {
+        html_message = render_email('payment_method_updated.html', {
             'fleet_name': fleet_name,
         })
 
@@ -140,7 +145,7 @@ def send_trial_subscription_welcome_email(user_email, fleet_name, plan_name, tri
             trial_end_dt = trial_end_date
 
         subject = f"Welcome to {plan_name} - Your Trial Has Started! 🎉"
-        html_message = render_to_string('trial_subscription_welcome.html', {
+        html_message = render_email('trial_subscription_welcome.html', {
             'fleet_name': fleet_name,
             'plan_name': plan_name,
             'trial_days': trial_days,
@@ -1,6 +1,6 @@
 from celery import shared_task
 from django.conf import settings
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
@@ -13,7 +13,7 @@ def send_transfer_request_email(transfer_id, owner_email, requester_name, vehicl
         transfer = VehicleTransfer.objects.get(id=transfer_id)
 
         subject = f"Vehicle Transfer Request - {vehicle_registration}"
-        html_message = render_to_string('vehicle_transfer_request.html', {
+        html_message = render_email('vehicle_transfer_request.html', {
             'owner_name': transfer.from_owner.name,
             'requester_name': requester_name,
             'vehicle_registration': vehicle_registration,
@@ -40,7 +40,7 @@ def send_transfer_approved_email(transfer_id, requester_email, owner_name, vehic
         transfer = VehicleTransfer.objects.get(id=transfer_id)
 
         subject = f"Vehicle Transfer Approved - {vehicle_registration}"
-        html_message = render_to_string('vehicle_transfer_approved.html', {
+        html_message = render_email('vehicle_transfer_approved.html', {
             'requester_name': transfer.to_owner.name,
             'owner_name': owner_name,
             'vehicle_registration': vehicle_registration,
@@ -67,7 +67,7 @@ def send_transfer_rejected_email(transfer_id, requester_email, owner_name, vehic
         transfer = VehicleTransfer.objects.get(id=transfer_id)
 
         subject = f"Vehicle Transfer Request Rejected - {vehicle_registration}"
-        html_message = render_to_string('vehicle_transfer_rejected.html', {
+        html_message = render_email('vehicle_transfer_rejected.html', {
             'requester_name': transfer.to_owner.name,
             'owner_name': owner_name,
             'vehicle_registration': vehicle_registration,
@@ -1,12 +1,12 @@
 from celery import shared_task
-from django.template.loader import render_to_string
+from main.services.EmailRendering import render_email
 from main.util.graph_mail import send_mail as graph_send_mail
 
 
 @shared_task
 def send_welcome_email(user_email):
     subject = "Welcome to Prisma - Let's Get Started! 🎉"
-    html_message = render_to_string('welcome_email.html')
+    html_message = render_email('welcome_email.html')
     try:
         graph_send_mail(subject, html_message, user_email)
         return f"Welcome email sent successfully to {user_email}"
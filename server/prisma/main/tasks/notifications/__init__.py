@@ -1,17 +1,39 @@
-from main.tasks.notifications.push import send_push_notification
+from main.tasks.notifications.push import (
+    send_push_notification,
+    flush_push_queue,
+    process_push_receipts,
+    enqueue_push,
+    enqueue_pushes,
+)
+from main.tasks.notifications.campaigns import (
+    start_campaign,
+    send_campaign_chunk,
+    resume_stalled_campaigns,
+)
 from main.tasks.notifications.scheduled import (
     send_service_reminders,
+    sync_service_reminders,
     send_promotion_expiration,
     check_loyalty_decay,
     cleanup_expired_pending_bookings,
     expire_old_transfers,
+    archive_read_notifications,
 )
 
 __all__ = [
     'send_push_notification',
+    'flush_push_queue',
+    'process_push_receipts',
+    'enqueue_push',
+    'enqueue_pushes',
+    'start_campaign',
+    'send_campaign_chunk',
+    'resume_stalled_campaigns',
     'send_service_reminders',
+    'sync_service_reminders',
     'send_promotion_expiration',
     'check_loyalty_decay',
     'cleanup_expired_pending_bookings',
     'expire_old_transfers',
+    'archive_read_notifications',
 ]
@@ -0,0 +1,200 @@
+"""
+Streaming marketing campaign sender.
+start_campaign plans a campaign by streaming the ids of eligible users (filtered in SQL) and cutting
+them into CampaignChunk id ranges of CAMPAIGN_CHUNK_SIZE users, then queues one send_campaign_chunk
+per range so workers send in parallel. Each chunk sends pushes through send_push_batch and emails
+through Graph $batch, rendering the email once per campaign and filling in only the name.
+
+Progress is checkpointed every CHECKPOINT_SIZE users (chunk cursor and campaign counters in one
+transaction). A chunk whose worker died is picked up again by resume_stalled_campaigns once it has
+not checkpointed for CHUNK_STALL_SECONDS and continues after its cursor, so at most one checkpoint
+batch is sent twice.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from main.services.EmailRendering import renderer
+from main.tasks.notifications.push import send_push_batch
+from main.util.graph_mail import send_mail_batch as graph_send_mail_batch
+from main.utils.batch_jobs import JobRun, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_CHUNK_SIZE = 2000
+CHECKPOINT_SIZE = 100
+CHUNK_STALL_SECONDS = 15 * 60
+CAMPAIGN_TEMPLATE = 'marketing_email.html'
+CAMPAIGN_PUSH_TYPE = 'marketing'
+
+
+def eligible_users(campaign):
+    """Opted-in users reachable on at least one of the campaign's channels."""
+    from main.models import User
+
+    reachable = Q()
+    if campaign.send_push:
+        # Expo rejects a whole request over one malformed token, so only well-formed ones count
+        reachable |= Q(allow_push_notifications=True, notification_token__startswith='ExponentPushToken')
+    if campaign.send_email:
+        reachable |= Q(allow_email_notifications=True)
+    if not reachable:
+        return User.objects.none()
+    return User.objects.filter(reachable, is_active=True, allow_marketing_emails=True)
+
+
+@shared_task(name='main.tasks.start_campaign')
+def start_campaign(campaign_id):
+    """Plan the campaign's chunks and queue them."""
+    from main.models import CampaignChunk, MarketingCampaign
+
+    campaign = MarketingCampaign.objects.get(id=campaign_id)
+    if campaign.status not in ('pending', 'planning'):
+        return f"Campaign {campaign_id} already {campaign.status}"
+
+    # Planning is repeatable: a crash here leaves status 'planning' and the next run starts over
+    MarketingCampaign.objects.filter(id=campaign.id).update(status='planning')
+    CampaignChunk.objects.filter(campaign=campaign).delete()
+
+    chunks = []
+    first_id = last_id = None
+    count = 0
+    user_ids = eligible_users(campaign).order_by('pk').values_list('id', flat=True)
+    for user_id in user_ids.iterator(chunk_size=CAMPAIGN_CHUNK_SIZE):
+        if first_id is None:
+            first_id = user_id
+        last_id = user_id
+        count += 1
+        if count == CAMPAIGN_CHUNK_SIZE:
+            chunks.append(CampaignChunk(campaign=campaign, index=len(chunks), first_user_id=first_id, last_user_id=last_id))
+            first_id, count = None, 0
+    if first_id is not None:
+        chunks.append(CampaignChunk(campaign=campaign, index=len(chunks), first_user_id=first_id, last_user_id=last_id))
+
+    with transaction.atomic():
+        CampaignChunk.objects.bulk_create(chunks)
+        MarketingCampaign.objects.filter(id=campaign.id).update(
+            status='running' if chunks else 'completed',
+            total_chunks=len(chunks),
+            chunks_done=0,
+            started_at=timezone.now(),
+            finished_at=None if chunks else timezone.now(),
+        )
+    for chunk_id in CampaignChunk.objects.filter(campaign=campaign).values_list('id', flat=True):
+        send_campaign_chunk.delay(chunk_id)
+    return f"Campaign {campaign_id} planned in {len(chunks)} chunks"
+
+
+def _claim(chunk):
+    """Mark the chunk running unless another worker is already on it. Returns True if claimed."""
+    from main.models import CampaignChunk
+
+    stale_before = timezone.now() - timedelta(seconds=CHUNK_STALL_SECONDS)
+    return CampaignChunk.objects.filter(id=chunk.id).filter(
+        Q(status='pending') | Q(status='running', updated_at__lt=stale_before)
+    ).update(status='running', attempts=F('attempts') + 1, updated_at=timezone.now()) == 1
+
+
+def _send_batch(campaign, users, shell):
+    """Send one checkpoint batch. Returns (pushes sent, emails sent, failures)."""
+    pushes_sent = emails_sent = failures = 0
+    if campaign.send_push:
+        entries = [
+            {"u": str(user.id), "t": campaign.subject, "m": campaign.message, "y": CAMPAIGN_PUSH_TYPE}
+            for user in users
+            if user.allow_push_notifications and user.notification_token
+        ]
+        if entries:
+            try:
+                pushes_sent, _, push_failures = send_push_batch(entries)
+            except Exception as e:
+                logger.error("Campaign %s push batch failed: %s", campaign.id, e)
+                pushes_sent, push_failures = 0, len(entries)
+            failures += push_failures
+    if campaign.send_email:
+        messages = [
+            (campaign.subject, shell.fill(customer_name=user.name), user.email)
+            for user in users
+            if user.allow_email_notifications and user.email
+        ]
+        if messages:
+            try:
+                results = graph_send_mail_batch(messages)
+                failed = sum(1 for error in results.values() if error)
+            except Exception as e:
+                logger.error("Campaign %s email batch failed: %s", campaign.id, e)
+                failed = len(messages)
+            emails_sent += len(messages) - failed
+            failures += failed
+    return pushes_sent, emails_sent, failures
+
+
+@shared_task(name='main.tasks.send_campaign_chunk', acks_late=True)
+def send_campaign_chunk(chunk_id):
+    """Send one chunk, checkpointing after every CHECKPOINT_SIZE users."""
+    from main.models import CampaignChunk, MarketingCampaign
+
+    chunk = CampaignChunk.objects.select_related('campaign').get(id=chunk_id)
+    campaign = chunk.campaign
+    if chunk.status == 'done' or campaign.status != 'running':
+        return f"Chunk {chunk.index} of campaign {campaign.id} skipped ({chunk.status}, campaign {campaign.status})"
+    if not _claim(chunk):
+        return f"Chunk {chunk.index} of campaign {campaign.id} is running elsewhere"
+
+    run = JobRun('send_campaign_chunk')
+    shell = renderer.get_shell(
+        CAMPAIGN_TEMPLATE, ('customer_name',), {'subject': campaign.subject, 'message': campaign.message}
+    )
+    users = eligible_users(campaign).filter(id__gte=chunk.first_user_id, id__lte=chunk.last_user_id)
+    if chunk.cursor:
+        users = users.filter(id__gt=chunk.cursor)
+    users = users.only(
+        'id', 'name', 'email', 'notification_token', 'allow_push_notifications', 'allow_email_notifications'
+    )
+
+    for batch in iter_chunks(users, CHECKPOINT_SIZE):
+        if MarketingCampaign.objects.filter(id=campaign.id, status='cancelled').exists():
+            return f"Campaign {campaign.id} cancelled at chunk {chunk.index}"
+        pushes_sent, emails_sent, failures = _send_batch(campaign, batch, shell)
+        with transaction.atomic():
+            CampaignChunk.objects.filter(id=chunk.id).update(
+                cursor=batch[-1].pk, recipients=F('recipients') + len(batch), updated_at=timezone.now()
+            )
+            MarketingCampaign.objects.filter(id=campaign.id).update(
+                recipients=F('recipients') + len(batch),
+                pushes_sent=F('pushes_sent') + pushes_sent,
+                emails_sent=F('emails_sent') + emails_sent,
+                failures=F('failures') + failures,
+            )
+        run.add(len(batch))
+
+    with transaction.atomic():
+        # A chunk reclaimed while its first worker was only slow must still count once
+        if not CampaignChunk.objects.filter(id=chunk.id).exclude(status='done').update(
+            status='done', updated_at=timezone.now()
+        ):
+            return f"Chunk {chunk.index} of campaign {campaign.id} finished elsewhere: {run.finish()}"
+        MarketingCampaign.objects.filter(id=campaign.id).update(chunks_done=F('chunks_done') + 1)
+        MarketingCampaign.objects.filter(
+            id=campaign.id, status='running', chunks_done__gte=F('total_chunks')
+        ).update(status='completed', finished_at=timezone.now())
+    return f"Chunk {chunk.index} of campaign {campaign.id}: {run.finish()}"
+
+
+@shared_task(name='main.tasks.resume_stalled_campaigns')
+def resume_stalled_campaigns():
+    """Requeue chunks of running campaigns that have not checkpointed for CHUNK_STALL_SECONDS."""
+    from main.models import CampaignChunk
+
+    stale_before = timezone.now() - timedelta(seconds=CHUNK_STALL_SECONDS)
+    stalled = list(
+        CampaignChunk.objects.filter(campaign__status='running', updated_at__lt=stale_before)
+        .exclude(status='done').values_list('id', flat=True)
+    )
+    for chunk_id in stalled:
+        send_campaign_chunk.delay(chunk_id)
+    return f"Requeued {len(stalled)} stalled campaign chunks"
@@ -1,5 +1,402 @@
+"""
+Expo push delivery.
+Callers use enqueue_push / enqueue_pushes. These append messages to a Redis list and schedule a
+single flush_push_queue task a couple of seconds later. The flush drains the list, looks up
+tokens for all recipients in one query and sends through publish_multiple in chunks of up to 100
+over a shared HTTP session. Ticket ids are kept in Redis until process_push_receipts fetches their
+receipts; tokens Expo reports as DeviceNotRegistered are cleared so later sends skip them.
+
+Before sending, a flush merges all messages to the same user into one digest led by the highest
+priority type (PUSH_TYPE_PRIORITIES), and drops non-urgent pushes to users who already received
+PUSH_RATE_CAP pushes in the current PUSH_RATE_WINDOW_SECONDS. Dropped and merged messages still
+exist as in-app notifications where the caller created one.
+send_push_notification is the per-message task used before batching; it is kept for messages
+already on the broker and as the fallback when Redis is unavailable.
+"""
+import json
+import logging
+import time
+
+import requests
 from celery import shared_task
-from exponent_server_sdk import PushClient, PushMessage
+from django.conf import settings
+from exponent_server_sdk import PushClient, PushMessage, PushServerError, PushTicket
+
+from main.utils.metrics import registry
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+PUSH_QUEUE_KEY = "push:queue"
+PUSH_FLUSH_SCHEDULED_KEY = "push:flush_scheduled"
+# How long messages are buffered before a flush; bounds the extra latency of batching
+PUSH_BATCH_WINDOW_SECONDS = 2
+# Expo accepts at most 100 messages per request
+PUSH_CHUNK_SIZE = 100
+PUSH_DRAIN_SIZE = 1000
+
+PUSH_TICKETS_KEY = "push:tickets"  # ticket id -> {"u", "k" (token), "y" (type), "ts"}
+PUSH_TICKETS_DUE_KEY = "push:tickets:due"  # ticket id scored by send time
+# Expo asks to wait before fetching receipts, and drops them after a day
+RECEIPT_DELAY_SECONDS = 15 * 60
+RECEIPT_MAX_AGE_SECONDS = 24 * 60 * 60
+# Expo accepts at most 1000 receipt ids per request
+RECEIPT_CHUNK_SIZE = 1000
+DEVICE_NOT_REGISTERED = "DeviceNotRegistered"
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+PRIORITY_URGENT = 3  # never rate limited
+PUSH_TYPE_PRIORITIES = {
+    "appointment_started": PRIORITY_URGENT,
+    "service_reminder": PRIORITY_URGENT,
+    "booking_cancelled_refunded": PRIORITY_URGENT,
+    "booking_cancelled_no_refund": PRIORITY_URGENT,
+    "subscription_payment_failed": PRIORITY_URGENT,
+    "booking_confirmed": PRIORITY_HIGH,
+    "booking_pending": PRIORITY_HIGH,
+    "booking_rescheduled": PRIORITY_HIGH,
+    "cleaning_completed": PRIORITY_HIGH,
+    "bulk_team_assigned": PRIORITY_HIGH,
+    "subscription_cancelled": PRIORITY_HIGH,
+    "subscription_trial_ending": PRIORITY_NORMAL,
+    "transfer_expired": PRIORITY_NORMAL,
+    "tier_upgrade": PRIORITY_NORMAL,
+    "activity_bonus": PRIORITY_NORMAL,
+    "referral_reward": PRIORITY_NORMAL,
+    "loyalty_reset": PRIORITY_LOW,
+    "promotion_expiring": PRIORITY_LOW,
+    "marketing": PRIORITY_LOW,
+}
+PUSH_RATE_KEY_PREFIX = "push:rate:"
+PUSH_RATE_CAP = int(getattr(settings, 'PUSH_RATE_CAP', 6))
+PUSH_RATE_WINDOW_SECONDS = int(getattr(settings, 'PUSH_RATE_WINDOW_SECONDS', 60 * 60))
+
+_session = None
+_push_client = None
+
+
+def get_push_client():
+    """Process-wide PushClient over one keep-alive session."""
+    global _session, _push_client
+    if _push_client is None:
+        _session = requests.Session()
+        _session.headers.update({
+            "accept": "application/json",
+            "accept-encoding": "gzip, deflate",
+            "content-type": "application/json",
+        })
+        _push_client = PushClient(session=_session)
+    return _push_client
+
+
+def _push_data(title, message, type):
+    return {"type": type, "title": title, "body": message}
+
+
+def _type_name(type):
+    # Some callers pass the whole data payload ({"type": ..., "booking_reference": ...}) as the type
+    return type.get("type", "unknown") if isinstance(type, dict) else str(type)
+
+
+def _priority(entry):
+    return PUSH_TYPE_PRIORITIES.get(_type_name(entry["y"]), PRIORITY_NORMAL)
+
+
+def coalesce(entries):
+    """
+    Merge queued entries per user into one message: the highest priority entry (earliest on ties)
+    with the other titles appended to its body. Entries keep their first-seen user order.
+    """
+    by_user = {}
+    for entry in entries:
+        by_user.setdefault(entry["u"], []).append(entry)
+    merged = []
+    for group in by_user.values():
+        if len(group) == 1:
+            merged.append(group[0])
+            continue
+        group = sorted(group, key=_priority, reverse=True)
+        lead, rest = group[0], group[1:]
+        for entry in rest:
+            registry.inc("prisma_push_coalesced_total", (_type_name(entry["y"]),))
+        merged.append(dict(lead, m=f"{lead['m']} Also: {'; '.join(entry['t'] for entry in rest)}"))
+    return merged
+
+
+def _apply_rate_caps(entries):
+    """Drop non-urgent entries for users at PUSH_RATE_CAP in this window and count the rest."""
+    if not entries:
+        return entries
+    bucket = int(time.time() // PUSH_RATE_WINDOW_SECONDS)
+    keys = [f"{PUSH_RATE_KEY_PREFIX}{entry['u']}:{bucket}" for entry in entries]
+    try:
+        r = get_redis()
+        try:
+            counts = r.mget(keys)
+            allowed = []
+            pipe = r.pipeline(transaction=False)
+            for entry, key, count in zip(entries, keys, counts):
+                if int(count or 0) >= PUSH_RATE_CAP and _priority(entry) < PRIORITY_URGENT:
+                    registry.inc("prisma_push_rate_limited_total", (_type_name(entry["y"]),))
+                    continue
+                allowed.append(entry)
+                pipe.incr(key)
+                pipe.expire(key, PUSH_RATE_WINDOW_SECONDS)
+            pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Push rate caps unavailable, sending uncapped: %s", e)
+        return entries
+    return allowed
+
+
+def enqueue_pushes(messages):
+    """
+    Queue (user_id, title, message, type) tuples for the next batched send.
+    Users without a token or with push disabled are skipped at flush time.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    try:
+        r = get_redis()
+        try:
+            pipe = r.pipeline(transaction=False)
+            for user_id, title, message, type in messages:
+                pipe.rpush(PUSH_QUEUE_KEY, json.dumps({"u": str(user_id), "t": title, "m": message, "y": type}))
+            pipe.set(PUSH_FLUSH_SCHEDULED_KEY, "1", nx=True, ex=PUSH_BATCH_WINDOW_SECONDS * 30)
+            scheduled = pipe.execute()[-1]
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Push queue unavailable, sending %s messages individually: %s", len(messages), e)
+        for user_id, title, message, type in messages:
+            send_push_notification.delay(user_id, title, message, type)
+        return
+    if scheduled:
+        flush_push_queue.apply_async(countdown=PUSH_BATCH_WINDOW_SECONDS)
+
+
+def enqueue_push(user_id, title, message, type):
+    """Queue one push notification; same arguments as send_push_notification."""
+    enqueue_pushes([(user_id, title, message, type)])
+
+
+def _error_code(ticket_or_receipt):
+    details = ticket_or_receipt.details or {}
+    return details.get("error") or ticket_or_receipt.status
+
+
+def prune_dead_tokens(tokens):
+    """Clear notification tokens Expo no longer accepts. Returns the number of users updated."""
+    from main.models import User
+
+    tokens = [token for token in set(tokens) if token]
+    if not tokens:
+        return 0
+    pruned = User.objects.filter(notification_token__in=tokens).update(notification_token=None)
+    registry.inc("prisma_push_tokens_pruned_total", (), pruned)
+    logger.info("Pruned %s unregistered or malformed push tokens", pruned)
+    return pruned
+
+
+def _record_tickets(sent):
+    """Track successful tickets for receipt polling. `sent` holds (ticket id, user id, token, type)."""
+    if not sent:
+        return
+    now = time.time()
+    try:
+        r = get_redis()
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.hset(PUSH_TICKETS_KEY, mapping={
+                ticket_id: json.dumps({"u": user_id, "k": token, "y": type, "ts": now})
+                for ticket_id, user_id, token, type in sent
+            })
+            pipe.zadd(PUSH_TICKETS_DUE_KEY, {ticket_id: now for ticket_id, _, _, _ in sent})
+            pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to record %s push tickets: %s", len(sent), e)
+
+
+def _drain(r, count):
+    pipe = r.pipeline(transaction=True)
+    pipe.lrange(PUSH_QUEUE_KEY, 0, count - 1)
+    pipe.ltrim(PUSH_QUEUE_KEY, count, -1)
+    return [json.loads(raw) for raw in pipe.execute()[0]]
+
+
+def send_push_batch(entries):
+    """
+    Send queued entries ({"u", "t", "m", "y"} dicts) with one user query and one request per 100 messages.
+    Entries for the same user are coalesced and rate capped first. Returns (sent, skipped, failed);
+    merged and rate-limited entries count as skipped.
+    """
+    from main.models import User
+
+    queued = len(entries)
+    entries = coalesce(entries)
+    users = {
+        str(row['id']): row
+        for row in User.objects.filter(id__in={entry["u"] for entry in entries}).values(
+            'id', 'notification_token', 'allow_push_notifications'
+        )
+    }
+    deliverable = []
+    invalid_tokens = []
+    for entry in entries:
+        user = users.get(entry["u"])
+        if not (user and user['notification_token'] and user['allow_push_notifications']):
+            continue
+        # publish_multiple rejects the whole request (ValueError) if any token is malformed
+        if not PushClient.is_exponent_push_token(user['notification_token']):
+            invalid_tokens.append(user['notification_token'])
+            continue
+        deliverable.append(entry)
+    if invalid_tokens:
+        logger.warning("Skipping %s pushes to malformed tokens", len(invalid_tokens))
+        prune_dead_tokens(invalid_tokens)
+    deliverable = _apply_rate_caps(deliverable)
+    skipped = queued - len(deliverable)
+
+    messages = []
+    recipients = []  # (user id, type label) per message
+    for entry in deliverable:
+        user = users[entry["u"]]
+        recipients.append((entry["u"], _type_name(entry["y"])))
+        messages.append(PushMessage(
+            to=user['notification_token'],
+            title=entry["t"],
+            body=entry["m"],
+            data=_push_data(entry["t"], entry["m"], entry["y"]),
+        ))
+
+    sent = failed = 0
+    client = get_push_client()
+    accepted = []
+    dead_tokens = []
+    try:
+        for i in range(0, len(messages), PUSH_CHUNK_SIZE):
+            chunk = messages[i:i + PUSH_CHUNK_SIZE]
+            try:
+                tickets = client.publish_multiple(chunk)
+            except (PushServerError, requests.RequestException, ValueError) as e:
+                logger.error("Expo push batch of %s failed: %s", len(chunk), e)
+                failed += len(chunk)
+                continue
+            # Tickets come back in message order
+            for ticket, (user_id, type) in zip(tickets, recipients[i:i + PUSH_CHUNK_SIZE]):
+                if ticket.is_success():
+                    sent += 1
+                    registry.inc("prisma_push_tickets_total", (type, "ok"))
+                    if ticket.id:
+                        accepted.append((ticket.id, user_id, ticket.push_message.to, type))
+                else:
+                    failed += 1
+                    code = _error_code(ticket)
+                    registry.inc("prisma_push_tickets_total", (type, code))
+                    if code == DEVICE_NOT_REGISTERED:
+                        dead_tokens.append(ticket.push_message.to)
+    finally:
+        # Chunks already sent are tracked even if a later one raised
+        _record_tickets(accepted)
+        prune_dead_tokens(dead_tokens)
+    return sent, skipped, failed
+
+
+@shared_task(name='main.tasks.flush_push_queue')
+def flush_push_queue():
+    """Drain the push queue in PUSH_DRAIN_SIZE batches until it is empty."""
+    totals = [0, 0, 0]
+    r = get_redis()
+    try:
+        # Clear the flag first so messages queued during this flush schedule another one
+        r.delete(PUSH_FLUSH_SCHEDULED_KEY)
+        while True:
+            entries = _drain(r, PUSH_DRAIN_SIZE)
+            if not entries:
+                break
+            for i, count in enumerate(send_push_batch(entries)):
+                totals[i] += count
+    finally:
+        r.close()
+    registry.flush()
+    sent, skipped, failed = totals
+    return f"Push queue flushed: {sent} sent, {skipped} skipped, {failed} failed"
+
+
+@shared_task(name='main.tasks.process_push_receipts')
+def process_push_receipts():
+    """
+    Fetch receipts for tickets sent at least RECEIPT_DELAY_SECONDS ago, record delivery outcomes per
+    notification type and clear tokens of uninstalled apps. Tickets without a receipt yet are retried
+    on the next run until RECEIPT_MAX_AGE_SECONDS.
+    """
+    client = get_push_client()
+    now = time.time()
+    checked = delivered = 0
+    dead_tokens = []
+    r = get_redis()
+    try:
+        offset = 0
+        while True:
+            ticket_ids = r.zrangebyscore(
+                PUSH_TICKETS_DUE_KEY, "-inf", now - RECEIPT_DELAY_SECONDS, start=offset, num=RECEIPT_CHUNK_SIZE
+            )
+            if not ticket_ids:
+                break
+            infos = {
+                ticket_id: json.loads(raw) if raw else None
+                for ticket_id, raw in zip(ticket_ids, r.hmget(PUSH_TICKETS_KEY, ticket_ids))
+            }
+            tickets = [
+                PushTicket(push_message=None, status=PushTicket.SUCCESS_STATUS, message='', details=None, id=ticket_id)
+                for ticket_id in ticket_ids
+            ]
+            try:
+                receipts = client.check_receipts_multiple(tickets)
+            except (PushServerError, requests.RequestException) as e:
+                logger.error("Fetching %s push receipts failed: %s", len(tickets), e)
+                break
+
+            done = []
+            for receipt in receipts:
+                info = infos.get(receipt.id)
+                done.append(receipt.id)
+                if info is None:
+                    continue
+                checked += 1
+                if receipt.is_success():
+                    delivered += 1
+                    registry.inc("prisma_push_receipts_total", (info["y"], "ok"))
+                    continue
+                code = _error_code(receipt)
+                registry.inc("prisma_push_receipts_total", (info["y"], code))
+                if code == DEVICE_NOT_REGISTERED:
+                    dead_tokens.append(info["k"])
+            # Receipts not available yet stay queued unless Expo has already dropped them
+            received = set(done)
+            expired = [
+                ticket_id for ticket_id, info in infos.items()
+                if ticket_id not in received and (info is None or now - info["ts"] > RECEIPT_MAX_AGE_SECONDS)
+            ]
+            finished = done + expired
+            if finished:
+                pipe = r.pipeline(transaction=False)
+                pipe.hdel(PUSH_TICKETS_KEY, *finished)
+                pipe.zrem(PUSH_TICKETS_DUE_KEY, *finished)
+                pipe.execute()
+            offset += len(ticket_ids) - len(finished)
+    finally:
+        r.close()
+    pruned = prune_dead_tokens(dead_tokens)
+    registry.flush()
+    return f"Checked {checked} push receipts: {delivered} delivered, {pruned} dead tokens pruned"
 
 
 @shared_task
@@ -15,19 +412,23 @@ def send_push_notification(user_id, title, message, type):
         if not user.allow_push_notifications:
             return f"Push notification not sent: User {user_id} has disabled push notifications"
 
-        push_client = PushClient()
-        response = push_client.publish(
+        response = get_push_client().publish(
             PushMessage(
                 to=user.notification_token,
                 title=title,
                 body=message,
-                data={
-                    "type": type,
-                    "title": title,
-                    "body": message
-                }
+                data=_push_data(title, message, type)
             )
         )
+        if response.is_success():
+            registry.inc("prisma_push_tickets_total", (_type_name(type), "ok"))
+            if response.id:
+                _record_tickets([(response.id, str(user.id), user.notification_token, _type_name(type))])
+        else:
+            code = _error_code(response)
+            registry.inc("prisma_push_tickets_total", (_type_name(type), code))
+            if code == DEVICE_NOT_REGISTERED:
+                prune_dead_tokens([user.notification_token])
 
         if response and hasattr(response, 'data') and response.data:
             return f"Push notification sent successfully to user {user_id}"
@@ -36,5 +437,5 @@ def send_push_notification(user_id, title, message, type):
 
     except Exception as e:
         error_msg = f"Failed to send push notification to user {user_id}: {str(e)}"
-        print(error_msg)
+        logger.error(error_msg)
         return error_msg
@@ -1,51 +1,84 @@
+import logging
+
 from celery import shared_task
 from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from main.tasks.notifications.push import send_push_notification
+from main.services import NotificationInbox
+from main.tasks.notifications.push import enqueue_pushes
+from main.utils import reminders
+from main.utils.batch_jobs import JobRun, iter_chunks
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(name='main.tasks.send_service_reminders')
 def send_service_reminders():
+    """Send reminders whose timers are due. Runs every minute; cost is proportional to due reminders."""
     from main.models import BookedAppointment
 
-    now = timezone.now()
-    reminder_start = now + timedelta(minutes=25)
-    reminder_end = now + timedelta(minutes=35)
-
+    sent = 0
     try:
-        appointments = BookedAppointment.objects.filter(
-            appointment_date=now.date(),
-            start_time__gte=reminder_start.time(),
-            start_time__lte=reminder_end.time(),
-            status='confirmed'
-        )
+        while True:
+            booking_ids = reminders.claim_due()
+            if not booking_ids:
+                break
+            now = timezone.now()
+            pushes = []
+            rescheduled = []
+            for appointment in BookedAppointment.objects.filter(id__in=booking_ids).select_related('service_type'):
+                due_at = reminders.reminder_due_at(appointment)
+                if due_at is None:
+                    continue
+                if due_at > now + timedelta(minutes=1):
+                    # Moved later by a write that skipped the post_save signal
+                    rescheduled.append(appointment)
+                    continue
+                # reminder_sent_at guards against a second send if the timer is ever re-added
+                if not BookedAppointment.objects.filter(id=appointment.id, reminder_sent_at__isnull=True).update(reminder_sent_at=now):
+                    continue
+                pushes.append((
+                    appointment.user_id,
+                    "Service Reminder ⏰",
+                    f"Your {appointment.service_type.name} service is starting in 30 minutes at {appointment.start_time}",
+                    "service_reminder"
+                ))
+            reminders.schedule_many(rescheduled)
+            enqueue_pushes(pushes)
+            sent += len(pushes)
+
+        return f"Sent {sent} service reminders"
 
-        print(f"Found {appointments.count()} appointments for reminder")
+    except Exception as e:
+        logger.error("Error sending service reminders: %s", e)
+        return f"Failed to send service reminders: {str(e)}"
 
-        for appointment in appointments:
-            send_push_notification.delay(
-                appointment.user.id,
-                "Service Reminder ⏰",
-                f"Your {appointment.service_type.name} service is starting in 30 minutes at {appointment.start_time}",
-                "service_reminder"
-            )
-            print(f"Service reminder sent successfully for appointment {appointment.booking_reference}")
 
-        return f"Processed {appointments.count()} appointments for reminders"
+@shared_task(name='main.tasks.sync_service_reminders')
+def sync_service_reminders():
+    """Re-add timers for upcoming confirmed bookings, covering Redis restarts and the initial backfill."""
+    from main.models import BookedAppointment
 
-    except Exception as e:
-        print(f"Error sending service reminder: {str(e)}")
-        return f"Failed to send service reminder: {str(e)}"
+    upcoming = BookedAppointment.objects.filter(
+        appointment_date__gte=timezone.localdate(),
+        status__in=reminders.REMINDABLE_STATUSES,
+        start_time__isnull=False,
+        reminder_sent_at__isnull=True,
+    ).only('id', 'status', 'appointment_date', 'start_time', 'reminder_sent_at')
+    scheduled = reminders.schedule_many(upcoming.iterator(chunk_size=reminders.PIPELINE_CHUNK))
+    return f"Synced {scheduled} service reminder timers"
 
 
 @shared_task(name='main.tasks.send_promotion_expiration')
 def send_promotion_expiration():
     """Send a notification to all users with promotions expiring in the next 24 hours."""
-    from main.models import Promotions
+    from main.models import Notification, Promotions
 
     now = timezone.now()
     tomorrow = now + timedelta(days=1)
+    run = JobRun('send_promotion_expiration')
 
     try:
         expiring_promotions = Promotions.objects.filter(
@@ -56,28 +89,35 @@ def send_promotion_expiration():
         ).select_related('user')
         notifications_sent = 0
 
-        for promotion in expiring_promotions:
-            user = promotion.user
-
-            if user.allow_push_notifications and user.notification_token:
-                send_push_notification.delay(
-                    user.id,
-                    "Promotion Expiring Soon ⏰",
-                    f"Your {promotion.title} ({promotion.discount_percentage}% off) expires tomorrow! Don't miss out on this great deal.",
-                    "promotion_expiring"
-                )
-                notifications_sent += 1
-
-            from main.models import Notification
-            Notification.objects.create(
-                user=user,
-                title="Promotion Expiring Soon ⏰",
-                message=f"Your {promotion.title} ({promotion.discount_percentage}% off) expires tomorrow! Book now to take advantage of this offer.",
-                type='warning',
-                status='active'
-            )
-
-        return f"Promotion expiration notifications processed: {notifications_sent} push notifications sent for {expiring_promotions.count()} expiring promotions"
+        for chunk in iter_chunks(expiring_promotions):
+            pushes = []
+            notifications = []
+            for promotion in chunk:
+                user = promotion.user
+
+                if user.allow_push_notifications and user.notification_token:
+                    pushes.append((
+                        user.id,
+                        "Promotion Expiring Soon ⏰",
+                        f"Your {promotion.title} ({promotion.discount_percentage}% off) expires tomorrow! Don't miss out on this great deal.",
+                        "promotion_expiring"
+                    ))
+
+                notifications.append(Notification(
+                    user=user,
+                    title="Promotion Expiring Soon ⏰",
+                    message=f"Your {promotion.title} ({promotion.discount_percentage}% off) expires tomorrow! Book now to take advantage of this offer.",
+                    type='warning',
+                    status='active'
+                ))
+
+            Notification.objects.bulk_create(notifications)
+            NotificationInbox.record_created(notifications)
+            enqueue_pushes(pushes)
+            notifications_sent += len(pushes)
+            run.add(len(chunk))
+
+        return f"Promotion expiration notifications processed: {notifications_sent} push notifications sent for {run.rows} expiring promotions, {run.finish()}"
 
     except Exception as e:
         return f"Failed to send promotion expiration notifications: {str(e)}"
@@ -87,8 +127,10 @@ def send_promotion_expiration():
 def check_loyalty_decay():
     """Reset loyalty for users inactive for 60+ days."""
     from main.models import LoyaltyProgram, Notification
+    from main.utils.response_cache import TAG_LOYALTY, bump_tags, user_tag
 
     sixty_days_ago = timezone.now().date() - timedelta(days=60)
+    run = JobRun('check_loyalty_decay')
 
     try:
         inactive_loyalties = LoyaltyProgram.objects.filter(
@@ -96,33 +138,46 @@ def check_loyalty_decay():
             completed_bookings__gt=0
         ).select_related('user')
 
-        reset_count = 0
-        for loyalty in inactive_loyalties:
-            user = loyalty.user
-            old_tier = loyalty.current_tier
-
-            loyalty.completed_bookings = 0
-            loyalty.current_tier = 'bronze'
-            loyalty.save()
-            reset_count += 1
-
-            if user.allow_push_notifications and user.notification_token:
-                send_push_notification.delay(
-                    user.id,
-                    "Loyalty Tier Reset",
-                    "Your loyalty tier has been reset to Bronze due to 60 days of inactivity. Book a service to start earning points again!",
-                    "loyalty_reset"
-                )
-
-            Notification.objects.create(
-                user=user,
-                title="Loyalty Tier Reset",
-                message=f"Your loyalty tier has been reset from {old_tier.title()} to Bronze due to 60 days of inactivity. Book a service to start earning points again!",
-                type='info',
-                status='info'
-            )
-
-        return f"Reset {reset_count} inactive loyalty accounts"
+        for chunk in iter_chunks(inactive_loyalties):
+            now = timezone.now()
+            pushes = []
+            notifications = []
+            for loyalty in chunk:
+                user = loyalty.user
+                old_tier = loyalty.current_tier
+
+                loyalty.completed_bookings = 0
+                loyalty.current_tier = 'bronze'
+                # bulk_update does not apply auto_now
+                loyalty.updated_at = now
+
+                if user.allow_push_notifications and user.notification_token:
+                    pushes.append((
+                        user.id,
+                        "Loyalty Tier Reset",
+                        "Your loyalty tier has been reset to Bronze due to 60 days of inactivity. Book a service to start earning points again!",
+                        "loyalty_reset"
+                    ))
+
+                notifications.append(Notification(
+                    user=user,
+                    title="Loyalty Tier Reset",
+                    message=f"Your loyalty tier has been reset from {old_tier.title()} to Bronze due to 60 days of inactivity. Book a service to start earning points again!",
+                    type='info',
+                    status='info'
+                ))
+
+            # One short write transaction per chunk
+            with transaction.atomic():
+                LoyaltyProgram.objects.bulk_update(chunk, ['completed_bookings', 'current_tier', 'updated_at'])
+                Notification.objects.bulk_create(notifications)
+            # Neither bulk call sends post_save, so update the unread counters and loyalty cache here
+            NotificationInbox.record_created(notifications)
+            bump_tags(*(user_tag(TAG_LOYALTY, loyalty.user_id) for loyalty in chunk))
+            enqueue_pushes(pushes)
+            run.add(len(chunk))
+
+        return f"Reset {run.rows} inactive loyalty accounts, {run.finish()}"
 
     except Exception as e:
         return f"Failed to check loyalty decay: {str(e)}"
@@ -142,10 +197,10 @@ def cleanup_expired_pending_bookings():
         count = expired_bookings.count()
         expired_bookings.delete()
 
-        print(f"Cleaned up {count} expired pending bookings")
+        logger.info("Cleaned up %s expired pending bookings", count)
         return f"Cleaned up {count} expired pending bookings"
     except Exception as e:
-        print(f"Failed to cleanup expired pending bookings: {str(e)}")
+        logger.error("Failed to cleanup expired pending bookings: %s", e)
         return f"Failed to cleanup expired pending bookings: {str(e)}"
 
 
@@ -154,27 +209,86 @@ def expire_old_transfers():
     """Expire transfer requests that are older than 7 days."""
     from main.models import VehicleTransfer
 
+    run = JobRun('expire_old_transfers')
     try:
         now = timezone.now()
         expired_transfers = VehicleTransfer.objects.filter(
             status='pending',
             expires_at__lt=now
-        )
+        ).select_related('to_owner', 'vehicle')
 
-        # Get list before update for notifications
-        transfer_list = list(expired_transfers)
-        count = len(transfer_list)
-        expired_transfers.update(status='expired', responded_at=now)
+        for chunk in iter_chunks(expired_transfers):
+            VehicleTransfer.objects.filter(
+                pk__in=[transfer.pk for transfer in chunk], status='pending'
+            ).update(status='expired', responded_at=now)
 
-        for transfer in transfer_list:
-            if transfer.to_owner.allow_push_notifications and transfer.to_owner.notification_token:
-                send_push_notification.delay(
+            enqueue_pushes(
+                (
                     transfer.to_owner.id,
                     "Transfer Request Expired",
                     f"Your transfer request for {transfer.vehicle.registration_number} has expired. You can submit a new request.",
                     "transfer_expired"
                 )
+                for transfer in chunk
+                if transfer.to_owner.allow_push_notifications and transfer.to_owner.notification_token
+            )
+            run.add(len(chunk))
 
-        return f"Expired {count} transfer requests"
+        return f"Expired {run.rows} transfer requests, {run.finish()}"
     except Exception as e:
         return f"Failed to expire old transfers: {str(e)}"
+
+
+@shared_task(name='main.tasks.archive_read_notifications')
+def archive_read_notifications():
+    """Move read notifications older than NOTIFICATION_RETENTION_DAYS to NotificationArchive."""
+    from main.models import Notification, NotificationArchive
+
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    run = JobRun('archive_read_notifications')
+    try:
+        old_read = Notification.objects.filter(is_read=True, timestamp__lt=cutoff)
+        for chunk in iter_chunks(old_read):
+            with transaction.atomic():
+                NotificationArchive.objects.bulk_create([
+                    NotificationArchive(
+                        id=n.id, user_id=n.user_id, title=n.title, message=n.message,
+                        type=n.type, status=n.status, timestamp=n.timestamp,
+                    )
+                    for n in chunk
+                ], ignore_conflicts=True)
+                # delete() still sends post_delete, which records the sync tombstones
+                Notification.objects.filter(pk__in=[n.pk for n in chunk]).delete()
+            run.add(len(chunk))
+        return f"Archived {run.rows} read notifications, {run.finish()}"
+    except Exception as e:
+        return f"Failed to archive read notifications: {str(e)}"
+
+
+@shared_task(name='main.tasks.prune_sync_tombstones')
+def prune_sync_tombstones():
+    """Delete sync tombstones past the retention window; clients with older cursors get a full resync."""
+    from main.models import SyncTombstone
+    from main.utils.sync import TOMBSTONE_RETENTION
+
+    try:
+        count, _ = SyncTombstone.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()
+        return f"Pruned {count} sync tombstones"
+    except Exception as e:
+        return f"Failed to prune sync tombstones: {str(e)}"
+
+
+@shared_task(name='main.tasks.rebuild_vin_bloom')
+def rebuild_vin_bloom():
+    """Rebuild the VIN bloom filter from every registered vehicle."""
+    from main.models import Vehicle
+    from main.utils import vin_bloom
+
+    try:
+        result = vin_bloom.rebuild(Vehicle.objects.values_list('vin', flat=True).iterator(chunk_size=5000))
+        if result is None:
+            return "VIN bloom filter rebuild skipped: another rebuild is running"
+        count, bits, hashes = result
+        return f"Rebuilt VIN bloom filter with {count} VINs ({bits} bits, {hashes} hashes)"
+    except Exception as e:
+        return f"Failed to rebuild VIN bloom filter: {str(e)}"
@@ -0,0 +1,152 @@
+"""
+Redis token-bucket throttling for public and unauthenticated endpoints.
+Each rule is a bucket keyed by client IP, user id or submitted email. All buckets of a request are
+checked and charged in one Lua script, so concurrent workers cannot overspend them. Rejected
+requests get a 429 with a Retry-After header (DRF sets it from TokenBucketThrottle.wait()).
+If Redis is unavailable, requests are let through.
+
+Rules are looked up as "<throttle_scope>:<action>" and then "<throttle_scope>". They can be
+overridden per scope with settings.RATE_LIMITS, e.g. {'vin:check_vin_exists': [('ip', 30, 60)]}
+means 30 requests per 60 seconds per IP, with bursts of up to 30.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from main.utils.metrics import registry
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "throttle:"
+
+KEY_IP = "ip"
+KEY_USER = "user"
+KEY_EMAIL = "email"
+
+# scope[:action] -> [(key kind, bucket capacity, seconds to refill the whole bucket)]
+DEFAULT_RATE_LIMITS = {
+    'login': [(KEY_IP, 20, 60), (KEY_EMAIL, 10, 900)],
+    'password_reset:request': [(KEY_IP, 5, 900), (KEY_EMAIL, 3, 3600)],
+    'password_reset:validate': [(KEY_IP, 20, 60)],
+    'password_reset:reset': [(KEY_IP, 10, 900)],
+    'password_reset:web': [(KEY_IP, 30, 60)],
+    'stripe_webhook': [(KEY_IP, 300, 60)],
+    'vin:check_vin_exists': [(KEY_IP, 30, 60), (KEY_USER, 60, 60)],
+    'vin:get_vehicle_history': [(KEY_IP, 30, 60), (KEY_EMAIL, 30, 60)],
+}
+
+# KEYS: bucket keys. ARGV: cost, then capacity and refill-per-second for each key.
+# Returns {allowed (0/1), milliseconds until the request would be allowed}.
+TOKEN_BUCKET_LUA = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait_ms = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1]) / 1000
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait_ms = math.max(wait_ms, math.ceil((cost - tokens) / rate))
+    end
+end
+local allowed = 0
+if wait_ms == 0 then
+    allowed = 1
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1]) / 1000
+    local tokens = levels[i]
+    if allowed == 1 then
+        tokens = tokens - cost
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate) + 1000)
+end
+return {allowed, wait_ms}
+"""
+
+
+def get_rules(scope, action=None):
+    limits = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+    if action and f"{scope}:{action}" in limits:
+        return f"{scope}:{action}", limits[f"{scope}:{action}"]
+    return scope, limits.get(scope, [])
+
+
+def _email_from_request(request):
+    try:
+        email = request.data.get('email') or request.query_params.get('email')
+    except Exception:
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def consume(rule_name, buckets, cost=1):
+    """
+    Charge `cost` tokens to every (identity, capacity, period) bucket at once.
+    Returns seconds to wait, or 0 when the request is allowed.
+    """
+    keys, args = [], [cost]
+    for identity, capacity, period in buckets:
+        # Hash identities so emails are not stored in Redis key names
+        digest = hashlib.sha1(identity.encode()).hexdigest()[:20]
+        keys.append(f"{KEY_PREFIX}{rule_name}:{digest}")
+        args.extend([capacity, capacity / period])
+    r = get_redis(decode_responses=True)
+    try:
+        allowed, wait_ms = r.register_script(TOKEN_BUCKET_LUA)(keys=keys, args=args)
+    finally:
+        r.close()
+    return 0 if allowed else int(wait_ms) / 1000
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle for views with a `throttle_scope`; action-dispatched views are limited per action.
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        rule_name, rules = get_rules(scope, view.kwargs.get('action'))
+        buckets = []
+        for kind, capacity, period in rules:
+            if kind == KEY_IP:
+                identity = self.get_ident(request)
+            elif kind == KEY_USER:
+                identity = str(request.user.id) if request.user and request.user.is_authenticated else None
+            elif kind == KEY_EMAIL:
+                identity = _email_from_request(request)
+            else:
+                identity = None
+            if identity:
+                buckets.append((f"{kind}:{identity}", capacity, period))
+        if not buckets:
+            return True
+        try:
+            self.wait_seconds = consume(rule_name, buckets)
+        except Exception as e:
+            logger.warning("Throttle check failed for %s, allowing request: %s", rule_name, e)
+            return True
+        if self.wait_seconds:
+            registry.inc("prisma_throttled_requests_total", (rule_name,))
+            logger.info("Throttled %s for %s (retry in %.1fs)", rule_name, self.get_ident(request), self.wait_seconds)
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
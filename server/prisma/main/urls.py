@@ -17,6 +17,8 @@ from main.views.fleet import FleetView
 from main.views.subcription import SubscriptionView
 from main.views.service_history import ServiceHistoryView
 from main.views.partner import PartnerView
+from main.views.metrics import MetricsView
+from main.views.sync import SyncView
 
 
 app_name = 'main'
@@ -60,6 +62,12 @@ urlpatterns = [
 
     # Partner (Dealership) endpoints
     path('partner/<action>/', PartnerView.as_view(), name='partner'),
+
+    # Delta sync for the mobile client
+    path('sync/<action>/', SyncView.as_view(), name='sync'),
+
+    # Internal Prometheus scrape endpoint
+    path('internal/metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 
@@ -1,43 +1,61 @@
+"""
+Microsoft Graph mail client.
+One GraphMailClient per process keeps the MSAL app (and its token cache), the current access token
+and a pooled requests.Session. Tokens are renewed TOKEN_REFRESH_MARGIN seconds before they expire,
+429/503 responses are retried after Retry-After, and send_batch packs up to 20 messages into each
+JSON $batch request.
+
+For local runs, point GRAPH_API_ENDPOINT at `manage.py graph_mail_stub` and set GRAPH_STATIC_TOKEN
+to skip Azure AD.
+"""
+import logging
 import os
-import requests
+import threading
+import time
+
 import msal
+import requests
+from requests.adapters import HTTPAdapter
 
-GRAPH_API_ENDPOINT = "https://graph.microsoft.com/v1.0"
+from main.utils.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+GRAPH_API_ENDPOINT = os.getenv("GRAPH_API_ENDPOINT", "https://graph.microsoft.com/v1.0")
+GRAPH_SCOPES = ["https://graph.microsoft.com/.default"]
 CLIENT_ID = os.getenv("GRAPH_CLIENT_ID")
 CLIENT_SECRET = os.getenv("GRAPH_CLIENT_SECRET")
 TENANT_ID = os.getenv("GRAPH_TENANT_ID")
 USER = os.getenv("GRAPH_USER")  # support@prismavalet.com
+# Bypasses MSAL when set (stub server / local development only)
+STATIC_TOKEN = os.getenv("GRAPH_STATIC_TOKEN")
 
+TOKEN_REFRESH_MARGIN = 300
+# Graph $batch accepts at most 20 requests
+BATCH_SIZE = 20
+MAX_ATTEMPTS = 5
+DEFAULT_RETRY_AFTER = 5
+MAX_RETRY_AFTER = 60
+REQUEST_TIMEOUT = 30
+RETRY_STATUSES = (429, 503, 504)
 
-def get_access_token():
-    authority = f"https://login.microsoftonline.com/{TENANT_ID}"
-    app = msal.ConfidentialClientApplication(
-        CLIENT_ID, authority=authority, client_credential=CLIENT_SECRET
-    )
-
-    result = app.acquire_token_silent(
-        ["https://graph.microsoft.com/.default"], account=None
-    )
 
-    if not result:
-        result = app.acquire_token_for_client(
-            scopes=["https://graph.microsoft.com/.default"]
-        )
+class GraphMailError(Exception):
+    pass
 
-    if "access_token" in result:
-        return result["access_token"]
-    else:
-        # Provide more helpful error message
-        raise Exception(
-            f"Failed to acquire access token: {result.get('error')}, {result.get('error_description')}"
-        )
 
+def _retry_after(headers, attempt):
+    """Seconds to wait from a Retry-After header, falling back to exponential backoff."""
+    value = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = DEFAULT_RETRY_AFTER * (2 ** attempt)
+    return min(max(seconds, 0), MAX_RETRY_AFTER)
 
 
-def send_mail(subject, body_html, recipient):
-    access_token = get_access_token()
-    headers = {"Authorization": f"Bearer {access_token}"}
-    email_msg = {
+def _message(subject, body_html, recipient):
+    return {
         "message": {
             "subject": subject,
             "body": {"contentType": "HTML", "content": body_html},
@@ -45,13 +63,142 @@ def send_mail(subject, body_html, recipient):
         }
     }
 
-    response = requests.post(
-        f"{GRAPH_API_ENDPOINT}/users/{USER}/sendMail",
-        headers=headers,
-        json=email_msg,
-    )
 
-    if response.status_code == 202:
-        return True
-    else:
-        raise Exception(f"Graph API error {response.status_code}: {response.text}")
+class GraphMailClient:
+    def __init__(self, endpoint=GRAPH_API_ENDPOINT, sender=USER):
+        self.endpoint = endpoint.rstrip("/")
+        self.sender = sender
+        self._lock = threading.Lock()
+        self._app = None
+        self._token = None
+        self._token_expires_at = 0.0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # --- Tokens ---
+
+    def _msal_app(self):
+        if self._app is None:
+            self._app = msal.ConfidentialClientApplication(
+                CLIENT_ID,
+                authority=f"https://login.microsoftonline.com/{TENANT_ID}",
+                client_credential=CLIENT_SECRET,
+            )
+        return self._app
+
+    def get_access_token(self, force_refresh=False):
+        if STATIC_TOKEN:
+            return STATIC_TOKEN
+        with self._lock:
+            if not force_refresh and self._token and time.time() < self._token_expires_at - TOKEN_REFRESH_MARGIN:
+                return self._token
+            # acquire_token_for_client serves from MSAL's cache until the token is close to expiry
+            result = self._msal_app().acquire_token_for_client(scopes=GRAPH_SCOPES)
+            if "access_token" not in result:
+                raise GraphMailError(
+                    f"Failed to acquire access token: {result.get('error')}, {result.get('error_description')}"
+                )
+            self._token = result["access_token"]
+            self._token_expires_at = time.time() + int(result.get("expires_in", 3600))
+            return self._token
+
+    # --- HTTP ---
+
+    def _post(self, path, payload):
+        """POST with token refresh on 401 and Retry-After aware retries on throttling."""
+        refreshed = False
+        for attempt in range(MAX_ATTEMPTS):
+            headers = {"Authorization": f"Bearer {self.get_access_token()}"}
+            with external_call("graph"):
+                response = self.session.post(
+                    f"{self.endpoint}{path}", headers=headers, json=payload, timeout=REQUEST_TIMEOUT
+                )
+            if response.status_code == 401 and not refreshed:
+                self.get_access_token(force_refresh=True)
+                refreshed = True
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < MAX_ATTEMPTS - 1:
+                wait = _retry_after(response.headers, attempt)
+                logger.warning("Graph API %s on %s, retrying in %.1fs", response.status_code, path, wait)
+                time.sleep(wait)
+                continue
+            return response
+        return response
+
+    def send_mail(self, subject, body_html, recipient):
+        response = self._post(f"/users/{self.sender}/sendMail", _message(subject, body_html, recipient))
+        if response.status_code == 202:
+            return True
+        raise GraphMailError(f"Graph API error {response.status_code}: {response.text}")
+
+    def send_batch(self, messages):
+        """
+        Send (subject, body_html, recipient) tuples, 20 per $batch request.
+        Returns {message index: None on success or an error string}.
+        """
+        results = {}
+        for start in range(0, len(messages), BATCH_SIZE):
+            pending = {str(start + i): message for i, message in enumerate(messages[start:start + BATCH_SIZE])}
+            for attempt in range(MAX_ATTEMPTS):
+                payload = {"requests": [
+                    {
+                        "id": request_id,
+                        "method": "POST",
+                        "url": f"/users/{self.sender}/sendMail",
+                        "headers": {"Content-Type": "application/json"},
+                        "body": _message(*message),
+                    }
+                    for request_id, message in pending.items()
+                ]}
+                response = self._post("/$batch", payload)
+                if response.status_code != 200:
+                    for request_id in pending:
+                        results[int(request_id)] = f"Graph $batch error {response.status_code}: {response.text}"
+                    break
+                throttled, wait = {}, 0.0
+                for item in response.json().get("responses", []):
+                    request_id, item_status = item.get("id"), item.get("status")
+                    if request_id not in pending:
+                        continue
+                    if item_status == 202:
+                        results[int(request_id)] = None
+                    elif item_status in RETRY_STATUSES and attempt < MAX_ATTEMPTS - 1:
+                        throttled[request_id] = pending[request_id]
+                        wait = max(wait, _retry_after(item.get("headers"), attempt))
+                    else:
+                        results[int(request_id)] = f"Graph API error {item_status}: {item.get('body')}"
+                if not throttled:
+                    break
+                logger.warning("Graph $batch throttled %s messages, retrying in %.1fs", len(throttled), wait)
+                time.sleep(wait)
+                pending = throttled
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide GraphMailClient."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GraphMailClient()
+    return _client
+
+
+def get_access_token():
+    return get_client().get_access_token()
+
+
+def send_mail(subject, body_html, recipient):
+    return get_client().send_mail(subject, body_html, recipient)
+
+
+def send_mail_batch(messages):
+    """Send (subject, body_html, recipient) tuples through $batch; returns {index: None or error}."""
+    return get_client().send_batch(list(messages))
@@ -0,0 +1,52 @@
+"""
+Helpers for scheduled jobs that touch many rows.
+iter_chunks pages through a queryset by primary key so no read cursor stays open while a chunk is
+written; each chunk is then updated with bulk_update / one UPDATE and its notifications inserted with
+bulk_create. JobRun reports throughput to the log, the task result and prisma_job_rows_total /
+prisma_job_seconds_total.
+"""
+import logging
+import time
+
+from main.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOB_CHUNK_SIZE = 1000
+
+
+def iter_chunks(queryset, size=JOB_CHUNK_SIZE):
+    """Yield lists of up to `size` rows in primary key order (keyset pagination, one short query per chunk)."""
+    last_pk = None
+    while True:
+        page = queryset.order_by('pk')
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        rows = list(page[:size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < size:
+            return
+        last_pk = rows[-1].pk
+
+
+class JobRun:
+    def __init__(self, job):
+        self.job = job
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, count):
+        self.rows += count
+
+    def finish(self):
+        """Record and return "<rows> rows in <s>s (<rate> rows/s)"."""
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0.0
+        registry.inc("prisma_job_rows_total", (self.job,), self.rows)
+        registry.inc("prisma_job_seconds_total", (self.job,), elapsed)
+        registry.flush()
+        summary = f"{self.rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+        logger.info("%s: %s", self.job, summary)
+        return summary
@@ -0,0 +1,201 @@
+"""
+Shared BookedAppointment serialization for dashboard, service history and fleet views.
+Each shape declares the related data it needs so callers get one query (plus one
+prefetch for add-ons) regardless of the number of rows; manage.py check_query_budgets fails if an
+endpoint using them starts issuing queries per row.
+"""
+from datetime import datetime, timedelta
+
+from main.util.media_helper import get_full_media_url
+
+UPCOMING_SELECT_RELATED = ('detailer', 'vehicle', 'address', 'service_type', 'valet_type')
+UPCOMING_PREFETCH_RELATED = ('add_ons',)
+
+SERVICE_HISTORY_FIELDS = (
+    'id', 'booking_date', 'appointment_date', 'status', 'total_amount', 'review_rating',
+    'booking_reference', 'bulk_order_id', 'service_type_id', 'service_type__name',
+    'valet_type_id', 'valet_type__name', 'vehicle_id', 'vehicle__registration_number',
+    'address_id', 'address__address', 'address__post_code', 'address__city', 'address__country',
+    'detailer_id', 'detailer__name', 'detailer__rating', 'detailer__phone',
+)
+
+RECENT_BOOKING_FIELDS = (
+    'id', 'booking_reference', 'vehicle_id', 'vehicle__registration_number',
+    'service_type_id', 'service_type__name', 'status', 'appointment_date', 'total_amount',
+)
+
+VEHICLE_BOOKING_FIELDS = (
+    'id', 'booking_reference', 'created_at', 'appointment_date', 'status',
+    'service_type_id', 'service_type__name', 'total_amount',
+)
+
+
+def _upcoming_detailer(detailer):
+    return {
+        "id": str(detailer.id) if detailer else None,
+        "name": detailer.name if detailer else None,
+        "rating": float(detailer.rating) if detailer and detailer.rating else 0.0,
+        "image": None,
+        "phone": detailer.phone if detailer else None,
+    }
+
+
+def _end_time(appointment_date, start_time, duration):
+    if not (start_time and duration):
+        return None
+    end_datetime = datetime.combine(appointment_date, start_time) + timedelta(minutes=duration)
+    return end_datetime.time().strftime('%H:%M')
+
+
+def with_upcoming_relations(queryset):
+    """Apply the joins and prefetches serialize_upcoming_appointment relies on."""
+    return queryset.select_related(*UPCOMING_SELECT_RELATED).prefetch_related(*UPCOMING_PREFETCH_RELATED)
+
+
+def serialize_upcoming_appointment(appointment):
+    """Dashboard upcoming appointment card. Expects with_upcoming_relations() applied."""
+    detailer = _upcoming_detailer(appointment.detailer)
+    vehicle = appointment.vehicle
+    address = appointment.address
+    service_type = appointment.service_type
+    valet_type = appointment.valet_type
+    return {
+        "booking_reference": str(appointment.booking_reference),
+        # Return detailers as array for backward compatibility and express service support
+        "detailers": [detailer] if appointment.detailer else [],
+        # Keep detailer for backward compatibility
+        "detailer": detailer,
+        "vehicle": {
+            "id": str(vehicle.id) if vehicle else None,
+            "model": vehicle.model if vehicle else None,
+            "make": vehicle.make if vehicle else None,
+            "year": vehicle.year if vehicle else None,
+            "color": vehicle.color if vehicle else None,
+            "licence": vehicle.registration_number if vehicle else None,
+            "image": get_full_media_url(vehicle.image.url) if (vehicle and vehicle.image) else None,
+        },
+        "address": {
+            "address": address.address if address else None,
+            "post_code": address.post_code if address else None,
+            "city": address.city if address else None,
+            "country": address.country if address else None,
+            "latitude": float(address.latitude) if address and address.latitude is not None else None,
+            "longitude": float(address.longitude) if address and address.longitude is not None else None,
+        },
+        "service_type": {
+            "id": str(service_type.id) if service_type else None,
+            "name": service_type.name if service_type else None,
+            "description": service_type.description if service_type else None,
+            "price": float(service_type.price) if service_type and service_type.price else 0.0,
+            "duration": service_type.duration if service_type else None,
+        },
+        "valet_type": {
+            "id": str(valet_type.id) if valet_type else None,
+            "name": valet_type.name if valet_type else None,
+            "description": valet_type.description if valet_type else None,
+        },
+        "booking_date": appointment.appointment_date.strftime('%Y-%m-%d'),
+        "total_amount": float(appointment.total_amount),
+        "estimated_duration": f"{appointment.duration} minutes" if appointment.duration else "Not specified",
+        "special_instructions": appointment.special_instructions,
+        "status": appointment.status,
+        "start_time": appointment.start_time.strftime('%H:%M') if appointment.start_time else None,
+        "end_time": _end_time(appointment.appointment_date, appointment.start_time, appointment.duration),
+        'add_ons': [
+            {
+                "id": str(add_on.id),
+                "name": add_on.name,
+                "price": float(add_on.price),
+                "description": add_on.description,
+                "extra_duration": add_on.extra_duration,
+            }
+            for add_on in appointment.add_ons.all()
+        ],
+    }
+
+
+def _service_history_vehicle_reg(row):
+    if row['vehicle_id']:
+        return row['vehicle__registration_number'] or 'Unknown'
+    if row['bulk_order_id'] and row['booking_reference']:
+        # Bulk slot: e.g. BULKxxx-3 -> "Vehicle 3"
+        ref = row['booking_reference']
+        if '-' in ref:
+            suffix = ref.split('-')[-1]
+            return f"Vehicle {suffix}" if suffix.isdigit() else ref
+        return 'Bulk'
+    return 'Unknown'
+
+
+def serialize_service_history(queryset):
+    """Service history rows (MyServiceHistoryProps) from a single values() query."""
+    items = []
+    for row in queryset.values(*SERVICE_HISTORY_FIELDS):
+        has_address = row['address_id'] is not None
+        if row['detailer_id']:
+            detailer = {
+                'id': str(row['detailer_id']),
+                'name': row['detailer__name'],
+                'rating': float(row['detailer__rating']) if row['detailer__rating'] else 0.0,
+                'phone': row['detailer__phone'],
+            }
+        else:
+            detailer = {'id': '', 'name': 'Unknown', 'rating': 0.0, 'phone': ''}
+        review_rating = row['review_rating']
+        items.append({
+            'id': str(row['id']),
+            'booking_date': row['booking_date'].isoformat(),
+            'appointment_date': row['appointment_date'].isoformat(),
+            'service_type': row['service_type__name'] if row['service_type_id'] else 'Unknown',
+            'valet_type': row['valet_type__name'] if row['valet_type_id'] else 'Unknown',
+            'vehicle_reg': _service_history_vehicle_reg(row),
+            'address': {
+                'id': str(row['address_id']) if has_address else '',
+                'address': row['address__address'] if has_address else '',
+                'post_code': row['address__post_code'] if has_address else '',
+                'city': row['address__city'] if has_address else '',
+                'country': row['address__country'] if has_address else '',
+            },
+            # Return detailers as array for backward compatibility and express service support
+            'detailers': [detailer] if row['detailer_id'] else [],
+            # Keep detailer for backward compatibility
+            'detailer': detailer,
+            'status': row['status'],
+            'total_amount': float(row['total_amount']),
+            'rating': float(review_rating) if review_rating else 0.0,
+            'is_reviewed': review_rating is not None and review_rating > 0,
+            'booking_reference': str(row['booking_reference']),
+        })
+    return items
+
+
+def serialize_recent_bookings(queryset):
+    """Fleet dashboard recent bookings list."""
+    return [
+        {
+            'id': str(row['id']),
+            'booking_reference': row['booking_reference'],
+            'vehicle_reg': row['vehicle__registration_number'] if row['vehicle_id'] else None,
+            'service_type': row['service_type__name'] if row['service_type_id'] else None,
+            'status': row['status'],
+            'appointment_date': row['appointment_date'].isoformat(),
+            'total_amount': float(row['total_amount']),
+        }
+        for row in queryset.values(*RECENT_BOOKING_FIELDS)
+    ]
+
+
+def serialize_vehicle_bookings(queryset):
+    """Fleet vehicle detail booking list."""
+    return [
+        {
+            'id': str(row['id']),
+            'booking_reference': row['booking_reference'],
+            'created_at': row['created_at'].isoformat(),
+            'appointment_date': row['appointment_date'].isoformat(),
+            'status': row['status'],
+            'service_type': row['service_type__name'] if row['service_type_id'] else 'N/A',
+            'total_amount': float(row['total_amount']),
+        }
+        for row in queryset.values(*VEHICLE_BOOKING_FIELDS)
+    ]
@@ -0,0 +1,116 @@
+"""
+Conditional GET for list actions.
+@conditional_action(version_func) computes a cheap version key for the caller's rows
+(typically count + max(updated_at) from one aggregate query) before running the handler.
+If it matches the client's If-None-Match the handler is skipped and a 304 is returned;
+otherwise the 200 response carries the ETag and a Last-Modified taken from the version parts.
+Only ETags are used for validation: a deletion lowers the count without moving max(updated_at),
+so If-Modified-Since alone could hide it.
+"""
+import hashlib
+import logging
+from datetime import date, datetime
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def queryset_version(queryset, *max_fields):
+    """(count, max(field) for each field) for a queryset in a single aggregate query."""
+    aggregates = {'n': Count('pk', distinct=True)}
+    for i, field in enumerate(max_fields):
+        aggregates[f'm{i}'] = Max(field)
+    row = queryset.order_by().aggregate(**aggregates)
+    return (row['n'],) + tuple(row[f'm{i}'] for i in range(len(max_fields)))
+
+
+def time_bucket(seconds):
+    """Current time rounded down to a window, for responses that also depend on wall-clock time."""
+    return int(timezone.now().timestamp() // seconds)
+
+
+def _flatten(parts):
+    for part in parts:
+        if isinstance(part, (tuple, list)):
+            yield from _flatten(part)
+        else:
+            yield part
+
+
+def _last_modified(parts):
+    stamps = [p for p in _flatten(parts) if isinstance(p, datetime)]
+    return max(stamps) if stamps else None
+
+
+def _make_etag(handler_name, request, parts):
+    raw = "|".join([
+        handler_name,
+        str(getattr(request.user, 'id', '')),
+        request.query_params.urlencode() if request.query_params else "",
+        *(p.isoformat() if isinstance(p, (datetime, date)) else str(p) for p in _flatten(parts)),
+    ])
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison: W/"x" and "x" are equivalent for GET
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_action(version_func):
+    """
+    Add ETag/304 handling to an action handler.
+    version_func(request) returns a tuple of version parts, or None to skip conditional handling
+    (e.g. when the caller has no scope and the handler returns an error).
+    """
+    def decorator(func):
+        handler_name = func.__qualname__
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in CONDITIONAL_METHODS:
+                return func(self, request, *args, **kwargs)
+            try:
+                parts = version_func(request)
+            except Exception as e:
+                logger.warning("Version key failed for %s: %s", handler_name, e)
+                parts = None
+            if parts is None:
+                return func(self, request, *args, **kwargs)
+
+            etag = _make_etag(handler_name, request, parts)
+            last_modified = _last_modified(parts)
+            if _etag_matches(request.headers.get('If-None-Match'), etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = func(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # Clients must revalidate; the data is per-user
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+    return decorator
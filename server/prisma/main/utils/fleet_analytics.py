@@ -9,7 +9,7 @@ from django.db.models.functions import Coalesce, TruncDate, TruncWeek, TruncMont
 from collections import defaultdict
 
 from main.models import (
-    Fleet, Branch, FleetVehicle, BookedAppointment, 
+    Fleet, Branch, BookedAppointment, 
     PaymentTransaction, RefundRecord, EventDataManagement, FleetMember
 )
 from main.utils.branch_spend import get_branch_spend_for_period
@@ -25,13 +25,9 @@ def get_branch_performance(fleet: Fleet, start_date: datetime, end_date: datetim
     performance_data = []
     
     for branch in branches:
-        # Get branch vehicles
-        branch_vehicles = FleetVehicle.objects.filter(fleet=fleet, branch=branch)
-        vehicle_ids = [bv.vehicle.id for bv in branch_vehicles]
-        
-        # Get bookings in date range
+        # Get bookings in date range (stamped with their vehicle's branch)
         branch_bookings = BookedAppointment.objects.filter(
-            vehicle_id__in=vehicle_ids,
+            branch=branch,
             appointment_date__gte=start_date.date(),
             appointment_date__lte=end_date.date(),
         )
@@ -222,12 +218,9 @@ def get_vehicle_health_scores(fleet: Fleet, start_date: datetime, end_date: date
     }
     
     for branch in branches:
-        branch_vehicles = FleetVehicle.objects.filter(fleet=fleet, branch=branch)
-        vehicle_ids = [bv.vehicle.id for bv in branch_vehicles]
-        
         # Get bookings with inspections in date range
         bookings = BookedAppointment.objects.filter(
-            vehicle_id__in=vehicle_ids,
+            branch=branch,
             appointment_date__gte=start_date.date(),
             appointment_date__lte=end_date.date(),
             status='completed',
@@ -243,7 +236,7 @@ def get_vehicle_health_scores(fleet: Fleet, start_date: datetime, end_date: date
                 
                 if score is not None:
                     branch_scores.append(score)
-                    vehicle_scores_map[str(booking.vehicle.id)].append(score)
+                    vehicle_scores_map[str(booking.vehicle_id)].append(score)
         
         # Calculate average for branch
         avg_branch_score = sum(branch_scores) / len(branch_scores) if branch_scores else None
@@ -273,11 +266,8 @@ def get_booking_activity(fleet: Fleet, start_date: datetime, end_date: datetime)
     activity_data = {}
     
     for branch in branches:
-        branch_vehicles = FleetVehicle.objects.filter(fleet=fleet, branch=branch)
-        vehicle_ids = [bv.vehicle.id for bv in branch_vehicles]
-        
         bookings = BookedAppointment.objects.filter(
-            vehicle_id__in=vehicle_ids,
+            branch=branch,
             appointment_date__gte=start_date.date(),
             appointment_date__lte=end_date.date(),
         )
@@ -305,17 +295,10 @@ def get_common_issues(fleet: Fleet, start_date: datetime, end_date: datetime):
     Get most frequent inspection issues across fleet.
     Returns dict with issue type and count.
     """
-    branches = Branch.objects.filter(fleet=fleet)
-    all_vehicle_ids = []
-    
-    for branch in branches:
-        branch_vehicles = FleetVehicle.objects.filter(fleet=fleet, branch=branch)
-        vehicle_ids = [bv.vehicle.id for bv in branch_vehicles]
-        all_vehicle_ids.extend(vehicle_ids)
-    
-    # Get all inspections in date range
+    # Get all inspections in date range for vehicles assigned to a branch of this fleet
     bookings = BookedAppointment.objects.filter(
-        vehicle_id__in=all_vehicle_ids,
+        fleet=fleet,
+        branch__isnull=False,
         appointment_date__gte=start_date.date(),
         appointment_date__lte=end_date.date(),
         status='completed',
@@ -0,0 +1,122 @@
+"""
+Composite home screen payload.
+Runs the existing section handlers (profile, vehicles, upcoming appointments, ...) concurrently
+against one authenticated request and one resolved scope. A failing section is reported under
+'errors' while the others are still returned.
+
+The thread pool is shared by every request in the process (HOME_POOL_WORKERS threads) and one request
+uses at most HOME_REQUEST_WORKERS of them, so a burst of home requests queues instead of opening a DB
+connection per section.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils.module_loading import import_string
+
+from main.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+HOME_POOL_WORKERS = max(1, int(getattr(settings, 'HOME_POOL_WORKERS', 4)))
+HOME_REQUEST_WORKERS = max(1, int(getattr(settings, 'HOME_REQUEST_WORKERS', 2)))
+
+# section name -> (view class path, handler method)
+HOME_SECTIONS = {
+    'profile': ('main.views.profile.ProfileView', 'get_profile'),
+    'vehicles': ('main.views.garage.GarageView', 'get_vehicles'),
+    'upcoming_appointments': ('main.views.dashboard.DashboardView', '_get_upcoming_appointments'),
+    'recent_service': ('main.views.dashboard.DashboardView', '_get_recent_services'),
+    'user_stats': ('main.views.dashboard.DashboardView', '_get_user_stats'),
+    'promotions': ('main.views.events.EventsView', 'get_promotions'),
+    'free_wash': ('main.views.events.EventsView', 'check_free_wash'),
+    'notifications': ('main.views.notifications.NotificationsView', '_get_notifications'),
+}
+
+_executor = ThreadPoolExecutor(max_workers=HOME_POOL_WORKERS, thread_name_prefix='home-section')
+
+
+def parse_sections(value):
+    """'a,b' -> ['a', 'b'] limited to known sections; empty/None -> all sections."""
+    if not value:
+        return list(HOME_SECTIONS)
+    return [name for name in (part.strip() for part in value.split(',')) if name in HOME_SECTIONS]
+
+
+def select_fields(data, fields):
+    """Keep only the given top-level keys of a dict, or of each dict in a list."""
+    if not fields:
+        return data
+    if isinstance(data, dict):
+        return {key: value for key, value in data.items() if key in fields}
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    return data
+
+
+def _run_section(name, request, sample):
+    view_path, method = HOME_SECTIONS[name]
+    view = import_string(view_path)()
+    view.request = request
+    view.args = ()
+    view.kwargs = {'action': method}
+    view.format_kwarg = None
+    # Pool threads keep their DB connection between requests; drop it only when stale or broken,
+    # the same way Django does around each request
+    close_old_connections()
+    try:
+        # Worker threads have their own DB connection; attribute its queries to the home request
+        if sample is not None:
+            with connection.execute_wrapper(sample.db_wrapper):
+                return getattr(view, method)(request)
+        return getattr(view, method)(request)
+    finally:
+        close_old_connections()
+
+
+def _run_sections(names, request, sample):
+    """Run sections one after another on this thread; {name: (response, exception)}."""
+    results = {}
+    for name in names:
+        try:
+            results[name] = (_run_section(name, request, sample), None)
+        except Exception as e:
+            results[name] = (None, e)
+    return results
+
+
+def build_home(request, sections, fields_by_section=None):
+    """
+    Return (payload, errors) for the requested sections.
+    fields_by_section maps a section name to the set of top-level keys to keep.
+    """
+    fields_by_section = fields_by_section or {}
+    # Resolve the lazy scope once here so the worker threads share it instead of racing to build it
+    request.scope.user_id
+    sample = metrics.current_sample()
+
+    workers = min(HOME_REQUEST_WORKERS, len(sections))
+    futures = [
+        _executor.submit(contextvars.copy_context().run, _run_sections, sections[i::workers], request, sample)
+        for i in range(workers)
+    ]
+    results = {}
+    for future in futures:
+        results.update(future.result())
+
+    payload = {}
+    errors = {}
+    for name in sections:
+        response, error = results[name]
+        if error is not None:
+            logger.error("Home section %s failed: %s", name, error, exc_info=error)
+            errors[name] = 'Internal server error'
+            continue
+        data = response.data
+        if response.status_code >= 400:
+            errors[name] = data.get('error', 'Request failed') if isinstance(data, dict) else 'Request failed'
+            continue
+        payload[name] = select_fields(data, fields_by_section.get(name))
+    return payload, errors
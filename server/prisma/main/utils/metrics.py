@@ -0,0 +1,259 @@
+"""
+Per-(view, action) request metrics for the action-dispatched API views.
+ActionMetricsMiddleware opens an ActionSample per request; DB queries and external HTTP
+calls made while it is active are attributed to it. Each worker accumulates counters
+in-process and periodically adds them to a shared Redis hash, so the Prometheus
+endpoint reports totals across all workers.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "metrics:actions"
+FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL", "10"))
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> (type, help, label names); histogram series are stored as _bucket/_sum/_count
+METRICS = {
+    "prisma_action_requests_total": (
+        "counter", "Requests per view action and status class.", ("view", "action", "status")),
+    "prisma_action_latency_seconds": (
+        "histogram", "Request latency per view action.", ("view", "action")),
+    "prisma_action_db_queries_total": (
+        "counter", "Database queries executed per view action.", ("view", "action")),
+    "prisma_action_db_seconds_total": (
+        "counter", "Time spent in database queries per view action.", ("view", "action")),
+    "prisma_action_external_http_seconds_total": (
+        "counter", "Time spent in external HTTP calls per view action.", ("view", "action", "target")),
+    "prisma_action_external_http_calls_total": (
+        "counter", "External HTTP calls per view action.", ("view", "action", "target")),
+    "prisma_action_response_bytes_total": (
+        "counter", "Response body bytes per view action.", ("view", "action")),
+    "prisma_external_http_seconds_total": (
+        "counter", "Time spent in external HTTP calls, including background tasks.", ("target",)),
+    "prisma_external_http_calls_total": (
+        "counter", "External HTTP calls, including background tasks.", ("target",)),
+    "prisma_throttled_requests_total": (
+        "counter", "Requests rejected by a token-bucket rate limit.", ("rule",)),
+    "prisma_push_tickets_total": (
+        "counter", "Expo push tickets by notification type and status (ok or Expo error code).", ("type", "status")),
+    "prisma_push_receipts_total": (
+        "counter", "Expo push receipts by notification type and status (ok or Expo error code).", ("type", "status")),
+    "prisma_push_coalesced_total": (
+        "counter", "Queued pushes merged into another push to the same user, by type.", ("type",)),
+    "prisma_push_rate_limited_total": (
+        "counter", "Queued pushes dropped by the per-user rate cap, by type.", ("type",)),
+    "prisma_push_tokens_pruned_total": (
+        "counter", "Push tokens cleared after Expo reported DeviceNotRegistered.", ()),
+    "prisma_vin_bloom_checks_total": (
+        "counter", "VIN bloom filter lookups by result (definite_miss, maybe, false_positive, unavailable).", ("result",)),
+    "prisma_job_rows_total": (
+        "counter", "Rows processed by chunked scheduled jobs.", ("job",)),
+    "prisma_job_seconds_total": (
+        "counter", "Wall time spent in chunked scheduled jobs.", ("job",)),
+}
+
+_FIELD_SEP = "\t"
+_current_sample = contextvars.ContextVar("action_metrics_sample", default=None)
+
+
+class ActionSample:
+    """Counters for one request; view/action are filled in once the URL is resolved."""
+
+    __slots__ = ("view", "action", "db_queries", "db_seconds", "http")
+
+    def __init__(self):
+        self.view = None
+        self.action = None
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.http = defaultdict(lambda: [0.0, 0])  # target -> [seconds, calls]
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing every query run for this request."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, flushed to Redis every FLUSH_INTERVAL_SECONDS."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, amount=1.0):
+        with self._lock:
+            self._values[(name, labels)] += amount
+
+    def observe_request(self, sample, status_code, seconds, response_bytes):
+        labels = (sample.view, sample.action)
+        bucket = next((str(b) for b in LATENCY_BUCKETS if seconds <= b), "+Inf")
+        with self._lock:
+            values = self._values
+            values[("prisma_action_requests_total", labels + (f"{status_code // 100}xx",))] += 1
+            values[("prisma_action_latency_seconds_bucket", labels + (bucket,))] += 1
+            values[("prisma_action_latency_seconds_sum", labels)] += seconds
+            values[("prisma_action_latency_seconds_count", labels)] += 1
+            values[("prisma_action_db_queries_total", labels)] += sample.db_queries
+            values[("prisma_action_db_seconds_total", labels)] += sample.db_seconds
+            values[("prisma_action_response_bytes_total", labels)] += response_bytes
+            for target, (http_seconds, calls) in sample.http.items():
+                values[("prisma_action_external_http_seconds_total", labels + (target,))] += http_seconds
+                values[("prisma_action_external_http_calls_total", labels + (target,))] += calls
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """Add local counters to the shared Redis hash. Returns False (keeping the counters) if Redis is down."""
+        with self._lock:
+            pending, self._values = self._values, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return True
+        try:
+            r = get_redis()
+            try:
+                pipe = r.pipeline(transaction=False)
+                for (name, labels), amount in pending.items():
+                    pipe.hincrbyfloat(METRICS_KEY, _FIELD_SEP.join((name,) + labels), amount)
+                pipe.execute()
+            finally:
+                r.close()
+            return True
+        except Exception as e:
+            logger.warning("Metrics flush to Redis failed: %s", e)
+            with self._lock:
+                for key, amount in pending.items():
+                    self._values[key] += amount
+            return False
+
+    def collect(self):
+        """Totals across workers from Redis, or this worker's counters if Redis is unavailable."""
+        if self.flush():
+            try:
+                r = get_redis()
+                try:
+                    raw = r.hgetall(METRICS_KEY)
+                finally:
+                    r.close()
+                values = {}
+                for field, amount in raw.items():
+                    name, *labels = field.split(_FIELD_SEP)
+                    values[(name, tuple(labels))] = float(amount)
+                return values
+            except Exception as e:
+                logger.warning("Metrics read from Redis failed: %s", e)
+        with self._lock:
+            return dict(self._values)
+
+
+registry = MetricsRegistry()
+
+
+def start_sample():
+    """Open an ActionSample for the current request; returns (sample, token) for end_sample."""
+    sample = ActionSample()
+    return sample, _current_sample.set(sample)
+
+
+def end_sample(token):
+    _current_sample.reset(token)
+
+
+def current_sample():
+    """The ActionSample of the request being handled in this context, if any."""
+    return _current_sample.get()
+
+
+@contextmanager
+def external_call(target):
+    """Time an outbound HTTP call ('stripe', 'detailer', 'graph') against the current action."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        sample = _current_sample.get()
+        if sample is not None:
+            entry = sample.http[target]
+            entry[0] += seconds
+            entry[1] += 1
+        registry.inc("prisma_external_http_seconds_total", (target,), seconds)
+        registry.inc("prisma_external_http_calls_total", (target,))
+        if sample is None:
+            registry.maybe_flush()
+
+
+def install_stripe_timing():
+    """Route Stripe API calls through a RequestsClient that reports to external_call('stripe')."""
+    import stripe
+
+    class TimedRequestsClient(stripe.RequestsClient):
+        def request(self, *args, **kwargs):
+            with external_call("stripe"):
+                return super().request(*args, **kwargs)
+
+    stripe.default_http_client = TimedRequestsClient()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _histogram_lines(name, label_names, values):
+    lines = []
+    buckets = defaultdict(dict)
+    for (series, labels), amount in values.items():
+        if series == f"{name}_bucket":
+            buckets[labels[:-1]][labels[-1]] = amount
+    bounds = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+    for labels in sorted(buckets):
+        cumulative = 0.0
+        for le in bounds:
+            cumulative += buckets[labels].get(le, 0.0)
+            lines.append(f"{name}_bucket{_label_str(label_names + ('le',), labels + (le,))} {cumulative}")
+        lines.append(f"{name}_sum{_label_str(label_names, labels)} {values.get((f'{name}_sum', labels), 0.0)}")
+        lines.append(f"{name}_count{_label_str(label_names, labels)} {values.get((f'{name}_count', labels), 0.0)}")
+    return lines
+
+
+def render_prometheus(values=None):
+    """Prometheus text exposition (format 0.0.4) of all action metrics."""
+    if values is None:
+        values = registry.collect()
+    lines = []
+    for name, (metric_type, help_text, label_names) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == "histogram":
+            lines.extend(_histogram_lines(name, label_names, values))
+            continue
+        for (series, labels), amount in sorted(values.items()):
+            if series == name:
+                lines.append(f"{name}{_label_str(label_names, labels)} {amount}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,91 @@
+"""
+Service reminder timers.
+Each confirmed booking with a start time has one member in the REMINDERS_KEY sorted set, scored by
+the Unix time its reminder is due (REMINDER_LEAD before the appointment starts). The booking
+post_save signal adds, moves or removes the timer whenever status, date or time change, so the
+dispatcher only reads timers that are due instead of scanning BookedAppointment.
+
+Redis is not the source of truth: BookedAppointment.reminder_sent_at makes sending idempotent, and
+sync_service_reminders re-adds timers for upcoming bookings in case Redis lost them.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_KEY = "reminders:service"
+REMINDER_LEAD = timedelta(minutes=30)
+REMINDABLE_STATUSES = ('confirmed',)
+PIPELINE_CHUNK = 500
+
+
+def reminder_due_at(booking):
+    """Aware datetime the reminder is due, or None when the booking gets no reminder."""
+    if booking.status not in REMINDABLE_STATUSES or not booking.start_time or booking.reminder_sent_at:
+        return None
+    starts_at = timezone.make_aware(datetime.combine(booking.appointment_date, booking.start_time))
+    if starts_at <= timezone.now():
+        return None
+    return starts_at - REMINDER_LEAD
+
+
+def schedule_many(bookings):
+    """Add, move or cancel the timers of `bookings`. Returns the number of timers set."""
+    scheduled = 0
+    try:
+        r = get_redis()
+        try:
+            pipe = r.pipeline(transaction=False)
+            for i, booking in enumerate(bookings, 1):
+                due_at = reminder_due_at(booking)
+                if due_at is None:
+                    pipe.zrem(REMINDERS_KEY, str(booking.pk))
+                else:
+                    pipe.zadd(REMINDERS_KEY, {str(booking.pk): due_at.timestamp()})
+                    scheduled += 1
+                if i % PIPELINE_CHUNK == 0:
+                    pipe.execute()
+            pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        # The hourly sync_service_reminders run picks these up again
+        logger.warning("Failed to update service reminder timers: %s", e)
+    return scheduled
+
+
+def schedule(booking):
+    schedule_many([booking])
+
+
+def cancel(booking_id):
+    try:
+        r = get_redis()
+        try:
+            r.zrem(REMINDERS_KEY, str(booking_id))
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to cancel service reminder for %s: %s", booking_id, e)
+
+
+def claim_due(limit=500):
+    """
+    Remove and return ids of bookings whose reminder is due. A timer is only returned to the worker
+    whose ZREM removed it, so concurrent dispatchers never claim the same booking.
+    """
+    r = get_redis()
+    try:
+        ids = r.zrangebyscore(REMINDERS_KEY, "-inf", timezone.now().timestamp(), start=0, num=limit)
+        if not ids:
+            return []
+        pipe = r.pipeline(transaction=False)
+        for booking_id in ids:
+            pipe.zrem(REMINDERS_KEY, booking_id)
+        return [booking_id for booking_id, removed in zip(ids, pipe.execute()) if removed]
+    finally:
+        r.close()
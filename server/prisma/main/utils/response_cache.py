@@ -0,0 +1,186 @@
+"""
+Declarative response caching for action handlers.
+@cached_action(ttl=..., scope=..., tags=...) on a handler method caches its 200 response data
+in Redis with an in-process LRU in front. Keys embed the current version of each tag, so
+bump_tags() (called from model signals) invalidates every dependent entry at once.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+SCOPE_GLOBAL = "global"
+SCOPE_USER = "user"
+
+KEY_PREFIX = "rcache:"
+TAG_KEY_PREFIX = "rcache:tag:"
+L1_MAX_ENTRIES = 512
+# How long a worker trusts its copy of a tag version; bumps from other workers show up within this window
+TAG_VERSION_LOCAL_TTL = 2.0
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+# Catalog tags (bumped by main.signals.cache)
+TAG_SERVICE_TYPES = "service_types"
+TAG_VALET_TYPES = "valet_types"
+TAG_ADD_ONS = "add_ons"
+TAG_SUBSCRIPTION_PLANS = "subscription_plans"
+TAG_TERMS = "terms"
+TAG_PRIVACY_POLICY = "privacy_policy"
+# Per-user tag names; use user_tag(name, user_id) to bump, "<name>:{user_id}" to declare
+TAG_PROMOTIONS = "promotions"
+TAG_LOYALTY = "loyalty"
+TAG_REFERRAL = "referral"
+
+
+class _LRU:
+    """Small thread-safe LRU of (expires_at, value) entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_l1 = _LRU(L1_MAX_ENTRIES)
+_tag_versions = _LRU(L1_MAX_ENTRIES)
+
+
+def _resolve_tag_versions(r, tags):
+    versions = {}
+    missing = []
+    for tag in tags:
+        version = _tag_versions.get(tag)
+        if version is None:
+            missing.append(tag)
+        else:
+            versions[tag] = version
+    if missing:
+        for tag, version in zip(missing, r.mget([TAG_KEY_PREFIX + tag for tag in missing])):
+            versions[tag] = version or "0"
+            _tag_versions.set(tag, versions[tag], TAG_VERSION_LOCAL_TTL)
+    return [versions[tag] for tag in tags]
+
+
+def bump_tags(*tags):
+    """Invalidate every cached response that declared any of these tags."""
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return
+    for tag in tags:
+        _tag_versions.discard(tag)
+    try:
+        r = get_redis(decode_responses=True)
+        try:
+            pipe = r.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(TAG_KEY_PREFIX + tag)
+            pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to bump cache tags %s: %s", tags, e)
+
+
+def user_tag(name, user_id):
+    """Per-user tag, matching the '{user_id}' template used in cached_action(tags=...)."""
+    return f"{name}:{user_id}"
+
+
+def _cache_key(handler_name, owner, versions, request):
+    query = request.query_params.urlencode() if request.query_params else ""
+    query_hash = hashlib.md5(query.encode()).hexdigest()[:12] if query else "-"
+    return f"{KEY_PREFIX}{handler_name}:{owner}:{'.'.join(versions) or '-'}:{query_hash}"
+
+
+def cached_action(ttl, scope=SCOPE_GLOBAL, tags=()):
+    """
+    Cache a handler's successful GET response.
+    scope: SCOPE_GLOBAL (one entry for everyone) or SCOPE_USER (one entry per authenticated user).
+    tags: invalidation tags; '{user_id}' in a tag is replaced with the caller's id.
+    Falls through to the handler whenever Redis is unavailable.
+    """
+    def decorator(func):
+        handler_name = func.__qualname__
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in CACHEABLE_METHODS:
+                return func(self, request, *args, **kwargs)
+            owner = SCOPE_GLOBAL
+            if scope == SCOPE_USER:
+                if not request.user.is_authenticated:
+                    return func(self, request, *args, **kwargs)
+                owner = str(request.user.id)
+            resolved_tags = [tag.format(user_id=owner) for tag in tags]
+
+            try:
+                r = get_redis(decode_responses=True)
+            except Exception as e:
+                logger.warning("Response cache unavailable for %s: %s", handler_name, e)
+                return func(self, request, *args, **kwargs)
+            try:
+                try:
+                    versions = _resolve_tag_versions(r, resolved_tags)
+                    key = _cache_key(handler_name, owner, versions, request)
+                    # L1 stores a 1-tuple so a cached null body (e.g. no active promotion) is still a hit
+                    entry = _l1.get(key)
+                    if entry is None:
+                        raw = r.get(key)
+                        if raw is not None:
+                            entry = (json.loads(raw),)
+                            _l1.set(key, entry, ttl)
+                    if entry is not None:
+                        return Response(entry[0], status=status.HTTP_200_OK)
+                except Exception as e:
+                    logger.warning("Response cache read failed for %s: %s", handler_name, e)
+                    return func(self, request, *args, **kwargs)
+
+                response = func(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK and isinstance(response, Response):
+                    try:
+                        raw = json.dumps(response.data, cls=DjangoJSONEncoder)
+                        r.set(key, raw, ex=ttl)
+                        # Keep L1 in the same shape a Redis hit would produce
+                        _l1.set(key, (json.loads(raw),), ttl)
+                    except Exception as e:
+                        logger.warning("Response cache write failed for %s: %s", handler_name, e)
+                return response
+            finally:
+                r.close()
+
+        wrapper.cache_tags = tuple(tags)
+        return wrapper
+    return decorator
@@ -0,0 +1,201 @@
+"""
+Request scope resolver for fleet, branch and ownership checks.
+Resolves the caller's fleet, managed branch, role, subscription status and branch
+vehicle ids once per request, and caches the result in Redis for a short TTL.
+"""
+import json
+import logging
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+SCOPE_KEY_PREFIX = "scope:"
+SCOPE_TTL_SECONDS = 60
+
+
+def _scope_key(user_id):
+    return f"{SCOPE_KEY_PREFIX}{user_id}"
+
+
+class Scope:
+    """Resolved fleet/branch scope for a user. Related objects are loaded lazily by id."""
+
+    def __init__(self, user_id, is_fleet_owner=False, is_branch_admin=False, role=None,
+                 fleet_id=None, branch_id=None, subscription_end=None, branch_vehicle_ids=None,
+                 fleet_admin_or_manager=False):
+        self.user_id = str(user_id) if user_id else None
+        self.is_fleet_owner = is_fleet_owner
+        self.is_branch_admin = is_branch_admin
+        self.role = role
+        self.fleet_id = fleet_id
+        self.branch_id = branch_id
+        self.subscription_end = subscription_end
+        self.branch_vehicle_ids = list(branch_vehicle_ids or [])
+        self.fleet_admin_or_manager = fleet_admin_or_manager
+        self._fleet = None
+        self._managed_branch = None
+
+    @property
+    def fleet(self):
+        """Fleet owned by the user, or the fleet of their membership."""
+        if self._fleet is None and self.fleet_id:
+            from main.models import Fleet
+            self._fleet = Fleet.objects.filter(id=self.fleet_id).first()
+        return self._fleet
+
+    @property
+    def managed_branch(self):
+        """Branch the user administers (same rules as User.get_managed_branch)."""
+        if self._managed_branch is None and self.branch_id:
+            from main.models import Branch
+            self._managed_branch = Branch.objects.select_related('fleet').filter(id=self.branch_id).first()
+        return self._managed_branch
+
+    @property
+    def is_fleet_admin_or_manager(self):
+        """Admin or manager in any of the user's fleets (same as User.is_fleet_admin_or_manager)."""
+        return self.fleet_admin_or_manager
+
+    @property
+    def has_active_subscription(self):
+        if not self.subscription_end:
+            return False
+        return self.subscription_end >= timezone.now()
+
+    def can_view_vehicle_details(self):
+        """Mirror of User.can_view_vehicle_details without the per-call queries."""
+        if not (self.is_fleet_owner or self.is_branch_admin):
+            return True
+        if not self.fleet_id:
+            return False
+        return self.has_active_subscription
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'is_fleet_owner': self.is_fleet_owner,
+            'is_branch_admin': self.is_branch_admin,
+            'role': self.role,
+            'fleet_id': self.fleet_id,
+            'branch_id': self.branch_id,
+            'subscription_end': self.subscription_end.isoformat() if self.subscription_end else None,
+            'branch_vehicle_ids': self.branch_vehicle_ids,
+            'fleet_admin_or_manager': self.fleet_admin_or_manager,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        subscription_end = data.get('subscription_end')
+        return cls(
+            user_id=data['user_id'],
+            is_fleet_owner=data.get('is_fleet_owner', False),
+            is_branch_admin=data.get('is_branch_admin', False),
+            role=data.get('role'),
+            fleet_id=data.get('fleet_id'),
+            branch_id=data.get('branch_id'),
+            subscription_end=parse_datetime(subscription_end) if subscription_end else None,
+            branch_vehicle_ids=data.get('branch_vehicle_ids'),
+            fleet_admin_or_manager=data.get('fleet_admin_or_manager', False),
+        )
+
+
+def build_scope(user):
+    """Resolve the scope for a user from the database."""
+    from main.models import Fleet, FleetMember, FleetSubscription, FleetVehicle
+
+    memberships = list(
+        FleetMember.objects.filter(user=user).order_by('id').values('role', 'fleet_id', 'branch_id')
+    )
+    admin_membership = next((m for m in memberships if m['role'] == 'admin'), None)
+    membership = admin_membership or (memberships[0] if memberships else None)
+
+    role = membership['role'] if membership else None
+    fleet_id = None
+    branch_id = None
+    if user.is_fleet_owner:
+        fleet_id = Fleet.objects.filter(owner=user).values_list('id', flat=True).first()
+    elif membership:
+        fleet_id = membership['fleet_id']
+    if user.is_branch_admin and admin_membership:
+        branch_id = admin_membership['branch_id']
+
+    subscription_end = None
+    if fleet_id:
+        subscription_end = FleetSubscription.objects.filter(
+            fleet_id=fleet_id,
+            status__in=['active', 'trialing'],
+            end_date__gte=timezone.now()
+        ).values_list('end_date', flat=True).first()
+
+    branch_vehicle_ids = []
+    if branch_id:
+        branch_vehicle_ids = [
+            str(vid) for vid in FleetVehicle.objects.filter(branch_id=branch_id).values_list('vehicle_id', flat=True)
+        ]
+
+    return Scope(
+        user_id=user.id,
+        is_fleet_owner=user.is_fleet_owner,
+        is_branch_admin=user.is_branch_admin,
+        role=role,
+        fleet_id=str(fleet_id) if fleet_id else None,
+        branch_id=str(branch_id) if branch_id else None,
+        subscription_end=subscription_end,
+        branch_vehicle_ids=branch_vehicle_ids,
+        fleet_admin_or_manager=any(m['role'] in ('admin', 'manager') for m in memberships),
+    )
+
+
+def get_scope(user):
+    """Return the cached scope for a user, building and caching it on a miss."""
+    if not getattr(user, 'is_authenticated', False):
+        return Scope(user_id=None)
+    key = _scope_key(user.id)
+    try:
+        r = get_redis(decode_responses=True)
+        try:
+            raw = r.get(key)
+            if raw:
+                data = json.loads(raw)
+                # Flag changes on the user row take effect without waiting for the TTL
+                if (data.get('is_fleet_owner') == user.is_fleet_owner
+                        and data.get('is_branch_admin') == user.is_branch_admin):
+                    return Scope.from_dict(data)
+            scope = build_scope(user)
+            r.set(key, json.dumps(scope.to_dict()), ex=SCOPE_TTL_SECONDS)
+            return scope
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Scope cache unavailable for user %s: %s", user.id, e)
+        return build_scope(user)
+
+
+def invalidate_scope(*user_ids):
+    """Drop cached scopes for the given users."""
+    keys = [_scope_key(uid) for uid in user_ids if uid]
+    if not keys:
+        return
+    try:
+        r = get_redis(decode_responses=True)
+        try:
+            r.delete(*keys)
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to invalidate scope for %s: %s", user_ids, e)
+
+
+def invalidate_fleet_scopes(fleet_id):
+    """Drop cached scopes for a fleet's owner and all of its members."""
+    from main.models import Fleet, FleetMember
+    user_ids = list(FleetMember.objects.filter(fleet_id=fleet_id).values_list('user_id', flat=True))
+    owner_id = Fleet.objects.filter(id=fleet_id).values_list('owner_id', flat=True).first()
+    if owner_id:
+        user_ids.append(owner_id)
+    invalidate_scope(*user_ids)
+
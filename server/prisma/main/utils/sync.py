@@ -0,0 +1,277 @@
+"""
+Delta sync for the mobile client.
+Each resource is read with a keyset cursor on (updated_at, id) so only rows changed since the
+client's last sync are returned; removals come from SyncTombstone rows after the cursor's
+tombstone id. Cursors are opaque base64 JSON handed back to the client on every sync.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from main.models import (
+    Address, BookedAppointment, Branch, FleetVehicle, Notification, Promotions, SyncTombstone, Vehicle,
+)
+from main.util.media_helper import get_full_media_url
+from main.utils.booking_serialization import serialize_service_history
+
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 1000
+# Rows saved in the last couple of seconds may belong to transactions that have not committed yet;
+# they are picked up by the next sync instead of being skipped past by the cursor
+SYNC_LAG = timedelta(seconds=2)
+# Tombstones are pruned after this; older cursors get a full resync (reset=True)
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+RESOURCE_NOTIFICATIONS = 'notifications'
+RESOURCE_BOOKINGS = 'bookings'
+RESOURCE_VEHICLES = 'vehicles'
+RESOURCE_ADDRESSES = 'addresses'
+RESOURCE_PROMOTIONS = 'promotions'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor:
+    """High-water marks for one resource: last (updated_at, id) seen and last tombstone id."""
+
+    def __init__(self, updated_at=None, last_id=None, tombstone_id=0, issued_at=None):
+        self.updated_at = updated_at
+        self.last_id = last_id
+        self.tombstone_id = tombstone_id
+        self.issued_at = issued_at
+
+    def encode(self):
+        payload = {
+            't': self.updated_at.isoformat() if self.updated_at else None,
+            'i': self.last_id,
+            'd': self.tombstone_id,
+            's': self.issued_at.isoformat() if self.issued_at else None,
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+    @classmethod
+    def decode(cls, value):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(value.encode()))
+            return cls(
+                updated_at=parse_datetime(payload['t']) if payload.get('t') else None,
+                last_id=payload.get('i'),
+                tombstone_id=int(payload.get('d') or 0),
+                issued_at=parse_datetime(payload['s']) if payload.get('s') else None,
+            )
+        except (ValueError, TypeError, KeyError, binascii.Error) as e:
+            raise InvalidCursor(str(e))
+
+
+def record_tombstones(resource, object_ids, owner_id=None, fleet_id=None, branch_id=None):
+    """Record that these objects left the owner's / fleet's / branch's view."""
+    SyncTombstone.objects.bulk_create([
+        SyncTombstone(resource=resource, object_id=str(object_id), owner_id=owner_id,
+                      fleet_id=fleet_id, branch_id=branch_id)
+        for object_id in object_ids
+    ])
+
+
+def _owner_or_scope_q(request):
+    """Tombstone filter for everything the caller can see: own rows plus their branch or fleet."""
+    scope = request.scope
+    q = Q(owner_id=request.user.id)
+    if request.user.is_branch_admin and scope.branch_id:
+        q |= Q(branch_id=scope.branch_id)
+    elif request.user.is_fleet_owner and scope.fleet_id:
+        q |= Q(fleet_id=scope.fleet_id)
+    return q
+
+
+# --- Resource querysets and serializers ---
+
+def _notifications_queryset(request):
+    return Notification.objects.filter(user=request.user)
+
+
+def serialize_notifications(queryset):
+    return [
+        {
+            'id': str(n.id),
+            'title': n.title,
+            'message': n.message,
+            'type': n.type,
+            'status': n.status,
+            'timestamp': n.timestamp.isoformat(),
+            'is_read': n.is_read,
+        }
+        for n in queryset
+    ]
+
+
+def _bookings_queryset(request):
+    scope = request.scope
+    q = Q(user=request.user)
+    if request.user.is_branch_admin and scope.branch_id:
+        q |= Q(branch_id=scope.branch_id)
+    elif request.user.is_fleet_owner and scope.fleet_id:
+        q |= Q(fleet_id=scope.fleet_id)
+    return BookedAppointment.objects.filter(q)
+
+
+def _vehicles_queryset(request):
+    scope = request.scope
+    if request.user.is_fleet_owner:
+        return Vehicle.objects.filter(fleet_associations__fleet_id=scope.fleet_id) if scope.fleet_id else Vehicle.objects.none()
+    if request.user.is_branch_admin:
+        return Vehicle.objects.filter(fleet_associations__branch_id=scope.branch_id) if scope.branch_id else Vehicle.objects.none()
+    return Vehicle.objects.filter(ownerships__owner=request.user, ownerships__end_date__isnull=True).distinct()
+
+
+def _serialize_vehicles(queryset):
+    vehicles = list(queryset)
+    branches = {
+        row['vehicle_id']: row
+        for row in FleetVehicle.objects.filter(vehicle__in=vehicles).values('vehicle_id', 'branch_id', 'branch__name')
+    }
+    items = []
+    for vehicle in vehicles:
+        item = {
+            'id': str(vehicle.id),
+            'make': vehicle.make,
+            'model': vehicle.model,
+            'year': vehicle.year,
+            'color': vehicle.color,
+            'registration_number': vehicle.registration_number,
+            'country': vehicle.country,
+            'vin': vehicle.vin,
+            'image': get_full_media_url(vehicle.image.url) if vehicle.image else None,
+        }
+        association = branches.get(vehicle.id)
+        if association:
+            item['branch_id'] = str(association['branch_id']) if association['branch_id'] else 'unassigned'
+            item['branch_name'] = association['branch__name'] or 'Unassigned'
+        items.append(item)
+    return items
+
+
+def _addresses_queryset(request):
+    # Fleet owners and branch admins book against branch addresses (same rules as get_addresses)
+    scope = request.scope
+    if request.user.is_fleet_owner:
+        return Branch.objects.filter(fleet_id=scope.fleet_id) if scope.fleet_id else Branch.objects.none()
+    if request.user.is_branch_admin:
+        return Branch.objects.filter(id=scope.branch_id) if scope.branch_id else Branch.objects.none()
+    return Address.objects.filter(user=request.user)
+
+
+def _serialize_addresses(queryset):
+    items = []
+    for row in queryset:
+        if isinstance(row, Branch):
+            items.append({
+                'id': str(row.id),
+                'address': row.address or '',
+                'post_code': row.postcode or '',
+                'city': row.city or '',
+                'country': row.country or '',
+                'latitude': None,
+                'longitude': None,
+            })
+        else:
+            items.append({
+                'id': str(row.id),
+                'address': row.address,
+                'post_code': row.post_code,
+                'city': row.city,
+                'country': row.country,
+                'latitude': float(row.latitude) if row.latitude else None,
+                'longitude': float(row.longitude) if row.longitude else None,
+            })
+    return items
+
+
+def _promotions_queryset(request):
+    return Promotions.objects.filter(user=request.user)
+
+
+def _serialize_promotions(queryset):
+    return [
+        {
+            'id': str(p.id),
+            'title': p.title,
+            'discount_percentage': p.discount_percentage,
+            'valid_until': p.valid_until.strftime('%Y-%m-%d'),
+            'is_active': p.is_active,
+            'terms_conditions': p.terms_conditions,
+        }
+        for p in queryset
+    ]
+
+
+# name -> (visible rows, serializer)
+SYNC_RESOURCES = {
+    RESOURCE_NOTIFICATIONS: (_notifications_queryset, serialize_notifications),
+    RESOURCE_BOOKINGS: (_bookings_queryset, serialize_service_history),
+    RESOURCE_VEHICLES: (_vehicles_queryset, _serialize_vehicles),
+    RESOURCE_ADDRESSES: (_addresses_queryset, _serialize_addresses),
+    RESOURCE_PROMOTIONS: (_promotions_queryset, _serialize_promotions),
+}
+
+
+def sync_resource(request, resource, cursor, limit):
+    """
+    Return {'updated', 'deleted', 'cursor', 'has_more', 'reset'} for one resource.
+    cursor is None for a first sync; a cursor older than TOMBSTONE_RETENTION triggers a full resync.
+    """
+    queryset_func, serialize = SYNC_RESOURCES[resource]
+    now = timezone.now()
+    reset = False
+    if cursor is not None and cursor.issued_at and now - cursor.issued_at > TOMBSTONE_RETENTION:
+        cursor, reset = None, True
+    if cursor is None:
+        # Nothing on the device yet, so earlier deletions are irrelevant
+        latest = SyncTombstone.objects.filter(resource=resource).aggregate(last=Max('id'))['last']
+        cursor = Cursor(tombstone_id=latest or 0)
+
+    base = queryset_func(request)
+    changed = base.filter(updated_at__lt=now - SYNC_LAG)
+    if cursor.updated_at is not None:
+        changed = changed.filter(
+            Q(updated_at__gt=cursor.updated_at) | Q(updated_at=cursor.updated_at, pk__gt=cursor.last_id)
+        )
+    page = list(changed.order_by('updated_at', 'pk').values_list('pk', 'updated_at')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    tombstones = list(
+        SyncTombstone.objects.filter(resource=resource, id__gt=cursor.tombstone_id)
+        .filter(_owner_or_scope_q(request))
+        .order_by('id').values_list('id', 'object_id')[:limit + 1]
+    )
+    has_more = has_more or len(tombstones) > limit
+    tombstones = tombstones[:limit]
+
+    rows = base.model.objects.filter(pk__in=[pk for pk, _ in page]).order_by('updated_at', 'pk')
+    updated = serialize(rows) if page else []
+    # A tombstone for a row the caller can still see (e.g. moved between their own branches, or back)
+    # must not delete it on the device, whether it is on this page or an earlier/later one
+    tombstoned_ids = [object_id for _, object_id in tombstones]
+    visible = set()
+    if tombstoned_ids:
+        visible = {str(pk) for pk in base.filter(pk__in=tombstoned_ids).values_list('pk', flat=True)}
+    next_cursor = Cursor(
+        updated_at=page[-1][1] if page else cursor.updated_at,
+        last_id=str(page[-1][0]) if page else cursor.last_id,
+        tombstone_id=tombstones[-1][0] if tombstones else cursor.tombstone_id,
+        issued_at=now,
+    )
+    return {
+        'updated': updated,
+        'deleted': [object_id for object_id in tombstoned_ids if object_id not in visible],
+        'cursor': next_cursor.encode(),
+        'has_more': has_more,
+        'reset': reset,
+    }
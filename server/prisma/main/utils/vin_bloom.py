@@ -0,0 +1,237 @@
+"""
+Bloom filter of known VINs in front of the public VIN existence probe.
+The filter is a plain Redis bitmap shared by all workers: k bit positions per VIN, derived from one
+blake2b digest by double hashing. A clear bit means the VIN is definitely not registered, so the probe
+is answered without touching the database; only "maybe" answers are checked against Vehicle.
+
+The filter only grows (new vehicles are added by a post_save signal). VINs that are edited or deleted
+stay in it as false positives until the next rebuild_vin_bloom, which runs daily and whenever the key is
+missing. Rebuilds write a temporary key and RENAME it over the live one. While a rebuild runs, add()
+also records bits in a delta bitmap that is ORed into the new filter just before the RENAME, so VINs
+registered during the database scan are never lost (a bloom filter must not give false negatives).
+Only one rebuild runs at a time: rebuild() takes REBUILD_LOCK_KEY itself and returns None if it is held.
+"""
+import hashlib
+import logging
+import math
+import secrets
+
+from django.conf import settings
+
+from main.utils.metrics import registry
+from main.utils.redis_streams import get_redis
+
+logger = logging.getLogger(__name__)
+
+BLOOM_KEY = "vin_bloom"
+BLOOM_META_KEY = "vin_bloom:meta"
+REBUILD_REQUEST_KEY = "vin_bloom:rebuild_requested"  # dedupes request_rebuild
+REBUILD_REQUEST_SECONDS = 600
+REBUILD_LOCK_KEY = "vin_bloom:rebuild_lock"  # held by the running rebuild
+BLOOM_BUILDING_KEY = f"{BLOOM_KEY}:building"
+BLOOM_DELTA_KEY = f"{BLOOM_KEY}:delta"  # bits added while a rebuild is scanning
+REBUILDING_KEY = f"{BLOOM_KEY}:rebuilding"
+REBUILD_MAX_SECONDS = 3600
+
+# Set the bits on the live filter (if built) and, during a rebuild, on the delta. One script so a
+# rebuild's final swap script sees either all of an add or none of it.
+_ADD_SCRIPT = """
+local live = redis.call('EXISTS', KEYS[1]) == 1
+local rebuilding = redis.call('EXISTS', KEYS[3]) == 1
+for _, position in ipairs(ARGV) do
+  if live then redis.call('SETBIT', KEYS[1], position, 1) end
+  if rebuilding then redis.call('SETBIT', KEYS[2], position, 1) end
+end
+if rebuilding then redis.call('EXPIRE', KEYS[2], %d) end
+if live then redis.call('HINCRBY', KEYS[4], 'count', 1) end
+return live and 1 or 0
+""" % REBUILD_MAX_SECONDS
+
+# Swap the new filter in only if this rebuild still holds the lock (it may have expired mid-scan)
+_FINISH_SCRIPT = """
+if redis.call('GET', KEYS[6]) ~= ARGV[1] then
+  redis.call('DEL', KEYS[1])
+  return 0
+end
+redis.call('BITOP', 'OR', KEYS[1], KEYS[1], KEYS[2])
+redis.call('RENAME', KEYS[1], KEYS[3])
+redis.call('HSET', KEYS[4], 'count', ARGV[2], 'bits', ARGV[3], 'hashes', ARGV[4])
+redis.call('DEL', KEYS[2], KEYS[5], KEYS[6], KEYS[7])
+return 1
+"""
+
+# Give up a rebuild that failed: stop recording the delta and free the lock, if still ours
+_ABORT_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+return redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+"""
+
+CAPACITY = int(getattr(settings, 'VIN_BLOOM_CAPACITY', 1_000_000))
+ERROR_RATE = float(getattr(settings, 'VIN_BLOOM_ERROR_RATE', 0.001))
+
+# Result labels for prisma_vin_bloom_checks_total
+RESULT_DEFINITE_MISS = "definite_miss"
+RESULT_MAYBE = "maybe"
+RESULT_FALSE_POSITIVE = "false_positive"
+RESULT_UNAVAILABLE = "unavailable"
+
+
+def filter_size(capacity=CAPACITY, error_rate=ERROR_RATE):
+    """(bits, hash count) for the target capacity and false-positive rate."""
+    bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+NUM_BITS, NUM_HASHES = filter_size()
+
+
+def _positions(vin, num_bits=NUM_BITS, num_hashes=NUM_HASHES):
+    digest = hashlib.blake2b(vin.upper().strip().encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'big')
+    h2 = int.from_bytes(digest[8:], 'big') | 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+def might_contain(vin):
+    """
+    False when the VIN is definitely unknown, True when it may exist.
+    None when the filter is missing or Redis is down; a rebuild is then requested and callers use the DB.
+    """
+    try:
+        r = get_redis()
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.exists(BLOOM_KEY)
+            for position in _positions(vin):
+                pipe.getbit(BLOOM_KEY, position)
+            exists, *bits = pipe.execute()
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("VIN bloom filter unavailable: %s", e)
+        registry.inc("prisma_vin_bloom_checks_total", (RESULT_UNAVAILABLE,))
+        return None
+    if not exists:
+        registry.inc("prisma_vin_bloom_checks_total", (RESULT_UNAVAILABLE,))
+        request_rebuild()
+        return None
+    result = all(bits)
+    registry.inc("prisma_vin_bloom_checks_total", (RESULT_MAYBE if result else RESULT_DEFINITE_MISS,))
+    return result
+
+
+def record_false_positive():
+    """The filter said maybe but the VIN is not in the database."""
+    registry.inc("prisma_vin_bloom_checks_total", (RESULT_FALSE_POSITIVE,))
+
+
+def add(vin):
+    """
+    Add a VIN to the live filter (and to the rebuild delta while a rebuild runs).
+    Call after the vehicle is committed, so a rebuild that starts later sees it in the database.
+    """
+    if not vin:
+        return
+    try:
+        r = get_redis()
+        try:
+            script = r.register_script(_ADD_SCRIPT)
+            script(keys=[BLOOM_KEY, BLOOM_DELTA_KEY, REBUILDING_KEY, BLOOM_META_KEY], args=list(_positions(vin)))
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to add VIN to bloom filter: %s", e)
+
+
+def request_rebuild():
+    """Queue rebuild_vin_bloom unless another worker already did in the last REBUILD_REQUEST_SECONDS."""
+    from main.tasks import rebuild_vin_bloom
+
+    try:
+        r = get_redis()
+        try:
+            if not r.set(REBUILD_REQUEST_KEY, "1", nx=True, ex=REBUILD_REQUEST_SECONDS):
+                return
+        finally:
+            r.close()
+        rebuild_vin_bloom.delay()
+    except Exception as e:
+        logger.warning("Failed to request VIN bloom rebuild: %s", e)
+
+
+def start_rebuild():
+    """
+    Take the rebuild lock and mark a rebuild as running so add() starts recording into the delta.
+    Returns the lock token, or None if another rebuild holds the lock. Call before reading VINs.
+    """
+    token = secrets.token_hex(8)
+    r = get_redis()
+    try:
+        if not r.set(REBUILD_LOCK_KEY, token, nx=True, ex=REBUILD_MAX_SECONDS):
+            return None
+        pipe = r.pipeline(transaction=True)
+        pipe.delete(BLOOM_DELTA_KEY)
+        pipe.set(REBUILDING_KEY, "1", ex=REBUILD_MAX_SECONDS)
+        pipe.execute()
+    finally:
+        r.close()
+    return token
+
+
+def rebuild(vins):
+    """
+    Replace the filter with one holding `vins`. Returns (count, bits, hashes), or None when another
+    rebuild is already running. `vins` should be a lazy database iterator: it is only read after
+    start_rebuild() has run here.
+    """
+    token = start_rebuild()
+    if token is None:
+        logger.info("VIN bloom rebuild already running, skipping")
+        return None
+    try:
+        bitmap = bytearray((NUM_BITS + 7) // 8)
+        count = 0
+        for vin in vins:
+            if not vin:
+                continue
+            # Redis bitmaps number bits from the most significant bit of each byte
+            for position in _positions(vin):
+                bitmap[position >> 3] |= 0x80 >> (position & 7)
+            count += 1
+        r = get_redis()
+        try:
+            r.set(BLOOM_BUILDING_KEY, bytes(bitmap))
+            finish = r.register_script(_FINISH_SCRIPT)
+            swapped = finish(
+                keys=[BLOOM_BUILDING_KEY, BLOOM_DELTA_KEY, BLOOM_KEY, BLOOM_META_KEY,
+                      REBUILDING_KEY, REBUILD_LOCK_KEY, REBUILD_REQUEST_KEY],
+                args=[token, count, NUM_BITS, NUM_HASHES],
+            )
+        finally:
+            r.close()
+    except Exception:
+        _abort_rebuild(token)
+        raise
+    if not swapped:
+        logger.warning("VIN bloom rebuild lost its lock after %s seconds, discarded", REBUILD_MAX_SECONDS)
+        return None
+    return count, NUM_BITS, NUM_HASHES
+
+
+def _abort_rebuild(token):
+    try:
+        r = get_redis()
+        try:
+            r.register_script(_ABORT_SCRIPT)(keys=[REBUILD_LOCK_KEY, REBUILDING_KEY, BLOOM_DELTA_KEY], args=[token])
+        finally:
+            r.close()
+    except Exception as e:
+        logger.warning("Failed to release VIN bloom rebuild lock: %s", e)
+
+
+def expected_false_positive_rate(count):
+    """Theoretical false-positive rate of the filter after `count` insertions."""
+    return (1 - math.exp(-NUM_HASHES * count / NUM_BITS)) ** NUM_HASHES
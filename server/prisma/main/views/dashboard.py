@@ -1,13 +1,42 @@
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from main.models import BookedAppointment, FleetVehicle, Branch, BulkOrder
+from main.models import BookedAppointment, Branch, BulkOrder
 from django.conf import settings
-from main.util.media_helper import get_full_media_url
 from django.utils import timezone
 from main.tasks import publish_review_to_detailer
 from main.utils.redis_geo import get_detailer_location as get_detailer_location_from_redis
+from main.utils.booking_serialization import serialize_upcoming_appointment, with_upcoming_relations
+from main.utils.conditional import conditional_action, queryset_version
+from main.utils.home import HOME_SECTIONS, build_home, parse_sections
+
+logger = logging.getLogger(__name__)
+
+UPCOMING_STATUSES = ["confirmed", "scheduled", "in_progress", "pending"]
+
+
+def _upcoming_appointments_version(request):
+    """Bookings and bulk orders behind the upcoming list, plus the date that bounds the bulk orders."""
+    today = timezone.now().date()
+    if request.user.is_branch_admin:
+        branch_id = request.scope.branch_id
+        if not branch_id:
+            return (today,)
+        bookings = BookedAppointment.objects.filter(branch_id=branch_id, status__in=UPCOMING_STATUSES)
+        bulk_orders = BulkOrder.objects.filter(branch_id=branch_id)
+    else:
+        bookings = BookedAppointment.objects.filter(user=request.user, status__in=UPCOMING_STATUSES)
+        bulk_orders = BulkOrder.objects.filter(user=request.user)
+    bulk_orders = bulk_orders.filter(payment_status__in=['succeeded', 'invoice_later'], appointment_date__gte=today)
+    return (
+        today,
+        queryset_version(bookings, 'updated_at', 'vehicle__updated_at', 'detailer__updated_at'),
+        queryset_version(bulk_orders, 'updated_at'),
+    )
+
 
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
@@ -19,14 +48,15 @@ class DashboardView(APIView):
         'get_user_stats': '_get_user_stats',
         'submit_review': 'submit_review',
         'get_detailer_location': '_get_detailer_location',
+        'home': '_get_home',
     }
 
     """ Here we will override the crud methods and define the methods that would route the url to the appropriate function """
     def get(self, request, *args, **kwargs):
         action = kwargs.get('action')
-        print(f"DashboardView.get - action: {action}, kwargs: {kwargs}")
+        logger.debug("DashboardView.get - action: %s, kwargs: %s", action, kwargs)
         if action not in self.action_handlers:
-            print(f"Invalid action: {action}, available actions: {list(self.action_handlers.keys())}")
+            logger.warning("Invalid action: %s, available actions: %s", action, list(self.action_handlers.keys()))
             return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
         handler = getattr(self, self.action_handlers[action])
         return handler(request)
@@ -39,152 +69,76 @@ class DashboardView(APIView):
         return handler(request)
     
 
+    def _get_home(self, request):
+        """
+        Home screen sections in one request, built concurrently.
+        Query params: sections=profile,vehicles,... (default: all) and fields.<section>=key1,key2
+        to keep only those top-level keys of a section. Failed sections are listed under 'errors'.
+        """
+        sections = parse_sections(request.query_params.get('sections'))
+        if not sections:
+            return Response(
+                {'error': f"No valid sections. Available: {', '.join(HOME_SECTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fields_by_section = {}
+        for name in sections:
+            fields = request.query_params.get(f'fields.{name}')
+            if fields:
+                fields_by_section[name] = {f.strip() for f in fields.split(',') if f.strip()}
+        payload, errors = build_home(request, sections, fields_by_section)
+        return Response({'sections': payload, 'errors': errors}, status=status.HTTP_200_OK)
+
+    @conditional_action(_upcoming_appointments_version)
     def _get_upcoming_appointments(self, request):
         try:
             # For branch admins, get appointments for all vehicles in their managed branch
             # For regular users, get appointments for their own vehicles
             if request.user.is_branch_admin:
-                managed_branch = request.user.get_managed_branch()
-                if managed_branch:
-                    # Get all vehicles in the managed branch
-                    branch_vehicles = FleetVehicle.objects.filter(
-                        fleet=managed_branch.fleet,
-                        branch=managed_branch
-                    ).select_related('vehicle')
-                    vehicle_ids = [fv.vehicle.id for fv in branch_vehicles if fv.vehicle]
-                    # Get appointments for vehicles in this branch
-                    if vehicle_ids:
-                        upcoming_appointments = BookedAppointment.objects.filter(
-                            vehicle_id__in=vehicle_ids,
-                            status__in=["confirmed", "scheduled", "in_progress", "pending"]
-                        ).select_related(
-                            'detailer', 'vehicle', 'address', 'service_type', 'valet_type'
-                        ).order_by('appointment_date', 'start_time')
-                    else:
-                        # No vehicles in branch, return empty
-                        upcoming_appointments = BookedAppointment.objects.none()
+                scope = request.scope
+                if scope.branch_id:
+                    # Bookings carry their vehicle's branch, so this is an indexed scan on (branch, status, date)
+                    upcoming_appointments = BookedAppointment.objects.filter(
+                        branch_id=scope.branch_id,
+                        status__in=UPCOMING_STATUSES
+                    ).order_by('appointment_date', 'start_time')
                 else:
                     # No managed branch, return empty
                     upcoming_appointments = BookedAppointment.objects.none()
             else:
-                print("Regular user - get their own appointments")
+                logger.debug("Regular user - get their own appointments")
                 # Regular user - get their own appointments
                 upcoming_appointments = BookedAppointment.objects.filter(
                     user=request.user, 
-                    status__in=["confirmed", "scheduled", "in_progress", "pending"]
-                ).select_related(
-                    'detailer', 'vehicle', 'address', 'service_type', 'valet_type'
+                    status__in=UPCOMING_STATUSES
                 ).order_by('appointment_date', 'start_time')
 
-                print("upcoming_appointments", upcoming_appointments)
-
-            upcoming_appointments_data = []
-            for appointment in upcoming_appointments:
-                # Calculate end time based on start time and duration
-                end_time = None
-                if appointment.start_time and appointment.duration:
-                    from datetime import datetime, timedelta
-                    start_datetime = datetime.combine(appointment.appointment_date, appointment.start_time)
-                    end_datetime = start_datetime + timedelta(minutes=appointment.duration)
-                    end_time = end_datetime.time().strftime('%H:%M')
-
-                add_ons_data = []
-                for add_on in appointment.add_ons.all():
-                    add_ons_data.append({
-                        "id": str(add_on.id),
-                        "name": add_on.name,
-                        "price": float(add_on.price),
-                        "description": add_on.description,
-                        "extra_duration": add_on.extra_duration,
-                    })
-
-                upcoming_appointments_data.append({
-                    "booking_reference": str(appointment.booking_reference),
-                    # Return detailers as array for backward compatibility and express service support
-                    "detailers": [
-                        {
-                            "id": str(appointment.detailer.id) if appointment.detailer else None,
-                            "name": appointment.detailer.name if appointment.detailer else None,
-                            "rating": float(appointment.detailer.rating) if appointment.detailer and appointment.detailer.rating else 0.0,
-                            "image": None,
-                            "phone": appointment.detailer.phone if appointment.detailer else None,
-                        }
-                    ] if appointment.detailer else [],
-                    # Keep detailer for backward compatibility
-                    "detailer": {
-                        "id": str(appointment.detailer.id) if appointment.detailer else None,
-                        "name": appointment.detailer.name if appointment.detailer else None,
-                        "rating": float(appointment.detailer.rating) if appointment.detailer and appointment.detailer.rating else 0.0,
-                        "image": None,
-                        "phone": appointment.detailer.phone if appointment.detailer else None,
-                    },
-                    "vehicle": {
-                        "id": str(appointment.vehicle.id) if appointment.vehicle else None,
-                        "model": appointment.vehicle.model if appointment.vehicle else None,
-                        "make": appointment.vehicle.make if appointment.vehicle else None,
-                        "year": appointment.vehicle.year if appointment.vehicle else None,
-                        "color": appointment.vehicle.color if appointment.vehicle else None,
-                        "licence": appointment.vehicle.registration_number if appointment.vehicle else None,
-                        "image": get_full_media_url(appointment.vehicle.image.url) if (appointment.vehicle and appointment.vehicle.image) else None,
-                    },
-                    "address": {
-                        "address": appointment.address.address if appointment.address else None,
-                        "post_code": appointment.address.post_code if appointment.address else None,
-                        "city": appointment.address.city if appointment.address else None,
-                        "country": appointment.address.country if appointment.address else None,
-                        "latitude": float(appointment.address.latitude) if appointment.address and appointment.address.latitude is not None else None,
-                        "longitude": float(appointment.address.longitude) if appointment.address and appointment.address.longitude is not None else None,
-                    },
-                    "service_type": {
-                        "id": str(appointment.service_type.id) if appointment.service_type else None,
-                        "name": appointment.service_type.name if appointment.service_type else None,
-                        "description": appointment.service_type.description if appointment.service_type else None,
-                        "price": float(appointment.service_type.price) if appointment.service_type and appointment.service_type.price else 0.0,
-                        "duration": appointment.service_type.duration if appointment.service_type else None,
-                    },
-                    "valet_type": {
-                        "id": str(appointment.valet_type.id) if appointment.valet_type else None,
-                        "name": appointment.valet_type.name if appointment.valet_type else None,
-                        "description": appointment.valet_type.description if appointment.valet_type else None,
-                    },
-                    "booking_date": appointment.appointment_date.strftime('%Y-%m-%d'),
-                    "total_amount": float(appointment.total_amount),
-                    "estimated_duration": f"{appointment.duration} minutes" if appointment.duration else "Not specified",
-                    "special_instructions": appointment.special_instructions,
-                    "status": appointment.status,
-                    "start_time": appointment.start_time.strftime('%H:%M') if appointment.start_time else None,
-                    "end_time": end_time,
-                    'add_ons': add_ons_data,
-                })
+            upcoming_appointments_data = [
+                serialize_upcoming_appointment(appointment)
+                for appointment in with_upcoming_relations(upcoming_appointments)
+            ]
 
-            # Add upcoming bulk orders (same user or branch)
-            from datetime import datetime as dt_module
+            # Add upcoming bulk orders (same user or branch); past orders are filtered on the indexed date column
             today = timezone.now().date()
             if getattr(request.user, 'is_branch_admin', False):
-                managed_branch = getattr(request.user, 'get_managed_branch', lambda: None)()
+                managed_branch_id = request.scope.branch_id
                 bulk_orders = BulkOrder.objects.filter(
-                    branch=managed_branch,
+                    branch_id=managed_branch_id,
                     payment_status__in=['succeeded', 'invoice_later'],
-                ).order_by('created_at') if managed_branch else BulkOrder.objects.none()
+                    appointment_date__gte=today,
+                ).order_by('created_at') if managed_branch_id else BulkOrder.objects.none()
             else:
                 bulk_orders = BulkOrder.objects.filter(
                     user=request.user,
                     payment_status__in=['succeeded', 'invoice_later'],
+                    appointment_date__gte=today,
                 ).order_by('created_at')
 
             for bulk in bulk_orders:
                 order_data = getattr(bulk, 'order_data', None) or {}
                 if not isinstance(order_data, dict):
                     continue
-                date_str = order_data.get('date')
-                if not date_str:
-                    continue
-                try:
-                    bulk_date = dt_module.strptime(date_str, '%Y-%m-%d').date()
-                except (ValueError, TypeError):
-                    continue
-                if bulk_date < today:
-                    continue
+                bulk_date = bulk.appointment_date
                 start_time_str = order_data.get('start_time', '06:00')
                 end_time_str = order_data.get('end_time', '21:00')
                 addr = order_data.get('address') or {}
@@ -294,9 +248,7 @@ class DashboardView(APIView):
             return Response(upcoming_appointments_data, status=status.HTTP_200_OK)
             
         except Exception as e:
-            import traceback
-            print(f"Error in _get_upcoming_appointments: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in _get_upcoming_appointments: %s", e)
             return Response(
                 {'error': f'Failed to fetch upcoming appointments: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -363,117 +315,22 @@ class DashboardView(APIView):
         
     def _get_recent_services(self, request):
         try:
-            # #region agent log
-            import json
-            import time
-            log_data = {
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": "A",
-                "location": "dashboard.py:_get_recent_services:entry",
-                "message": "Entry: _get_recent_services called",
-                "data": {
-                    "user_id": str(request.user.id),
-                    "user_email": request.user.email,
-                    "is_branch_admin": request.user.is_branch_admin,
-                    "is_fleet_owner": getattr(request.user, 'is_fleet_owner', False),
-                },
-                "timestamp": int(time.time() * 1000)
-            }
-            with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                f.write(json.dumps(log_data) + '\n')
-            # #endregion
-            
             # For branch admins, get recent services for all vehicles in their managed branch
             # For regular users, get their own recent services
             if request.user.is_branch_admin:
-                # #region agent log
-                log_data = {
-                    "sessionId": "debug-session",
-                    "runId": "run1",
-                    "hypothesisId": "A",
-                    "location": "dashboard.py:_get_recent_services:branch_admin_path",
-                    "message": "Branch admin path executed",
-                    "data": {"user_id": str(request.user.id)},
-                    "timestamp": int(time.time() * 1000)
-                }
-                with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                    f.write(json.dumps(log_data) + '\n')
-                # #endregion
-                
-                managed_branch = request.user.get_managed_branch()
-                
-                # #region agent log
-                log_data = {
-                    "sessionId": "debug-session",
-                    "runId": "run1",
-                    "hypothesisId": "D",
-                    "location": "dashboard.py:_get_recent_services:managed_branch_check",
-                    "message": "Managed branch check",
-                    "data": {
-                        "user_id": str(request.user.id),
-                        "managed_branch": str(managed_branch.id) if managed_branch else None,
-                        "branch_name": managed_branch.name if managed_branch else None,
-                    },
-                    "timestamp": int(time.time() * 1000)
-                }
-                with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                    f.write(json.dumps(log_data) + '\n')
-                # #endregion
+                managed_branch = request.scope.managed_branch
                 
                 if managed_branch:
-                    # Get all vehicles in the managed branch
-                    branch_vehicles = FleetVehicle.objects.filter(
-                        fleet=managed_branch.fleet,
-                        branch=managed_branch
-                    ).select_related('vehicle')
-                    vehicle_ids = [fv.vehicle.id for fv in branch_vehicles if fv.vehicle]
-                    
-                    # #region agent log
-                    log_data = {
-                        "sessionId": "debug-session",
-                        "runId": "run1",
-                        "hypothesisId": "B",
-                        "location": "dashboard.py:_get_recent_services:vehicle_ids",
-                        "message": "Vehicle IDs for branch",
-                        "data": {
-                            "user_id": str(request.user.id),
-                            "vehicle_count": len(vehicle_ids),
-                            "vehicle_ids": [str(vid) for vid in vehicle_ids[:10]],  # First 10 only
-                        },
-                        "timestamp": int(time.time() * 1000)
-                    }
-                    with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                        f.write(json.dumps(log_data) + '\n')
-                    # #endregion
-                    
                     # Get most recent completed service for vehicles in this branch
-                    if vehicle_ids:
-                        recent_service = BookedAppointment.objects.filter(
-                            vehicle_id__in=vehicle_ids,
-                            status='completed'
-                        ).select_related(
-                            'detailer', 'vehicle', 'service_type', 'valet_type', 'user'
-                        ).order_by('-appointment_date', '-created_at').first()
-                    else:
-                        recent_service = None
+                    recent_service = BookedAppointment.objects.filter(
+                        branch_id=managed_branch.id,
+                        status='completed'
+                    ).select_related(
+                        'detailer', 'vehicle', 'service_type', 'valet_type', 'user'
+                    ).order_by('-appointment_date', '-created_at').first()
                 else:
                     recent_service = None
             else:
-                # #region agent log
-                log_data = {
-                    "sessionId": "debug-session",
-                    "runId": "run1",
-                    "hypothesisId": "C",
-                    "location": "dashboard.py:_get_recent_services:regular_user_path",
-                    "message": "Regular user path executed",
-                    "data": {"user_id": str(request.user.id)},
-                    "timestamp": int(time.time() * 1000)
-                }
-                with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                    f.write(json.dumps(log_data) + '\n')
-                # #endregion
-                
                 # Regular user - get their own recent services
                 # CRITICAL: Must filter by user to prevent data leakage
                 recent_service = BookedAppointment.objects.filter(
@@ -483,30 +340,6 @@ class DashboardView(APIView):
                     'detailer', 'vehicle', 'service_type', 'valet_type', 'user'
                 ).order_by('-appointment_date', '-created_at').first()
             
-            # #region agent log
-            import json
-            import time
-            log_data = {
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": "E",
-                "location": "dashboard.py:_get_recent_services:before_response",
-                "message": "Recent service query result",
-                "data": {
-                    "user_id": str(request.user.id),
-                    "recent_service_found": recent_service is not None,
-                    "booking_reference": str(recent_service.booking_reference) if recent_service else None,
-                    "booking_user_id": str(recent_service.user.id) if recent_service else None,
-                    "booking_user_email": recent_service.user.email if recent_service else None,
-                    "booking_user_is_branch_admin": recent_service.user.is_branch_admin if recent_service else None,
-                    "vehicle_id": str(recent_service.vehicle.id) if recent_service and recent_service.vehicle else None,
-                },
-                "timestamp": int(time.time() * 1000)
-            }
-            with open('c:\\Users\\gifte\\Projects\\prisma\\client\\.cursor\\debug.log', 'a') as f:
-                f.write(json.dumps(log_data) + '\n')
-            # #endregion
-            
             if not recent_service:
                 # Return 200 with empty shape so client can show empty state (no 404)
                 return Response({
@@ -546,46 +379,42 @@ class DashboardView(APIView):
                 "rating": float(recent_service.review_rating) if recent_service.review_rating else 0.0,
                 "booking_reference": str(recent_service.booking_reference),
             }
-            print("recent_service_data", recent_service_data)
             
             return Response(recent_service_data, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Error in _get_recent_services: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in _get_recent_services: %s", e)
             return Response({'error': f'Failed to fetch recent services: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
     def _get_user_stats(self, request):
         """ Create a stat method to get the total number of services the user has been booked for in a calendar month and each year """
         try:
-            from datetime import datetime
+            from datetime import date, datetime
             
-            this_month = datetime.now().month
-            this_year = datetime.now().year
+            today = datetime.now().date()
+            # Date ranges instead of __month/__year extracts so the appointment_date indexes apply
+            month_start = today.replace(day=1)
+            next_month_start = date(today.year + (today.month // 12), today.month % 12 + 1, 1)
+            year_start = date(today.year, 1, 1)
+            next_year_start = date(today.year + 1, 1, 1)
 
             # For branch admins, get stats for all vehicles in their managed branch
             # For regular users, get their own stats
             if request.user.is_branch_admin:
-                managed_branch = request.user.get_managed_branch()
-                if managed_branch:
-                    # Get all vehicles in the managed branch
-                    branch_vehicles = FleetVehicle.objects.filter(
-                        fleet=managed_branch.fleet,
-                        branch=managed_branch
-                    )
-                    vehicle_ids = [fv.vehicle.id for fv in branch_vehicles]
+                scope = request.scope
+                if scope.branch_id:
                     # Get services for this month
                     services_this_month = BookedAppointment.objects.filter(
-                        vehicle_id__in=vehicle_ids,
-                        appointment_date__month=this_month, 
-                        appointment_date__year=this_year
+                        branch_id=scope.branch_id,
+                        appointment_date__gte=month_start,
+                        appointment_date__lt=next_month_start
                     ).count()
 
                     # Get services for this year
                     services_this_year = BookedAppointment.objects.filter(
-                        vehicle_id__in=vehicle_ids,
-                        appointment_date__year=this_year
+                        branch_id=scope.branch_id,
+                        appointment_date__gte=year_start,
+                        appointment_date__lt=next_year_start
                     ).count()
                 else:
                     services_this_month = 0
@@ -594,14 +423,15 @@ class DashboardView(APIView):
                 # Regular user - get their own stats
                 services_this_month = BookedAppointment.objects.filter(
                     user=request.user, 
-                    appointment_date__month=this_month, 
-                    appointment_date__year=this_year
+                    appointment_date__gte=month_start,
+                    appointment_date__lt=next_month_start
                 ).count()
 
                 # Get services for this year
                 services_this_year = BookedAppointment.objects.filter(
                     user=request.user, 
-                    appointment_date__year=this_year
+                    appointment_date__gte=year_start,
+                    appointment_date__lt=next_year_start
                 ).count()
 
             stats = {
@@ -619,12 +449,10 @@ class DashboardView(APIView):
     def submit_review(self, request):
         """Submit review for a completed booking"""
         try:
-            print(f"DEBUG: submit_review called with data: {request.data}")
-            
             booking_reference = request.data.get('booking_reference')
             rating = request.data.get('rating')
 
-            print(f"DEBUG: booking_reference={booking_reference}, rating={rating}")
+            logger.debug("booking_reference=%s, rating=%s", booking_reference, rating)
 
             if not booking_reference or not rating:
                 return Response(
@@ -641,16 +469,16 @@ class DashboardView(APIView):
 
             # Get the booking
             try:
-                print(f"DEBUG: Looking for booking with reference: {booking_reference}")
+                logger.debug("Looking for booking with reference: %s", booking_reference)
                 booking = BookedAppointment.objects.get(
                     booking_reference=booking_reference,
                     user=request.user,
                     status='completed',
                     is_reviewed=False
                 )
-                print(f"DEBUG: Found booking: {booking}")
+                logger.debug("Found booking: %s", booking)
             except BookedAppointment.DoesNotExist:
-                print(f"DEBUG: Booking not found or already reviewed")
+                logger.warning("Booking not found or already reviewed")
                 return Response(
                     {'error': 'Unreviewed completed booking not found'}, 
                     status=status.HTTP_404_NOT_FOUND
@@ -661,11 +489,11 @@ class DashboardView(APIView):
             booking.review_rating = rating
             booking.review_submitted_at = timezone.now()
             booking.save()
-            print(f"DEBUG: Booking updated successfully")
+            logger.debug("Booking updated successfully")
 
             # Publish to Redis for detailer notification
             publish_review_to_detailer.delay(booking_reference, rating)
-            print(f"DEBUG: Celery task queued")
+            logger.debug("Celery task queued")
             
             return Response({
                 'message': 'Review submitted successfully',
@@ -673,9 +501,7 @@ class DashboardView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            print(f"DEBUG: Exception in submit_review: {str(e)}")
-            import traceback
-            print(f"DEBUG: Traceback: {traceback.format_exc()}")
+            logger.exception("Exception in submit_review: %s", e)
             return Response(
                 {'error': f'Failed to submit review: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -9,7 +9,12 @@ import requests
 from django.conf import settings
 from datetime import datetime
 from django.utils import timezone
-from main.tasks import publish_booking_cancelled, publish_booking_rescheduled, send_push_notification
+from main.tasks import publish_booking_cancelled, publish_booking_rescheduled, enqueue_push
+from main.utils.metrics import external_call
+from main.utils.response_cache import (
+    SCOPE_USER, TAG_ADD_ONS, TAG_LOYALTY, TAG_PROMOTIONS, TAG_REFERRAL, TAG_SERVICE_TYPES, TAG_VALET_TYPES,
+    cached_action,
+)
 import logging
 import traceback
 
@@ -66,10 +71,11 @@ class EventsView(APIView):
 
 
 
+    @cached_action(ttl=300, scope=SCOPE_USER, tags=(f'{TAG_PROMOTIONS}:{{user_id}}',))
     def get_promotions(self, request):
         try:
             # Exclude promotions for fleet owners and their admins
-            if request.user.is_fleet_owner or request.user.is_fleet_admin_or_manager():
+            if request.user.is_fleet_owner or request.scope.is_fleet_admin_or_manager:
                 return Response(None, status=status.HTTP_200_OK)
             
             from datetime import date
@@ -137,6 +143,7 @@ class EventsView(APIView):
 
             
 
+    @cached_action(ttl=3600, tags=(TAG_SERVICE_TYPES,))
     def get_service_type(self, request):
         try:
             service_types = ServiceType.objects.all().order_by('price')
@@ -158,6 +165,7 @@ class EventsView(APIView):
             return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         
+    @cached_action(ttl=3600, tags=(TAG_VALET_TYPES,))
     def get_valet_type(self, request):
         try:
             valet_type = ValetType.objects.all()
@@ -295,7 +303,7 @@ class EventsView(APIView):
                     
                     # Send push notification for refunded cancellation
                     try:
-                        send_push_notification.delay(
+                        enqueue_push(
                             request.user.id,
                             "Booking Cancelled - Refund Processed!",
                             f"Your valet service has been cancelled for {booking.appointment_date} at {booking.start_time}. You will be refunded within 3-5 business days.",
@@ -307,7 +315,7 @@ class EventsView(APIView):
                 elif refund_tier == 'half':
                     message += f"\n\n50% refund was available but could not be processed. Please contact support."
                     try:
-                        send_push_notification.delay(
+                        enqueue_push(
                             request.user.id,
                             "Booking Cancelled",
                             f"Your valet service has been cancelled for {booking.appointment_date} at {booking.start_time}. Refund issue - please contact support.",
@@ -323,7 +331,7 @@ class EventsView(APIView):
                     
                     # Send push notification for non-refunded cancellation
                     try:
-                        send_push_notification.delay(
+                        enqueue_push(
                             request.user.id,
                             "Booking Cancelled",
                             f"Your valet service has been cancelled for {booking.appointment_date} at {booking.start_time}. No refund available due to late cancellation.",
@@ -478,7 +486,8 @@ class EventsView(APIView):
             params["latitude"] = str(latitude)
             params["longitude"] = str(longitude)
         try:
-            resp = requests.get(url, params=params, timeout=15)
+            with external_call('detailer'):
+                resp = requests.get(url, params=params, timeout=15)
             if resp.status_code != 200:
                 return None, resp.text or f"HTTP {resp.status_code}"
             data = resp.json()
@@ -621,7 +630,7 @@ class EventsView(APIView):
                 booking.start_time,
                 booking.total_amount
             )
-            send_push_notification.delay(
+            enqueue_push(
                 request.user.id,
                 "Booking Rescheduled!",
                 f"Your valet service has been rescheduled for {booking.appointment_date} at {booking.start_time}",
@@ -838,7 +847,7 @@ class EventsView(APIView):
             # Send booking confirmation notification (with error handling)
             try:
                 logger.info("Sending push notification...")
-                send_push_notification.delay(
+                enqueue_push(
                     request.user.id,
                     "Booking Received!",
                     f"Your booking for {appointment.appointment_date} at {appointment.start_time} has been received. Waiting for detailer confirmation!",
@@ -860,6 +869,7 @@ class EventsView(APIView):
 
 
 
+    @cached_action(ttl=3600, tags=(TAG_ADD_ONS,))
     def get_add_ons(self, request):
         try:
             add_ons = AddOns.objects.all().order_by('price')
@@ -880,6 +890,7 @@ class EventsView(APIView):
 
 
 
+    @cached_action(ttl=300, scope=SCOPE_USER, tags=(f'{TAG_LOYALTY}:{{user_id}}', f'{TAG_REFERRAL}:{{user_id}}'))
     def check_free_wash(self, request):
         """Check if user can use a free basic wash - loyalty (Platinum) or partner referral"""
         try:
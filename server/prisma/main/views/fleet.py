@@ -2,8 +2,13 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from main.models import Fleet, Branch, FleetMember, FleetVehicle, Vehicle, VehicleOwnership, BookedAppointment, User, BulkOrder, PaymentTransaction, RefundRecord
+from main.models import Branch, FleetMember, FleetVehicle, Vehicle, VehicleOwnership, BookedAppointment, User, BulkOrder, PaymentTransaction, RefundRecord
 from main.utils.branch_spend import get_branch_spend_for_period
+from main.utils.booking_serialization import serialize_recent_bookings, serialize_vehicle_bookings
+from main.utils.conditional import conditional_action, queryset_version, time_bucket
+from main.utils.metrics import external_call
+from main.utils.pagination import InvalidPageRequest, keyset_page, wants_page
+from main.utils import reminders
 from main.utils.fleet_analytics import (
     get_branch_performance, get_spend_trends, get_vehicle_health_scores,
     get_booking_activity, get_common_issues
@@ -18,6 +23,27 @@ import logging
 
 from main.tasks import publish_booking_cancelled, send_branch_admin_credentials_email
 
+logger = logging.getLogger(__name__)
+
+# Spend, payment status and inspection figures are not covered by the version rows; cap their staleness
+FLEET_DASHBOARD_VERSION_WINDOW_SECONDS = 300
+
+
+def _fleet_dashboard_version(request):
+    fleet_id = request.scope.fleet_id
+    if not request.user.is_fleet_owner or not fleet_id:
+        return None
+    fleet = request.scope.fleet
+    return (
+        time_bucket(FLEET_DASHBOARD_VERSION_WINDOW_SECONDS),
+        fleet.updated_at if fleet else None,
+        queryset_version(Branch.objects.filter(fleet_id=fleet_id), 'updated_at'),
+        queryset_version(FleetVehicle.objects.filter(fleet_id=fleet_id), 'added_at'),
+        queryset_version(FleetMember.objects.filter(fleet_id=fleet_id), 'joined_at'),
+        queryset_version(BookedAppointment.objects.filter(fleet_id=fleet_id), 'updated_at'),
+        queryset_version(BulkOrder.objects.filter(fleet_id=fleet_id), 'updated_at'),
+    )
+
 
 class FleetView(APIView):
     permission_classes = [IsAuthenticated]
@@ -42,9 +68,9 @@ class FleetView(APIView):
     }
     
     def get(self, request, *args, **kwargs):
-        print("get inside the method eet view")
-        print(f"Action from kwargs: {kwargs.get('action')}")
-        print(f"All kwargs: {kwargs}")
+        logger.debug("get inside the method eet view")
+        logger.debug("Action from kwargs: %s", kwargs.get('action'))
+        logger.debug("All kwargs: %s", kwargs)
         action = kwargs.get('action')
         if action not in self.action_handlers:
             return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
@@ -92,7 +118,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can create branches'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             
@@ -167,7 +193,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can view branches'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'branches': []}, status=status.HTTP_200_OK)
             
@@ -218,7 +244,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can create branch admins'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             
@@ -293,8 +319,9 @@ class FleetView(APIView):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    @conditional_action(_fleet_dashboard_version)
     def get_fleet_dashboard(self, request):
-        print("get_fleet_dashboard inside the method")
+        logger.debug("get_fleet_dashboard inside the method")
         """Get fleet dashboard data with optional date range filtering"""
         try:
             # Check if user is a fleet owner
@@ -302,7 +329,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can view fleet dashboard'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             
@@ -328,29 +355,30 @@ class FleetView(APIView):
             branches = Branch.objects.filter(fleet=fleet)
             total_branches = branches.count()
             
-            # Get all vehicles in fleet (through FleetVehicle); skip entries with no vehicle
-            fleet_vehicles = FleetVehicle.objects.filter(fleet=fleet).select_related('vehicle')
-            total_vehicles = fleet_vehicles.count()
+            # Get all vehicles in fleet (through FleetVehicle)
+            total_vehicles = FleetVehicle.objects.filter(fleet=fleet).count()
             
-            # Get all bookings for vehicles in this fleet
-            vehicle_ids = [fv.vehicle.id for fv in fleet_vehicles if fv.vehicle]
-            bookings = BookedAppointment.objects.filter(vehicle_id__in=vehicle_ids)
+            # Get all bookings for vehicles in this fleet (stamped with their vehicle's fleet)
+            bookings = BookedAppointment.objects.filter(fleet=fleet)
             fleet_bulk_orders = BulkOrder.objects.filter(fleet=fleet)
             total_bookings = bookings.count() + fleet_bulk_orders.count()
             
+            # Per-branch counts in one grouped query each instead of per-branch lookups
+            vehicle_counts = dict(
+                FleetVehicle.objects.filter(fleet=fleet, branch__isnull=False)
+                .values_list('branch_id').annotate(count=Count('id'))
+            )
+            booking_counts = dict(
+                bookings.filter(branch__isnull=False)
+                .values_list('branch_id').annotate(count=Count('id'))
+            )
+            bulk_order_counts = dict(
+                BulkOrder.objects.filter(branch__in=branches)
+                .values_list('branch_id').annotate(count=Count('id'))
+            )
+            
             # Get recent bookings (last 10)
-            recent_bookings = bookings.order_by('-created_at')[:10]
-            recent_bookings_data = []
-            for booking in recent_bookings:
-                recent_bookings_data.append({
-                    'id': str(booking.id),
-                    'booking_reference': booking.booking_reference,
-                    'vehicle_reg': booking.vehicle.registration_number if booking.vehicle else None,
-                    'service_type': booking.service_type.name if booking.service_type else None,
-                    'status': booking.status,
-                    'appointment_date': booking.appointment_date.isoformat(),
-                    'total_amount': float(booking.total_amount),
-                })
+            recent_bookings_data = serialize_recent_bookings(bookings.order_by('-created_at')[:10])
             
             # Get referral code
             referral_code = request.user.referral_code
@@ -358,13 +386,7 @@ class FleetView(APIView):
             # Get branch stats (include spend cap data)
             branches_data = []
             for branch in branches:
-                branch_vehicles = FleetVehicle.objects.filter(fleet=fleet, branch=branch).select_related('vehicle')
-                branch_vehicle_ids = [bv.vehicle.id for bv in branch_vehicles if bv.vehicle]
-                branch_bookings = BookedAppointment.objects.filter(
-                    vehicle_id__in=branch_vehicle_ids
-                )
-                branch_bulk_orders = BulkOrder.objects.filter(branch=branch)
-                branch_booking_count = branch_bookings.count() + branch_bulk_orders.count()
+                branch_booking_count = booking_counts.get(branch.id, 0) + bulk_order_counts.get(branch.id, 0)
                 period = branch.spend_limit_period or 'monthly'
                 spent = get_branch_spend_for_period(branch, period)
                 limit = branch.spend_limit
@@ -376,7 +398,7 @@ class FleetView(APIView):
                     'name': branch.name,
                     'address': branch.address,
                     'city': branch.city,
-                    'vehicle_count': branch_vehicles.count(),
+                    'vehicle_count': vehicle_counts.get(branch.id, 0),
                     'booking_count': branch_booking_count,
                     'spend_limit': float(limit) if limit is not None else None,
                     'spend_limit_period': branch.spend_limit_period,
@@ -392,7 +414,7 @@ class FleetView(APIView):
                 booking_activity = get_booking_activity(fleet, start_date, end_date)
                 common_issues = get_common_issues(fleet, start_date, end_date)
             except Exception as analytics_err:
-                logging.getLogger(__name__).exception(
+                logger.exception(
                     "Fleet dashboard analytics failed: %s", analytics_err
                 )
                 branch_performance = []
@@ -431,7 +453,9 @@ class FleetView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     def get_branch_vehicles(self, request, branch_id=None):
-        """Get vehicles for a specific branch"""
+        """Get vehicles for a specific branch.
+        Optional cursor / page_size query params return one page plus next_cursor; without them all vehicles are returned.
+        """
         try:
             branch_id = branch_id or request.query_params.get('branch_id')
             
@@ -446,12 +470,12 @@ class FleetView(APIView):
             # Check permissions
             if request.user.is_fleet_owner:
                 # Fleet owner can see all branches in their fleet
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet or branch.fleet != fleet:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             elif request.user.is_branch_admin:
                 # Branch admin can only see their own branch
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if not managed_branch or managed_branch.id != branch.id:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             else:
@@ -459,15 +483,24 @@ class FleetView(APIView):
             
             # Get vehicles for this branch
             fleet_vehicles = FleetVehicle.objects.filter(fleet=branch.fleet, branch=branch)
+            paginated = wants_page(request)
+            next_cursor = None
+            if paginated:
+                fleet_vehicles, next_cursor = keyset_page(fleet_vehicles, request, ('added_at', 'id'))
+            fleet_vehicles = list(fleet_vehicles.select_related('vehicle'))
+
+            # Current owner of every vehicle on the page in one query
+            current_owners = {
+                ownership.vehicle_id: ownership.owner.name
+                for ownership in VehicleOwnership.objects.filter(
+                    vehicle_id__in=[fv.vehicle_id for fv in fleet_vehicles],
+                    end_date__isnull=True
+                ).select_related('owner')
+            }
             
             vehicles_data = []
             for fv in fleet_vehicles:
                 vehicle = fv.vehicle
-                # Get current owner
-                ownership = VehicleOwnership.objects.filter(
-                    vehicle=vehicle,
-                    end_date__isnull=True
-                ).first()
                 
                 vehicles_data.append({
                     'id': str(vehicle.id),
@@ -478,19 +511,24 @@ class FleetView(APIView):
                     'registration_number': vehicle.registration_number,
                     'country': vehicle.country,
                     'vin': vehicle.vin,
-                    'current_owner': ownership.owner.name if ownership else None,
+                    'current_owner': current_owners.get(vehicle.id),
                     'branch_id': str(branch.id),
                     'branch_name': branch.name,
                 })
             
-            return Response({
+            response_data = {
                 'branch': {
                     'id': str(branch.id),
                     'name': branch.name,
                 },
                 'vehicles': vehicles_data,
-            }, status=status.HTTP_200_OK)
+            }
+            if paginated:
+                response_data['next_cursor'] = next_cursor
+            return Response(response_data, status=status.HTTP_200_OK)
             
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
@@ -508,11 +546,11 @@ class FleetView(APIView):
                 return Response({'error': 'Branch not found'}, status=status.HTTP_404_NOT_FOUND)
             
             if request.user.is_fleet_owner:
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet or branch.fleet != fleet:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             elif request.user.is_branch_admin:
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if not managed_branch or managed_branch.id != branch.id:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             else:
@@ -553,18 +591,20 @@ class FleetView(APIView):
         user = request.user
         if bulk_order.user_id == user.id:
             return bulk_order, None
+        scope = request.scope
         if user.is_fleet_owner:
-            fleet = Fleet.objects.filter(owner=user).first()
-            if fleet and bulk_order.fleet_id == fleet.id:
+            if scope.fleet_id and str(bulk_order.fleet_id) == scope.fleet_id:
                 return bulk_order, None
         if user.is_branch_admin:
-            managed_branch = user.get_managed_branch()
-            if managed_branch and bulk_order.branch_id == managed_branch.id:
+            if scope.branch_id and str(bulk_order.branch_id) == scope.branch_id:
                 return bulk_order, None
         return None, Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
 
     def _bulk_order_job_start_dt(self, bulk_order):
-        """Compute job start datetime from order_data (date + start_time or best_start_time). Returns timezone-aware datetime or None."""
+        """Compute job start datetime from the schedule columns (falling back to order_data). Returns timezone-aware datetime or None."""
+        if bulk_order.appointment_date:
+            start_time = bulk_order.start_time or datetime.strptime('06:00:00', '%H:%M:%S').time()
+            return timezone.make_aware(datetime.combine(bulk_order.appointment_date, start_time))
         order_data = getattr(bulk_order, 'order_data', None) or {}
         date_str = order_data.get('date') or order_data.get('appointment_date', '')
         if isinstance(date_str, str) and len(date_str) >= 10:
@@ -589,7 +629,6 @@ class FleetView(APIView):
 
     def cancel_bulk_order(self, request):
         """Cancel a bulk order: 12h check, cancel all related appointments, publish booking_cancelled per ref, full refund."""
-        logger = logging.getLogger('main.views.fleet')
         bulk_order_id = request.data.get('bulk_order_id') if request.data else request.query_params.get('bulk_order_id')
         booking_reference = request.data.get('booking_reference') if request.data else request.query_params.get('booking_reference')
         bulk_order, err_response = self._get_bulk_order_for_user(request, bulk_order_id=bulk_order_id, booking_reference=booking_reference)
@@ -674,7 +713,6 @@ class FleetView(APIView):
         """Reschedule a bulk order to a new date/window. 12h check; call detailer reschedule_bulk_booking; update BulkOrder and BookedAppointments."""
         import requests
         from django.conf import settings as django_settings
-        logger = logging.getLogger('main.views.fleet')
         bulk_order_id = request.data.get('bulk_order_id') if request.data else None
         booking_reference = request.data.get('booking_reference') if request.data else None
         bulk_order, err_response = self._get_bulk_order_for_user(request, bulk_order_id=bulk_order_id, booking_reference=booking_reference)
@@ -715,7 +753,8 @@ class FleetView(APIView):
             'suggested_team_size': suggested_team_size,
         }
         try:
-            response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'}, timeout=60)
+            with external_call('detailer'):
+                response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'}, timeout=60)
             if response.status_code not in [200, 201]:
                 err_body = response.json() if response.content else {}
                 error_message = err_body.get('error', response.text or f"HTTP {response.status_code}")
@@ -727,7 +766,9 @@ class FleetView(APIView):
             order_data_new['appointment_date'] = order_data_new['date']
             if new_slots:
                 order_data_new['start_time'] = new_slots[0].get('appointment_time', start_time)
+            order_data_new['end_time'] = end_time if isinstance(end_time, str) else str(end_time)
             bulk_order.order_data = order_data_new
+            # save() re-syncs appointment_date / start_time / end_time from order_data
             bulk_order.save()
             for slot in new_slots:
                 ref = slot.get('booking_reference')
@@ -751,7 +792,11 @@ class FleetView(APIView):
                 BookedAppointment.objects.filter(bulk_order=bulk_order, booking_reference=ref).update(
                     appointment_date=apt_date_parsed,
                     start_time=t,
+                    reminder_sent_at=None,
+                    updated_at=timezone.now(),
                 )
+            # The queryset updates skip post_save, so move the reminder timers here
+            reminders.schedule_many(BookedAppointment.objects.filter(bulk_order=bulk_order))
             return Response({
                 'message': 'Bulk order rescheduled.',
                 'new_slots': new_slots,
@@ -768,7 +813,7 @@ class FleetView(APIView):
                 branch_id = request.query_params.get('branch_id')
                 if not branch_id:
                     return Response({'error': 'branch_id is required for fleet owners'}, status=status.HTTP_400_BAD_REQUEST)
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet:
                     return Response({'error': 'No fleet found'}, status=status.HTTP_404_NOT_FOUND)
                 try:
@@ -776,7 +821,7 @@ class FleetView(APIView):
                 except Branch.DoesNotExist:
                     return Response({'error': 'Branch not found'}, status=status.HTTP_404_NOT_FOUND)
             elif request.user.is_branch_admin:
-                branch = request.user.get_managed_branch()
+                branch = request.scope.managed_branch
                 if not branch:
                     return Response({'error': 'No managed branch found'}, status=status.HTTP_404_NOT_FOUND)
             else:
@@ -812,7 +857,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can update branches'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             
@@ -912,7 +957,7 @@ class FleetView(APIView):
                 return Response({'error': 'Only fleet owners can delete branches'}, status=status.HTTP_403_FORBIDDEN)
             
             # Get the fleet for this user
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             
@@ -956,7 +1001,7 @@ class FleetView(APIView):
             
             if request.user.is_fleet_owner:
                 # Fleet owner: Check if vehicle is in their fleet
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if fleet:
                     has_access = FleetVehicle.objects.filter(
                         fleet=fleet,
@@ -964,7 +1009,7 @@ class FleetView(APIView):
                     ).exists()
             elif request.user.is_branch_admin:
                 # Branch admin: Check if vehicle is in their managed branch
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if managed_branch:
                     has_access = FleetVehicle.objects.filter(
                         fleet=managed_branch.fleet,
@@ -988,19 +1033,8 @@ class FleetView(APIView):
             bookings = BookedAppointment.objects.filter(
                 vehicle=vehicle,
                 created_at__gte=ninety_days_ago
-            ).select_related('service_type').order_by('-created_at')
-            
-            bookings_data = []
-            for booking in bookings:
-                bookings_data.append({
-                    'id': str(booking.id),
-                    'booking_reference': booking.booking_reference,
-                    'created_at': booking.created_at.isoformat(),
-                    'appointment_date': booking.appointment_date.isoformat(),
-                    'status': booking.status,
-                    'service_type': booking.service_type.name if booking.service_type else 'N/A',
-                    'total_amount': float(booking.total_amount),
-                })
+            ).order_by('-created_at')
+            bookings_data = serialize_vehicle_bookings(bookings)
             
             return Response({
                 'vehicle': {
@@ -1032,12 +1066,12 @@ class FleetView(APIView):
             # Check permissions
             if request.user.is_fleet_owner:
                 # Fleet owner: Check if branch belongs to their fleet
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet or branch.fleet != fleet:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             elif request.user.is_branch_admin:
                 # Branch admin: Can only see admins of their own branch
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if not managed_branch or managed_branch.id != branch.id:
                     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
             else:
@@ -1069,7 +1103,7 @@ class FleetView(APIView):
         try:
             if not request.user.is_fleet_owner:
                 return Response({'error': 'Only fleet owners can view fleet admins'}, status=status.HTTP_403_FORBIDDEN)
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             members = FleetMember.objects.filter(fleet=fleet, role='admin').select_related('user', 'branch')
@@ -1093,7 +1127,7 @@ class FleetView(APIView):
         try:
             if not request.user.is_fleet_owner:
                 return Response({'error': 'Only fleet owners can update branch admins'}, status=status.HTTP_403_FORBIDDEN)
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             admin_id = request.data.get('admin_id')
@@ -1139,7 +1173,7 @@ class FleetView(APIView):
         try:
             if not request.user.is_fleet_owner:
                 return Response({'error': 'Only fleet owners can remove branch admins'}, status=status.HTTP_403_FORBIDDEN)
-            fleet = Fleet.objects.filter(owner=request.user).first()
+            fleet = request.scope.fleet
             if not fleet:
                 return Response({'error': 'No fleet found for this user'}, status=status.HTTP_404_NOT_FOUND)
             admin_id = request.data.get('admin_id') if request.data else request.query_params.get('admin_id')
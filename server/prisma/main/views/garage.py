@@ -3,11 +3,33 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import models
-from main.models import Vehicle, VehicleOwnership, VehicleEvent, BookedAppointment, VehicleTransfer, Fleet, FleetVehicle, FleetMember, Branch, EventDataManagement
+from main.models import Vehicle, VehicleOwnership, VehicleEvent, BookedAppointment, VehicleTransfer, FleetVehicle, FleetMember, Branch, EventDataManagement
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db import transaction
 from main.util.media_helper import get_full_media_url
+from main.utils.conditional import conditional_action, queryset_version
+from main.utils.pagination import InvalidPageRequest, keyset_page, wants_page
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _vehicles_version(request):
+    """Rows behind get_vehicles: fleet/branch vehicle associations, or the user's current ownerships."""
+    if request.user.is_fleet_owner or request.user.is_branch_admin:
+        scope = request.scope
+        if request.user.is_fleet_owner:
+            if not scope.fleet_id:
+                return ()
+            fleet_vehicles = FleetVehicle.objects.filter(fleet_id=scope.fleet_id)
+        else:
+            if not scope.branch_id:
+                return ()
+            fleet_vehicles = FleetVehicle.objects.filter(branch_id=scope.branch_id)
+        return queryset_version(fleet_vehicles, 'added_at', 'vehicle__updated_at', 'branch__updated_at')
+    ownerships = VehicleOwnership.objects.filter(owner=request.user, end_date__isnull=True)
+    return queryset_version(ownerships, 'created_at', 'vehicle__updated_at')
 
 
 class GarageView(APIView):
@@ -76,9 +98,9 @@ class GarageView(APIView):
     """ Here we will define the methods that would handle the jobs that are to be done on the server """
 
     def add_vehicle(self, request):
-        print(f"Request data: {request.data}")
-        print(f"Request content type: {request.content_type}")
-        print(f"Request method: {request.method}")
+        logger.debug("add_vehicle fields: %s", sorted(request.data.keys()))
+        logger.debug("Request content type: %s", request.content_type)
+        logger.debug("Request method: %s", request.method)
         
         try:
             make = request.data.get('make')
@@ -90,8 +112,8 @@ class GarageView(APIView):
             vin = request.data.get('vin')  # VIN is REQUIRED
             image = request.FILES.get('image')  # Get the uploaded image file
             
-            print(f"Parsed data - make: {make}, model: {model}, year: {year}, color: {color}, registration_number: {registration_number}, country: {country}, vin: {vin}")
-            print(f"Image file: {image}")
+            logger.debug("Parsed data - make: %s, model: %s, year: %s, color: %s, registration_number: %s, country: %s, vin: %s", make, model, year, color, registration_number, country, vin)
+            logger.debug("Image file: %s", image)
             
             # Validate required fields including VIN
             if not all([make, model, year, color, registration_number, vin]):
@@ -108,7 +130,7 @@ class GarageView(APIView):
                 
                 if active_ownership:
                     # Vehicle is already owned - check if it's the same user or associated with the same fleet
-                    managed_branch = request.user.get_managed_branch()
+                    managed_branch = request.scope.managed_branch
                     already_owns_or_same_fleet = (
                         active_ownership.owner == request.user
                         or (managed_branch is not None and active_ownership.vehicle.fleet_associations.filter(fleet=managed_branch.fleet).exists())
@@ -209,7 +231,7 @@ class GarageView(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
                 # Get the fleet for this user
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet:
                     return Response({
                         'error': 'No fleet found for this user'
@@ -232,7 +254,7 @@ class GarageView(APIView):
                 
             elif request.user.is_branch_admin:
                 # Branch admin: automatically use their managed branch
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if not managed_branch:
                     return Response({
                         'error': 'No branch assigned to this branch admin account'
@@ -261,13 +283,13 @@ class GarageView(APIView):
                     ownership_type = 'fleet'
                     # Ensure we have branch and fleet set for branch admins
                     if request.user.is_branch_admin and not branch:
-                        managed_branch = request.user.get_managed_branch()
+                        managed_branch = request.scope.managed_branch
                         if managed_branch:
                             branch = managed_branch
                             fleet = branch.fleet
                     # Ensure we have fleet set for fleet owners
                     elif request.user.is_fleet_owner and not fleet:
-                        fleet = Fleet.objects.filter(owner=request.user).first()
+                        fleet = request.scope.fleet
             
             if ownership_type == 'fleet':
                 if request.user.is_fleet_owner:
@@ -311,29 +333,40 @@ class GarageView(APIView):
                 'owner_count': vehicle.owner_count,
                 'image': get_full_media_url(vehicle.image.url) if vehicle.image else None,
             }
-            print(f"Returning vehicle data: {vehicle_data}")
+            logger.debug("Returning vehicle data: %s", vehicle_data)
             return Response({
                 'message': f'You just added {vehicle.make} {vehicle.model} {vehicle.year} to your garage',
                 'vehicle': vehicle_data,
             }, status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            print(f"Error in add_vehicle: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in add_vehicle: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+    @conditional_action(_vehicles_version)
     def get_vehicles(self, request):
+        """
+        Optional cursor / page_size query params return one page (in the order vehicles were added)
+        plus next_cursor; without them every vehicle is returned as before.
+        """
         try:
+            paginated = wants_page(request)
+            next_cursor = None
             # Check user type and get vehicles accordingly
             if request.user.is_fleet_owner:
                 # Fleet owner: Get all vehicles grouped by branch
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if not fleet:
                     return Response({'branches': []}, status=status.HTTP_200_OK)
                 
-                fleet_vehicles = FleetVehicle.objects.filter(fleet=fleet).select_related('vehicle', 'branch').order_by('branch__name', 'vehicle__make')
+                if paginated:
+                    fleet_vehicles, next_cursor = keyset_page(
+                        FleetVehicle.objects.filter(fleet=fleet), request, ('added_at', 'id')
+                    )
+                    fleet_vehicles = fleet_vehicles.select_related('vehicle', 'branch')
+                else:
+                    fleet_vehicles = FleetVehicle.objects.filter(fleet=fleet).select_related('vehicle', 'branch').order_by('branch__name', 'vehicle__make')
                 
                 # Group vehicles by branch
                 branches_dict = {}
@@ -357,7 +390,7 @@ class GarageView(APIView):
                             if raw_url:
                                 image_url = get_full_media_url(raw_url)
                         except Exception as e:
-                            print(f"Error getting image URL for vehicle {vehicle.id}: {str(e)}")
+                            logger.error("Error getting image URL for vehicle %s: %s", vehicle.id, e)
                             image_url = None
                     
                     vehicle_data = {
@@ -377,11 +410,13 @@ class GarageView(APIView):
                 
                 # Convert to list format
                 branches_list = list(branches_dict.values())
+                if paginated:
+                    return Response({'branches': branches_list, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
                 return Response({'branches': branches_list}, status=status.HTTP_200_OK)
                 
             elif request.user.is_branch_admin:
                 # Branch admin: Get only vehicles in their assigned branch (flat list)
-                managed_branch = request.user.get_managed_branch()
+                managed_branch = request.scope.managed_branch
                 if not managed_branch:
                     return Response({'vehicles': []}, status=status.HTTP_200_OK)
                 
@@ -389,11 +424,15 @@ class GarageView(APIView):
                 fleet_vehicles = FleetVehicle.objects.filter(
                     fleet=managed_branch.fleet, 
                     branch=managed_branch
-                ).select_related('vehicle')
-                vehicles = [fv.vehicle for fv in fleet_vehicles]
+                )
+                if paginated:
+                    fleet_vehicles, next_cursor = keyset_page(fleet_vehicles, request, ('added_at', 'id'))
+                vehicles = [fv.vehicle for fv in fleet_vehicles.select_related('vehicle')]
             else:
                 # Regular user: Get their own vehicles (flat list)
                 vehicles = request.user.get_current_vehicles()
+                if paginated:
+                    vehicles, next_cursor = keyset_page(vehicles, request, ('created_at', 'id'))
 
             # For branch admins and regular users, return flat list
             vehicles_list = []
@@ -403,18 +442,18 @@ class GarageView(APIView):
                 if vehicle.image:
                     try:
                         raw_url = vehicle.image.url
-                        print(f"Vehicle {vehicle.id} - Raw image URL: {raw_url}")
+                        logger.debug("Vehicle %s - Raw image URL: %s", vehicle.id, raw_url)
                         if raw_url:
                             image_url = get_full_media_url(raw_url)
-                            print(f"Vehicle {vehicle.id} - Full image URL: {image_url}")
+                            logger.debug("Vehicle %s - Full image URL: %s", vehicle.id, image_url)
                         else:
-                            print(f"Vehicle {vehicle.id} - Image URL is empty string")
+                            logger.debug("Vehicle %s - Image URL is empty string", vehicle.id)
                     except Exception as e:
-                        print(f"Error getting image URL for vehicle {vehicle.id}: {type(e).__name__}: {str(e)}")
-                        print(f"Vehicle {vehicle.id} - Image field: {vehicle.image}, Image name: {getattr(vehicle.image, 'name', 'N/A')}")
+                        logger.error("Error getting image URL for vehicle %s: %s: %s", vehicle.id, type(e).__name__, e)
+                        logger.debug("Vehicle %s - Image field: %s, Image name: %s", vehicle.id, vehicle.image, getattr(vehicle.image, 'name', 'N/A'))
                         image_url = None
                 else:
-                    print(f"Vehicle {vehicle.id} - No image field")
+                    logger.debug("Vehicle %s - No image field", vehicle.id)
                 
                 vehicle_data = {
                     'id': str(vehicle.id),
@@ -427,14 +466,16 @@ class GarageView(APIView):
                     'vin': vehicle.vin,
                     'image': image_url,  # This will be None if no image or if error occurs
                 }
-                print(f"Vehicle {vehicle.id} data: {vehicle_data}")
+                logger.debug("Vehicle %s data: %s", vehicle.id, vehicle_data)
                 vehicles_list.append(vehicle_data)
-            print(f"Vehicles list: {vehicles_list}")
+            logger.debug("Vehicles list: %s", vehicles_list)
+            if paginated:
+                return Response({'vehicles': vehicles_list, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
             return Response({'vehicles': vehicles_list}, status=status.HTTP_200_OK)
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error in get_vehicles: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in get_vehicles: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
 
@@ -558,7 +599,7 @@ class GarageView(APIView):
                 
                 if request.user.is_fleet_owner:
                     # Fleet owner: Check if vehicle is in their fleet
-                    fleet = Fleet.objects.filter(owner=request.user).first()
+                    fleet = request.scope.fleet
                     if fleet:
                         has_access = FleetVehicle.objects.filter(
                             fleet=fleet,
@@ -567,13 +608,8 @@ class GarageView(APIView):
                 
                 elif request.user.is_branch_admin:
                     # Branch admin: Check if vehicle is in their managed branch
-                    managed_branch = request.user.get_managed_branch()
-                    if managed_branch:
-                        has_access = FleetVehicle.objects.filter(
-                            fleet=managed_branch.fleet,
-                            branch=managed_branch,
-                            vehicle=vehicle
-                        ).exists()
+                    if request.scope.branch_id:
+                        has_access = str(vehicle.id) in request.scope.branch_vehicle_ids
                 
                 else:
                     # Regular user: Check direct ownership
@@ -629,7 +665,7 @@ class GarageView(APIView):
                     if raw_url:
                         image_url = get_full_media_url(raw_url)
                 except Exception as e:
-                    print(f"Error getting image URL for vehicle {vehicle.id}: {type(e).__name__}: {str(e)}")
+                    logger.error("Error getting image URL for vehicle %s: %s: %s", vehicle.id, type(e).__name__, e)
                     image_url = None
             
             # Get latest inspection data from most recent completed booking
@@ -646,7 +682,7 @@ class GarageView(APIView):
                     # Use appointment_date instead of inspected_at for display
                     latest_inspection['appointment_date'] = latest_booking.appointment_date.isoformat()
             except Exception as e:
-                print(f"Error getting inspection data for vehicle {vehicle.id}: {type(e).__name__}: {str(e)}")
+                logger.error("Error getting inspection data for vehicle %s: %s: %s", vehicle.id, type(e).__name__, e)
                 latest_inspection = None
             
             # Return the vehicle stats
@@ -680,11 +716,11 @@ class GarageView(APIView):
             import boto3
             from botocore.exceptions import ClientError, NoCredentialsError
             
-            print(f"Testing S3 connection...")
-            print(f"AWS_ACCESS_KEY_ID: {settings.AWS_ACCESS_KEY_ID}")
-            print(f"AWS_SECRET_ACCESS_KEY: {'*' * len(settings.AWS_SECRET_ACCESS_KEY) if settings.AWS_SECRET_ACCESS_KEY else 'None'}")
-            print(f"AWS_STORAGE_BUCKET_NAME: {settings.AWS_STORAGE_BUCKET_NAME}")
-            print(f"AWS_S3_REGION_NAME: {settings.AWS_S3_REGION_NAME}")
+            logger.debug("Testing S3 connection...")
+            logger.debug("AWS_ACCESS_KEY_ID: %s", settings.AWS_ACCESS_KEY_ID)
+            logger.debug("AWS_SECRET_ACCESS_KEY: %s", '*' * len(settings.AWS_SECRET_ACCESS_KEY) if settings.AWS_SECRET_ACCESS_KEY else 'None')
+            logger.debug("AWS_STORAGE_BUCKET_NAME: %s", settings.AWS_STORAGE_BUCKET_NAME)
+            logger.debug("AWS_S3_REGION_NAME: %s", settings.AWS_S3_REGION_NAME)
             
             # Test S3 connection
             s3_client = boto3.client(
@@ -697,7 +733,7 @@ class GarageView(APIView):
             # Test bucket access
             try:
                 response = s3_client.head_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
-                print(f"Bucket access successful: {response}")
+                logger.debug("Bucket access successful: %s", response)
                 
                 # Test file upload
                 test_key = 'test/connection_test.txt'
@@ -709,15 +745,15 @@ class GarageView(APIView):
                     Body=test_content,
                     ContentType='text/plain'
                 )
-                print(f"Test file uploaded successfully: {test_key}")
+                logger.debug("Test file uploaded successfully: %s", test_key)
                 
                 # Test file URL generation
                 test_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{test_key}"
-                print(f"Generated test URL: {test_url}")
+                logger.debug("Generated test URL: %s", test_url)
                 
                 # Clean up test file
                 s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=test_key)
-                print("Test file cleaned up")
+                logger.debug("Test file cleaned up")
                 
                 return Response({
                     'status': 'success',
@@ -729,7 +765,7 @@ class GarageView(APIView):
                 
             except ClientError as e:
                 error_code = e.response['Error']['Code']
-                print(f"S3 bucket access error: {error_code} - {e}")
+                logger.error("S3 bucket access error: %s - %s", error_code, e)
                 return Response({
                     'status': 'error',
                     'message': f'S3 bucket access failed: {error_code}',
@@ -737,16 +773,14 @@ class GarageView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
                 
         except NoCredentialsError:
-            print("AWS credentials not found")
+            logger.warning("AWS credentials not found")
             return Response({
                 'status': 'error',
                 'message': 'AWS credentials not configured',
                 'error': 'No AWS credentials found'
             }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"S3 connection test failed: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("S3 connection test failed: %s", e)
             return Response({
                 'status': 'error',
                 'message': 'S3 connection test failed',
@@ -846,9 +880,7 @@ class GarageView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error in approve_transfer: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in approve_transfer: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     def reject_transfer(self, request, transfer_id=None):
@@ -905,9 +937,7 @@ class GarageView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error in reject_transfer: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in reject_transfer: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     def get_pending_transfers(self, request):
@@ -965,9 +995,7 @@ class GarageView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error in get_pending_transfers: {str(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error in get_pending_transfers: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def create_vehicle_event(self, request):
@@ -1044,7 +1072,7 @@ class GarageView(APIView):
                     elif isinstance(event_date, datetime):
                         event_date = event_date
                 except (ValueError, AttributeError) as e:
-                    print(f"Error parsing event_date: {str(e)}")
+                    logger.error("Error parsing event_date: %s", e)
                     event_date = timezone.now()
             else:
                 event_date = timezone.now()
@@ -1075,9 +1103,7 @@ class GarageView(APIView):
             }, status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            import traceback
-            print(f"Error creating vehicle event: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error creating vehicle event: %s", e)
             return Response({
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,24 @@
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from main.utils.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+
+
+class MetricsView(APIView):
+    """
+    Internal Prometheus scrape endpoint for per-action request metrics.
+    Requires the X-Metrics-Token header to match METRICS_TOKEN; disabled when no token is configured.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        expected = getattr(settings, 'METRICS_TOKEN', None)
+        provided = request.headers.get('X-Metrics-Token', '')
+        if not expected or not secrets.compare_digest(provided, expected):
+            return HttpResponseNotFound()
+        return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -2,7 +2,20 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.utils import timezone
 from main.models import Notification
+from main.services import NotificationInbox
+from main.utils.conditional import conditional_action, queryset_version
+from main.utils.pagination import InvalidPageRequest, keyset_page, wants_page
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _notifications_version(request):
+    # Unread count moves when a notification is marked read, which changes no timestamp
+    notifications = Notification.objects.filter(user=request.user)
+    return queryset_version(notifications, 'timestamp') + (NotificationInbox.unread_count(request.user.id),)
 
 
 class NotificationsView(APIView):
@@ -10,6 +23,7 @@ class NotificationsView(APIView):
 
     action_handlers = {
         'get_notifications': '_get_notifications',
+        'unread_count': '_get_unread_count',
         'mark_notification_as_read': '_mark_notification_as_read',
         'mark_all_notifications_as_read': '_mark_all_notifications_as_read',
         'delete_notification': '_delete_notification',
@@ -40,9 +54,20 @@ class NotificationsView(APIView):
 
 
     
+    @conditional_action(_notifications_version)
     def _get_notifications(self, request):
+        """
+        Newest first. With cursor / page_size query params the response is
+        {"notifications": [...], "next_cursor": ...}; without them the legacy full list is returned.
+        """
         try:
             notifications = Notification.objects.filter(user=request.user)
+            next_cursor = None
+            paginated = wants_page(request)
+            if paginated:
+                notifications, next_cursor = keyset_page(notifications, request, ('-timestamp', '-id'))
+            else:
+                notifications = notifications.order_by('-timestamp', '-id')
             notifications_data = []
             
             for notification in notifications:
@@ -55,26 +80,39 @@ class NotificationsView(APIView):
                     'timestamp': notification.timestamp,
                     'is_read': notification.is_read,
                 })
+            if paginated:
+                return Response({'notifications': notifications_data, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
             return Response(notifications_data, status=status.HTTP_200_OK)
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _get_unread_count(self, request):
+        """Badge count for the bell; served from the Redis counter without loading notifications."""
+        try:
+            return Response({'unread_count': NotificationInbox.unread_count(request.user.id)}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        
     def _mark_notification_as_read(self, request):
         try:
-            print('Notification Marked as Read', request.data)
             notification_id = request.data.get('id')
+            logger.debug("Marking notification %s as read", notification_id)
             notification = Notification.objects.get(id=notification_id, user=request.user)
-            notification.is_read = True
-            notification.save()
+            # Conditional update so concurrent requests decrement the counter once
+            updated = Notification.objects.filter(id=notification.id, is_read=False).update(
+                is_read=True, updated_at=timezone.now()
+            )
+            NotificationInbox.record_read(request.user.id, updated)
             return Response({'success': True}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def _mark_all_notifications_as_read(self, request):
         try:
-            print('Marking All Notifications as Read', request.data)
             notification_ids = request.data.get('ids', [])
+            logger.debug("Marking %s notifications as read", len(notification_ids))
             
             if not notification_ids:
                 return Response({'success': True}, status=status.HTTP_200_OK)
@@ -84,9 +122,10 @@ class NotificationsView(APIView):
                 id__in=notification_ids,
                 user=request.user,
                 is_read=False
-            ).update(is_read=True)
+            ).update(is_read=True, updated_at=timezone.now())
+            NotificationInbox.record_read(request.user.id, updated_count)
             
-            print(f'Updated {updated_count} notifications')
+            logger.debug("Updated %s notifications", updated_count)
             return Response({'success': True}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -16,6 +16,7 @@ from rest_framework.exceptions import ValidationError
 
 class RequestPasswordResetView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'password_reset:request'
     
     def post(self, request):
         email = request.data.get('email', '').strip().lower()
@@ -57,6 +58,7 @@ class RequestPasswordResetView(APIView):
 
 class ValidateResetTokenView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'password_reset:validate'
     
     def post(self, request):
         token = request.data.get('token', '').strip()
@@ -92,6 +94,7 @@ class ValidateResetTokenView(APIView):
 
 class ResetPasswordView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'password_reset:reset'
     
     def post(self, request):
         token = request.data.get('token', '').strip()
@@ -165,6 +168,7 @@ class ResetPasswordView(APIView):
 
 class WebResetPasswordView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'password_reset:web'
     
     def get(self, request):
         """Display the password reset form"""
@@ -1,6 +1,6 @@
 from rest_framework.response import Response
 from rest_framework import status
-from main.tasks import send_push_notification
+from main.tasks import enqueue_push
 import stripe
 from django.conf import settings
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -13,12 +13,16 @@ from main.models import (
 )
 from main.utils.branch_spend import get_branch_spend_for_period
 from main.utils.bulk_appointments import create_bulk_appointments
+from main.utils.metrics import external_call
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
 import time
 import uuid
 from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Initialize Stripe with your secret key
 stripe.api_key = settings.STRIPE_SECRET_KEY
@@ -78,7 +82,7 @@ def create_booking_from_pending(pending_booking):
             try:
                 start_time = datetime.strptime(start_time_str, '%H:%M:%S').time()
             except Exception:
-                print(f"Could not parse start_time: {start_time_str}")
+                logger.error("Could not parse start_time: %s", start_time_str)
 
     # Calculate amounts
     subtotal_amount = booking_data.get('subtotal_amount')
@@ -104,7 +108,7 @@ def create_booking_from_pending(pending_booking):
             if loyalty.can_use_free_quick_sparkle():
                 loyalty.use_free_quick_sparkle()
                 loyalty_used = True
-                print(f"Free Quick Sparkle applied for user {user.id} (loyalty)")
+                logger.debug("Free Quick Sparkle applied for user %s (loyalty)", user.id)
         except LoyaltyProgram.DoesNotExist:
             pass
 
@@ -114,7 +118,7 @@ def create_booking_from_pending(pending_booking):
                 if not attr.partner_free_wash_used and (attr.expires_at is None or attr.expires_at > timezone.now()):
                     attr.partner_free_wash_used = True
                     attr.save()
-                    print(f"Free Quick Sparkle applied for user {user.id} (partner referral)")
+                    logger.debug("Free Quick Sparkle applied for user %s (partner referral)", user.id)
             except ReferralAttribution.DoesNotExist:
                 pass
 
@@ -152,14 +156,14 @@ def create_booking_from_pending(pending_booking):
         appointment.save()
 
     # Send push notification
-    send_push_notification.delay(
+    enqueue_push(
         user.id,
         "Booking Confirmed! 🎉",
         f"Your booking for {appointment_date} has been confirmed. Payment received!",
         "booking_confirmed"
     )
 
-    print(f"Created booking {appointment.id} from pending booking {pending_booking.id}")
+    logger.debug("Created booking %s from pending booking %s", appointment.id, pending_booking.id)
     return appointment
 
 
@@ -445,7 +449,8 @@ def try_create_bulk_booking_on_detailer(pending_booking_or_bulk_order):
     base = (detailer_app_url or "").rstrip("/")
     url = f"{base}/api/v1/booking/create_bulk_booking/"
     try:
-        response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'}, timeout=60)
+        with external_call('detailer'):
+            response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'}, timeout=60)
         if response.status_code in [200, 201]:
             body = response.json() if response.content else {}
             assigned_detailers = body.get("assigned_detailers")
@@ -454,7 +459,7 @@ def try_create_bulk_booking_on_detailer(pending_booking_or_bulk_order):
             return (True, assigned_detailers)
         err_body = response.json() if response.content else {}
         error_message = err_body.get('error', response.text or f"HTTP {response.status_code}")
-        print(f"Detailer create_bulk_booking failed {response.status_code}: {error_message} (payload keys: {list(payload.keys()) if payload else []})")
+        logger.error("Detailer create_bulk_booking failed %s: %s (payload keys: %s)", response.status_code, error_message, list(payload.keys()) if payload else [])
         return (False, error_message)
     except Exception as e:
         return (False, str(e))
@@ -477,7 +482,7 @@ def try_create_booking_on_detailer(pending_booking):
             pending_booking.booking_reference,
         )
     if not detailer_data:
-        print("No detailer payload available for try_create_booking_on_detailer")
+        logger.debug("No detailer payload available for try_create_booking_on_detailer")
         return (False, "No detailer payload")
 
     if 'booking_reference' not in detailer_data:
@@ -486,27 +491,28 @@ def try_create_booking_on_detailer(pending_booking):
     detailer_data['status'] = 'accepted'
 
     detailer_app_url = getattr(settings, 'DETAILER_APP_URL', None)
-    print(f"DETAILER_APP_URL: {detailer_app_url}")
-    print(f"Detailer app URL: {detailer_app_url}")
+    logger.debug("DETAILER_APP_URL: %s", detailer_app_url)
+    logger.debug("Detailer app URL: %s", detailer_app_url)
     
     if not detailer_app_url:
         detailer_app_url = getattr(settings, 'API_CONFIG', {}).get('detailerAppUrl')
     if not detailer_app_url:
-        print("DETAILER_APP_URL not configured in settings")
+        logger.debug("DETAILER_APP_URL not configured in settings")
         return (False, "Detailer app not configured")
 
     try:
         base = (detailer_app_url or "").rstrip("/")
         url = f"{base}/api/v1/booking/create_booking/"
-        response = requests.post(
-            url,
-            json=detailer_data,
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
+        with external_call('detailer'):
+            response = requests.post(
+                url,
+                json=detailer_data,
+                headers={'Content-Type': 'application/json'},
+                timeout=30
+            )
 
         if response.status_code in [200, 201]:
-            print(f"Successfully created booking {pending_booking.booking_reference} on detailer app")
+            logger.debug("Successfully created booking %s on detailer app", pending_booking.booking_reference)
             try:
                 body = response.json()
                 detailer_info = body.get("detailer") if isinstance(body, dict) else None
@@ -518,11 +524,11 @@ def try_create_booking_on_detailer(pending_booking):
             error_message = err_body.get('error', response.text)
         except Exception:
             error_message = response.text or f"HTTP {response.status_code}"
-        print(f"Detailer app rejected booking: {response.status_code} - {error_message}")
+        logger.debug("Detailer app rejected booking: %s - %s", response.status_code, error_message)
         return (False, error_message)
 
     except Exception as e:
-        print(f"Error calling detailer app: {e}")
+        logger.error("Error calling detailer app: %s", e)
         return (False, str(e))
 
 
@@ -717,7 +723,7 @@ class PaymentView(APIView):
                     else:
                         country = 'Ireland'
             except Exception as e:
-                print(f"Error getting address: {e}")
+                logger.error("Error getting address: %s", e)
                 country = 'Ireland'
 
             # Set currency based on country
@@ -732,7 +738,7 @@ class PaymentView(APIView):
 
             # Branch spend leash: block branch admins over limit before creating PaymentIntent
             if user.is_branch_admin:
-                branch = user.get_managed_branch()
+                branch = request.scope.managed_branch
                 if branch:
                     limit = branch.spend_limit
                     if limit is not None and limit > 0:
@@ -762,7 +768,7 @@ class PaymentView(APIView):
                 payment_status='pending',
                 expires_at=expires_at
             )
-            print(f"Created pending booking: {pending_booking.id} with reference: {booking_reference}")
+            logger.debug("Created pending booking: %s with reference: %s", pending_booking.id, booking_reference)
             
             # Get or create Stripe customer
             if hasattr(user, 'stripe_customer_id') and user.stripe_customer_id:
@@ -778,7 +784,7 @@ class PaymentView(APIView):
                 if hasattr(user, 'stripe_customer_id'):
                     user.stripe_customer_id = customer.id
                     user.save()
-                print(f"Created new Stripe customer: {customer.id}")
+                logger.debug("Created new Stripe customer: %s", customer.id)
             
             # Create payment intent with pending booking reference in metadata
             # Prepare payment intent metadata
@@ -807,7 +813,7 @@ class PaymentView(APIView):
                 pending_booking.payment_status = 'processing'
                 pending_booking.save()
             
-            print(f"Created payment intent: {payment_intent.id} for pending booking: {booking_reference}")
+            logger.debug("Created payment intent: %s for pending booking: %s", payment_intent.id, booking_reference)
             
             # Create ephemeral key
             ephemeral_key = stripe.EphemeralKey.create(
@@ -824,7 +830,7 @@ class PaymentView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error creating payment sheet: {e}")
+            logger.error("Error creating payment sheet: %s", e)
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -848,7 +854,7 @@ class PaymentView(APIView):
             branch_obj = None
             fleet_obj = None
             if user.is_branch_admin:
-                branch_obj = user.get_managed_branch()
+                branch_obj = request.scope.managed_branch
                 fleet_obj = branch_obj.fleet if branch_obj else None
             if address_id:
                 try:
@@ -872,7 +878,7 @@ class PaymentView(APIView):
                 fleet_obj = user.owned_fleets.first()
             # Branch spend limit: block before creating invoice
             if user.is_branch_admin:
-                branch = user.get_managed_branch()
+                branch = request.scope.managed_branch
                 if branch and branch.spend_limit is not None and branch.spend_limit > 0:
                     period = branch.spend_limit_period or 'monthly'
                     spent = get_branch_spend_for_period(branch, period)
@@ -899,7 +905,7 @@ class PaymentView(APIView):
             try:
                 create_bulk_appointments(bulk_order)
             except Exception as e:
-                print(f"create_bulk_appointments failed for bulk order {bulk_order.id}: {e}")
+                logger.error("create_bulk_appointments failed for bulk order %s: %s", bulk_order.id, e)
             # Create Stripe Invoice and send to user.email; then send to detailer
             try:
                 country = 'Ireland'
@@ -950,13 +956,13 @@ class PaymentView(APIView):
                 # Invoice created and email sent; send bulk order to detailer
                 success, assigned = try_create_bulk_booking_on_detailer(bulk_order)
                 if not success:
-                    print(f"Detailer bulk booking failed after invoice sent: {assigned}")
+                    logger.error("Detailer bulk booking failed after invoice sent: %s", assigned)
                 elif assigned:
                     bulk_order.assigned_detailers = assigned
                     bulk_order.save(update_fields=['assigned_detailers'])
                     # Order and invoice already created; client can still pay. Log only.
             except stripe.StripeError as e:
-                print(f"Stripe error creating/sending invoice for bulk order {bulk_order.id}: {e}")
+                logger.error("Stripe error creating/sending invoice for bulk order %s: %s", bulk_order.id, e)
                 return Response(
                     {'error': f'Invoice could not be sent: {str(e)}'},
                     status=status.HTTP_502_BAD_GATEWAY,
@@ -1018,7 +1024,7 @@ class PaymentView(APIView):
             if not payment_intent_id:
                 return Response({'error': 'payment_intent_id is required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            print(f"Checking payment confirmation for payment intent: {payment_intent_id}")
+            logger.debug("Checking payment confirmation for payment intent: %s", payment_intent_id)
             
             # Check if PaymentTransaction exists for this payment intent
             # Works for all transaction types: payment, vin_lookup, subscription
@@ -1028,7 +1034,7 @@ class PaymentView(APIView):
             ).first()
             
             if payment_transaction:
-                print(f"Payment confirmed - transaction ID: {payment_transaction.id}, type: {payment_transaction.transaction_type}")
+                logger.debug("Payment confirmed - transaction ID: %s, type: %s", payment_transaction.id, payment_transaction.transaction_type)
                 return Response({
                     'confirmed': True,
                     'payment_intent_id': payment_intent_id,
@@ -1048,14 +1054,14 @@ class PaymentView(APIView):
                     'status': 'refunded_slot_unavailable',
                     'message': 'This time slot was no longer available. Your payment has been refunded. Please choose another slot.',
                 }, status=status.HTTP_200_OK)
-            print(f"Payment not yet confirmed for payment intent: {payment_intent_id}")
+            logger.debug("Payment not yet confirmed for payment intent: %s", payment_intent_id)
             return Response({
                 'confirmed': False,
                 'payment_intent_id': payment_intent_id,
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error confirming payment intent: {e}")
+            logger.error("Error confirming payment intent: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -1067,7 +1073,7 @@ class PaymentView(APIView):
             
             # If payment_intent_id is provided, check by that first (works before booking exists)
             if payment_intent_id:
-                print(f"Checking payment status for payment intent: {payment_intent_id}")
+                logger.debug("Checking payment status for payment intent: %s", payment_intent_id)
                 payment_transaction = PaymentTransaction.objects.filter(
                     stripe_payment_intent_id=payment_intent_id,
                     transaction_type='payment'
@@ -1103,10 +1109,10 @@ class PaymentView(APIView):
             if not booking_reference:
                 return Response({'error': 'booking_reference or payment_intent_id is required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            print(f"Checking payment status for booking: {booking_reference}")
+            logger.debug("Checking payment status for booking: %s", booking_reference)
             
             booking = BookedAppointment.objects.get(booking_reference=booking_reference)
-            print(f"Found booking: {booking.id}, user: {booking.user.id}, total_amount: {booking.total_amount}")
+            logger.debug("Found booking: %s, user: %s, total_amount: %s", booking.id, booking.user.id, booking.total_amount)
             
             # Check for payment transactions
             payment_transactions = PaymentTransaction.objects.filter(
@@ -1114,7 +1120,7 @@ class PaymentView(APIView):
                 transaction_type='payment'
             ).order_by('-created_at')
             
-            print(f"Found {payment_transactions.count()} payment transactions for booking")
+            logger.debug("Found %s payment transactions for booking", payment_transactions.count())
             
             payment_data = []
             for transaction in payment_transactions:
@@ -1127,7 +1133,7 @@ class PaymentView(APIView):
                     'created_at': transaction.created_at,
                     'processed_at': transaction.processed_at
                 })
-                print(f"Payment transaction: {transaction.id} - {transaction.status} - {transaction.amount} {transaction.currency}")
+                logger.debug("Payment transaction: %s - %s - %s %s", transaction.id, transaction.status, transaction.amount, transaction.currency)
             
             return Response({
                 'booking_reference': booking_reference,
@@ -1139,18 +1145,19 @@ class PaymentView(APIView):
             }, status=status.HTTP_200_OK)
             
         except BookedAppointment.DoesNotExist:
-            print(f"Booking not found: {booking_reference}")
+            logger.warning("Booking not found: %s", booking_reference)
             return Response({'error': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"Error checking payment status: {e}")
+            logger.error("Error checking payment status: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class StripeWebhookView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'stripe_webhook'
     
     def post(self, request, *args, **kwargs):
-        print(f"Received Stripe webhook request")
+        logger.debug("Received Stripe webhook request")
         try:
             # Get the raw request body - important for signature verification
             payload = request.body
@@ -1167,36 +1174,36 @@ class StripeWebhookView(APIView):
                     event = stripe.Webhook.construct_event(
                     payload, sig_header, webhook_secret
                     )
-                    print(f"Stripe webhook signature verified successfully")
+                    logger.debug("Stripe webhook signature verified successfully")
                 except stripe.error.SignatureVerificationError as e:
-                    print(f"Stripe webhook signature verification failed: {e}")
+                    logger.error("Stripe webhook signature verification failed: %s", e)
                     return Response({'error': 'Invalid signature'}, status=status.HTTP_400_BAD_REQUEST)
             else:
                 # For local testing with stripe listen (no signature verification)
-                print("Webhook secret not configured or signature missing - skipping verification")
+                logger.warning("Webhook secret not configured or signature missing - skipping verification")
                 if not sig_header:
-                    print("No Stripe-Signature header found")
+                    logger.debug("No Stripe-Signature header found")
                 if not webhook_secret:
-                    print("STRIPE_WEBHOOK_SECRET not set in settings")
+                    logger.debug("STRIPE_WEBHOOK_SECRET not set in settings")
                 
                 # Parse JSON directly (only for local testing)
                 try:
                     event = json.loads(payload)
                 except json.JSONDecodeError as e:
-                    print(f"Invalid JSON payload: {e}")
+                    logger.warning("Invalid JSON payload: %s", e)
                     return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
             
             event_type = event.get('type')
-            print(f"Stripe webhook event type: {event_type}")
+            logger.debug("Stripe webhook event type: %s", event_type)
             
             # Handle payment success events
             if event_type == 'payment_intent.succeeded':
                 payment_intent = event['data']['object']
                 metadata = payment_intent.get('metadata', {})
                 
-                print(f"Payment intent succeeded - ID: {payment_intent.get('id')}")
-                print(f"Payment intent amount: {payment_intent.get('amount')} {payment_intent.get('currency')}")
-                print(f"Payment intent metadata: {metadata}")
+                logger.debug("Payment intent succeeded - ID: %s", payment_intent.get('id'))
+                logger.debug("Payment intent amount: %s %s", payment_intent.get('amount'), payment_intent.get('currency'))
+                logger.debug("Payment intent metadata: %s", metadata)
                 
                 try:
                     # Check if this is a VIN lookup transaction
@@ -1213,12 +1220,12 @@ class StripeWebhookView(APIView):
                     booking_reference = metadata.get('booking_reference')
                     user_id = metadata.get('user_id')
                     
-                    print(f"Pending booking ID from metadata: {pending_booking_id}")
-                    print(f"Booking reference from metadata: {booking_reference}")
-                    print(f"User ID from metadata: {user_id}")
+                    logger.debug("Pending booking ID from metadata: %s", pending_booking_id)
+                    logger.debug("Booking reference from metadata: %s", booking_reference)
+                    logger.debug("User ID from metadata: %s", user_id)
                     
                     if not pending_booking_id:
-                        print("No pending_booking_id found in payment intent metadata - falling back to old flow")
+                        logger.debug("No pending_booking_id found in payment intent metadata - falling back to old flow")
                         # Fall back to old flow for backward compatibility
                         return self._handle_payment_old_flow(payment_intent, metadata, booking_reference, user_id)
                     
@@ -1226,7 +1233,7 @@ class StripeWebhookView(APIView):
                     try:
                         pending_booking = PendingBooking.objects.get(id=pending_booking_id)
                     except PendingBooking.DoesNotExist:
-                        print(f"Pending booking {pending_booking_id} not found")
+                        logger.warning("Pending booking %s not found", pending_booking_id)
                         return Response(
                             {'error': 'Pending booking not found'}, 
                             status=status.HTTP_404_NOT_FOUND
@@ -1234,7 +1241,7 @@ class StripeWebhookView(APIView):
                     
                     # Check if booking already created (idempotency)
                     if pending_booking.payment_status == 'succeeded':
-                        print(f"Booking already created for pending booking {pending_booking_id}")
+                        logger.debug("Booking already created for pending booking %s", pending_booking_id)
                         return Response({'status': 'booking already created'}, status=status.HTTP_200_OK)
                     
                     # Check if booking already exists (in case webhook was called twice)
@@ -1246,7 +1253,7 @@ class StripeWebhookView(APIView):
                         # Bulk order flow: create BulkOrder and send to detailer create_bulk_booking
                         try:
                             bulk_order = BulkOrder.objects.get(booking_reference=booking_reference)
-                            print(f"BulkOrder already exists: {bulk_order.id}")
+                            logger.debug("BulkOrder already exists: %s", bulk_order.id)
                         except BulkOrder.DoesNotExist:
                             success, assigned = try_create_bulk_booking_on_detailer(pending_booking)
                             if not success:
@@ -1260,9 +1267,9 @@ class StripeWebhookView(APIView):
                                             'refund_reason': 'bulk_slot_unavailable',
                                         },
                                     )
-                                    print(f"Refunded payment intent {payment_intent_id} due to bulk detailer rejection: {assigned}")
+                                    logger.debug("Refunded payment intent %s due to bulk detailer rejection: %s", payment_intent_id, assigned)
                                 except Exception as refund_err:
-                                    print(f"Refund failed: {refund_err}")
+                                    logger.error("Refund failed: %s", refund_err)
                                 pending_booking.slot_conflict_refunded_at = timezone.now()
                                 pending_booking.save(update_fields=['slot_conflict_refunded_at'])
                                 return Response({'status': 'refunded_slot_unavailable'}, status=status.HTTP_200_OK)
@@ -1309,15 +1316,15 @@ class StripeWebhookView(APIView):
                                 order_data=bd,
                                 assigned_detailers=assigned or [],
                             )
-                            print(f"Created BulkOrder {bulk_order.id} from pending booking {pending_booking_id}")
+                            logger.debug("Created BulkOrder %s from pending booking %s", bulk_order.id, pending_booking_id)
                             try:
                                 create_bulk_appointments(bulk_order)
                             except Exception as e:
-                                print(f"create_bulk_appointments failed for bulk order {bulk_order.id}: {e}")
+                                logger.error("create_bulk_appointments failed for bulk order %s: %s", bulk_order.id, e)
                     else:
                         try:
                             booking = BookedAppointment.objects.get(booking_reference=booking_reference)
-                            print(f"Booking already exists: {booking.id} - will update payment transaction only")
+                            logger.debug("Booking already exists: %s - will update payment transaction only", booking.id)
                         except BookedAppointment.DoesNotExist:
                             # Try detailer first; only create client booking if detailer accepts
                             success, detailer_info = try_create_booking_on_detailer(pending_booking)
@@ -1334,9 +1341,9 @@ class StripeWebhookView(APIView):
                                             'refund_reason': 'slot_unavailable',
                                         },
                                     )
-                                    print(f"Refunded payment intent {payment_intent_id} due to detailer rejection: {error_message}")
+                                    logger.debug("Refunded payment intent %s due to detailer rejection: %s", payment_intent_id, error_message)
                                 except Exception as refund_err:
-                                    print(f"Refund failed: {refund_err}")
+                                    logger.error("Refund failed: %s", refund_err)
                                 pending_booking.slot_conflict_refunded_at = timezone.now()
                                 pending_booking.save(update_fields=['slot_conflict_refunded_at'])
                                 return Response({'status': 'refunded_slot_unavailable'}, status=status.HTTP_200_OK)
@@ -1344,7 +1351,7 @@ class StripeWebhookView(APIView):
                             pending_booking.payment_status = 'succeeded'
                             pending_booking.save()
                             booking = create_booking_from_pending(pending_booking)
-                            print(f"Created booking {booking.id} from pending booking {pending_booking_id}")
+                            logger.debug("Created booking %s from pending booking %s", booking.id, pending_booking_id)
                             # Assign detailer immediately from API response so UI shows detailer without waiting for Redis
                             if detailer_info:
                                 assign_detailer_to_booking(booking, detailer_info)
@@ -1372,12 +1379,12 @@ class StripeWebhookView(APIView):
                         )
                     
                     pending_booking.delete()
-                    print(f"Deleted pending booking {pending_booking_id} after successful booking creation")
+                    logger.debug("Deleted pending booking %s after successful booking creation", pending_booking_id)
                     
                     return Response({'status': 'booking created successfully'}, status=status.HTTP_200_OK)
                     
                 except Exception as e:
-                    print(f"Error processing payment webhook: {e}")
+                    logger.error("Error processing payment webhook: %s", e)
                     return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             
@@ -1392,29 +1399,29 @@ class StripeWebhookView(APIView):
                         pending_booking = PendingBooking.objects.get(id=pending_booking_id)
                         pending_booking.payment_status = 'failed'
                         pending_booking.save()
-                        print(f"Marked pending booking {pending_booking_id} as failed")
+                        logger.error("Marked pending booking %s as failed", pending_booking_id)
                     except PendingBooking.DoesNotExist:
-                        print(f"Pending booking {pending_booking_id} not found for failure handling")
+                        logger.warning("Pending booking %s not found for failure handling", pending_booking_id)
                 
                 return Response({'status': 'payment failed handled'}, status=status.HTTP_200_OK)
             
             # Handle refund events
             elif event_type == 'charge.dispute.created':
-                print(f"Handling dispute created event")
+                logger.debug("Handling dispute created event")
                 dispute = event['data']['object']
                 self._handle_dispute(dispute)
                 
             # Handle subscription invoice payment or bulk order invoice payment
             elif event_type == 'invoice.payment_succeeded':
                 invoice = event['data']['object']
-                print(f"Invoice payment succeeded - Invoice ID: {invoice.get('id')}")
+                logger.debug("Invoice payment succeeded - Invoice ID: %s", invoice.get('id'))
                 metadata = invoice.get('metadata') or {}
                 bulk_order_id = metadata.get('bulk_order_id')
                 if bulk_order_id:
                     try:
                         bulk_order = BulkOrder.objects.get(id=bulk_order_id)
                     except BulkOrder.DoesNotExist:
-                        print(f"BulkOrder {bulk_order_id} not found in invoice.payment_succeeded")
+                        logger.warning("BulkOrder %s not found in invoice.payment_succeeded", bulk_order_id)
                         return Response({'status': 'bulk order not found'}, status=status.HTTP_200_OK)
                     if bulk_order.payment_status == 'succeeded':
                         return Response({'status': 'bulk order already paid'}, status=status.HTTP_200_OK)
@@ -1440,64 +1447,64 @@ class StripeWebhookView(APIView):
                 return self._handle_subscription_payment(invoice)
             
             elif event_type == 'charge.refunded':
-                print(f"Handling refund succeeded event")
+                logger.debug("Handling refund succeeded event")
                 refund = event['data']['object']
                 self._handle_refund_success(refund)
 
             elif event_type == 'charge.updated':
-                print(f"Handling charge updated event")
+                logger.debug("Handling charge updated event")
                 refund = event['data']['object']
                 self._handle_refund_updated(refund)
                 
             elif event_type == 'charge.failed':
-                print(f"Handling charge failed event")
+                logger.error("Handling charge failed event")
                 refund = event['data']['object']
                 self._handle_refund_failure(refund)
             
             # Handle subscription trial will end (7 days before)
             elif event_type == 'customer.subscription.trial_will_end':
                 subscription = event['data']['object']
-                print(f"Trial will end - Subscription ID: {subscription.get('id')}")
+                logger.debug("Trial will end - Subscription ID: %s", subscription.get('id'))
                 return self._handle_trial_will_end(subscription)
             
             # Handle subscription updates (status changes, plan changes, etc.)
             elif event_type == 'customer.subscription.updated':
                 subscription = event['data']['object']
-                print(f"Subscription updated - Subscription ID: {subscription.get('id')}")
+                logger.debug("Subscription updated - Subscription ID: %s", subscription.get('id'))
                 return self._handle_subscription_updated(subscription)
             
             # Handle subscription deletion (cancellation)
             elif event_type == 'customer.subscription.deleted':
                 subscription = event['data']['object']
-                print(f"Subscription deleted - Subscription ID: {subscription.get('id')}")
+                logger.debug("Subscription deleted - Subscription ID: %s", subscription.get('id'))
                 return self._handle_subscription_deleted(subscription)
             
             # Handle invoice payment failed
             elif event_type == 'invoice.payment_failed':
                 invoice = event['data']['object']
-                print(f"Invoice payment failed - Invoice ID: {invoice.get('id')}")
+                logger.error("Invoice payment failed - Invoice ID: %s", invoice.get('id'))
                 return self._handle_invoice_payment_failed(invoice)
 
             elif event_type == 'invoice.sent':
-                print(f"Invoice sent - acknowledged (bulk order invoice already created and dispatched in API)")
+                logger.debug("Invoice sent - acknowledged (bulk order invoice already created and dispatched in API)")
                 return Response({'status': 'received'}, status=status.HTTP_200_OK)
             
             else:
-                print(f"Unhandled Stripe event type: {event_type}")
+                logger.debug("Unhandled Stripe event type: %s", event_type)
                 return Response({
                     'status': 'success',
                     'message': f'Received {event_type}',
                     'event_type': event_type
                 }, status=status.HTTP_200_OK)
             
-            print(f"Stripe event processed successfully: {event_type}")
+            logger.debug("Stripe event processed successfully: %s", event_type)
             return Response({'status': 'event processed'}, status=status.HTTP_200_OK)
             
         except json.JSONDecodeError as e:
-            print(f"Invalid JSON payload: {e}")
+            logger.warning("Invalid JSON payload: %s", e)
             return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Unexpected error in webhook: {e}")
+            logger.error("Unexpected error in webhook: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -1514,7 +1521,7 @@ class StripeWebhookView(APIView):
             # Get subscription from invoice
             subscription_id = invoice.get('subscription')
             if not subscription_id:
-                print(f"No subscription ID found in invoice")
+                logger.debug("No subscription ID found in invoice")
                 return Response({
                     'error': 'No subscription ID in invoice'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -1531,14 +1538,14 @@ class StripeWebhookView(APIView):
             user_id = metadata.get('user_id')
             subscription_type = metadata.get('type')
             
-            print(f"Processing subscription payment - Subscription DB ID: {subscription_db_id}, Billing ID: {billing_id}, User ID: {user_id}")
+            logger.debug("Processing subscription payment - Subscription DB ID: %s, Billing ID: %s, User ID: %s", subscription_db_id, billing_id, user_id)
             
             if subscription_type != 'fleet_subscription':
-                print(f"Not a fleet subscription, skipping")
+                logger.warning("Not a fleet subscription, skipping")
                 return Response({'status': 'not a fleet subscription'}, status=status.HTTP_200_OK)
             
             if not subscription_db_id or not user_id:
-                print(f"Missing required metadata for subscription payment")
+                logger.warning("Missing required metadata for subscription payment")
                 return Response({
                     'error': 'Missing required metadata (subscription_id or user_id)'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -1547,7 +1554,7 @@ class StripeWebhookView(APIView):
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({
                     'error': 'User not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -1556,7 +1563,7 @@ class StripeWebhookView(APIView):
             try:
                 subscription = FleetSubscription.objects.get(id=subscription_db_id)
             except FleetSubscription.DoesNotExist:
-                print(f"Subscription not found: {subscription_db_id}")
+                logger.warning("Subscription not found: %s", subscription_db_id)
                 return Response({
                     'error': 'Subscription not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -1565,7 +1572,7 @@ class StripeWebhookView(APIView):
             is_renewal = billing_id is None
             
             if is_renewal:
-                print(f"This is a subscription renewal for subscription {subscription_db_id}")
+                logger.debug("This is a subscription renewal for subscription %s", subscription_db_id)
                 # For renewals, create a new billing record
                 billing = SubscriptionBilling.objects.create(
                     subscription=subscription,
@@ -1585,14 +1592,14 @@ class StripeWebhookView(APIView):
                     # Default to monthly
                     subscription.end_date = subscription.end_date + relativedelta(months=1)
                 
-                print(f"Extended subscription end_date to {subscription.end_date}")
+                logger.debug("Extended subscription end_date to %s", subscription.end_date)
             else:
-                print(f"This is an initial subscription payment")
+                logger.debug("This is an initial subscription payment")
                 # For initial payment, get existing billing record
                 try:
                     billing = SubscriptionBilling.objects.get(id=billing_id)
                 except SubscriptionBilling.DoesNotExist:
-                    print(f"Billing record not found: {billing_id}")
+                    logger.warning("Billing record not found: %s", billing_id)
                     return Response({
                         'error': 'Billing record not found'
                     }, status=status.HTTP_404_NOT_FOUND)
@@ -1627,7 +1634,7 @@ class StripeWebhookView(APIView):
             if not payment_intent_id_str:
                 # Use invoice ID as transaction identifier for renewals
                 payment_intent_id_str = f"inv_{invoice.get('id')}"
-                print(f"No payment intent found, using invoice ID as transaction identifier: {payment_intent_id_str}")
+                logger.debug("No payment intent found, using invoice ID as transaction identifier: %s", payment_intent_id_str)
             
             # Check if transaction already exists (idempotency)
             existing_transaction = PaymentTransaction.objects.filter(
@@ -1635,7 +1642,7 @@ class StripeWebhookView(APIView):
             ).first()
             
             if existing_transaction:
-                print(f"Subscription payment transaction already exists: {existing_transaction.id}")
+                logger.debug("Subscription payment transaction already exists: %s", existing_transaction.id)
                 # Still update subscription and billing status
                 subscription.status = 'active'
                 subscription.save()
@@ -1718,11 +1725,11 @@ class StripeWebhookView(APIView):
                     next_billing_date.isoformat()
                 )
             
-            print(f"Subscription payment transaction recorded successfully for subscription {subscription_db_id} (renewal: {is_renewal})")
+            logger.debug("Subscription payment transaction recorded successfully for subscription %s (renewal: %s)", subscription_db_id, is_renewal)
             return Response({'status': 'subscription payment recorded successfully'}, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error handling subscription payment: {e}")
+            logger.error("Error handling subscription payment: %s", e)
             return Response({
                 'error': f'Failed to process subscription payment: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1740,12 +1747,12 @@ class StripeWebhookView(APIView):
             payment_intent_id = payment_intent.get('id')
             user_id = metadata.get('user_id')
             if not user_id:
-                print("No user_id in fleet subscription payment intent metadata")
+                logger.debug("No user_id in fleet subscription payment intent metadata")
                 return Response({'error': 'No user_id in metadata'}, status=status.HTTP_400_BAD_REQUEST)
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
             existing = PaymentTransaction.objects.filter(
                 stripe_payment_intent_id=payment_intent_id,
@@ -1753,7 +1760,7 @@ class StripeWebhookView(APIView):
             ).first()
             if existing:
                 payment_transaction = existing
-                print(f"Fleet subscription transaction already exists for payment intent: {payment_intent_id}")
+                logger.debug("Fleet subscription transaction already exists for payment intent: %s", payment_intent_id)
             else:
                 payment_method_details = payment_intent.get('payment_method_details', {}) or {}
                 card_details = payment_method_details.get('card', {})
@@ -1771,7 +1778,7 @@ class StripeWebhookView(APIView):
                     card_brand=card_brand,
                     status='succeeded',
                 )
-                print(f"Fleet subscription payment transaction created for payment intent: {payment_intent_id}")
+                logger.debug("Fleet subscription payment transaction created for payment intent: %s", payment_intent_id)
             subscription_db_id = metadata.get('subscription_id')
             billing_id = metadata.get('billing_id')
             if subscription_db_id and billing_id:
@@ -1784,24 +1791,24 @@ class StripeWebhookView(APIView):
                     billing.payment = payment_transaction
                     billing.transaction_id = payment_intent_id
                     billing.save(update_fields=['status', 'payment', 'transaction_id', 'updated_at'])
-                    print(f"Fleet subscription {subscription_db_id} activated and billing {billing_id} marked paid")
+                    logger.debug("Fleet subscription %s activated and billing %s marked paid", subscription_db_id, billing_id)
                 except FleetSubscription.DoesNotExist:
-                    print(f"FleetSubscription not found: {subscription_db_id}")
+                    logger.warning("FleetSubscription not found: %s", subscription_db_id)
                 except SubscriptionBilling.DoesNotExist:
-                    print(f"SubscriptionBilling not found: {billing_id}")
+                    logger.warning("SubscriptionBilling not found: %s", billing_id)
             # If this PaymentIntent was standalone (metadata has invoice_id), mark the Stripe
             # invoice as paid out of band so the subscription becomes Active in the dashboard.
             invoice_id = metadata.get('invoice_id')
             if invoice_id:
                 try:
                     stripe.Invoice.pay(invoice_id, paid_out_of_band=True)
-                    print(f"Marked Stripe invoice {invoice_id} paid out of band; subscription should be Active")
+                    logger.debug("Marked Stripe invoice %s paid out of band; subscription should be Active", invoice_id)
                 except stripe.error.InvalidRequestError as e:
                     # Invoice may already be paid (e.g. we used the invoice's PaymentIntent)
-                    print(f"Stripe invoice pay (out of band) skipped or failed: {e}")
+                    logger.error("Stripe invoice pay (out of band) skipped or failed: %s", e)
             return Response({'status': 'subscription payment recorded'}, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Error handling fleet subscription payment intent: {e}")
+            logger.error("Error handling fleet subscription payment intent: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -1819,10 +1826,10 @@ class StripeWebhookView(APIView):
             vin = metadata.get('vin')
             purchase_reference = metadata.get('purchase_reference')
             
-            print(f"Processing VIN lookup payment - VIN: {vin}, Email: {email}, Purchase Reference: {purchase_reference}")
+            logger.debug("Processing VIN lookup payment - VIN: %s, Email: %s, Purchase Reference: %s", vin, email, purchase_reference)
             
             if not vin or not email or not purchase_reference:
-                print("Missing required metadata for VIN lookup payment")
+                logger.warning("Missing required metadata for VIN lookup payment")
                 return Response({
                     'error': 'Missing required metadata (vin, email, or purchase_reference)'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -1834,7 +1841,7 @@ class StripeWebhookView(APIView):
             try:
                 vehicle = Vehicle.objects.get(vin=vin)
             except Vehicle.DoesNotExist:
-                print(f"Vehicle not found for VIN: {vin}")
+                logger.warning("Vehicle not found for VIN: %s", vin)
                 return Response({
                     'error': 'Vehicle not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -1848,7 +1855,7 @@ class StripeWebhookView(APIView):
                     if user.email:
                         email = user.email.lower().strip()
                 except (User.DoesNotExist, ValueError):
-                    print(f"User {user_id} not found, proceeding as unregistered user")
+                    logger.warning("User %s not found, proceeding as unregistered user", user_id)
             
             # Check if purchase already exists (idempotency)
             existing_purchase = VinLookupPurchase.objects.filter(
@@ -1856,7 +1863,7 @@ class StripeWebhookView(APIView):
             ).first()
             
             if existing_purchase:
-                print(f"Purchase {purchase_reference} already exists")
+                logger.debug("Purchase %s already exists", purchase_reference)
                 return Response({
                     'status': 'purchase already created'
                 }, status=status.HTTP_200_OK)
@@ -1892,7 +1899,7 @@ class StripeWebhookView(APIView):
                 is_active=True
             )
             
-            print(f"Created VinLookupPurchase {vin_lookup_purchase.id} for VIN {vin}, Email: {email}")
+            logger.debug("Created VinLookupPurchase %s for VIN %s, Email: %s", vin_lookup_purchase.id, vin, email)
             
             return Response({
                 'status': 'vin_lookup_purchase created successfully',
@@ -1900,7 +1907,7 @@ class StripeWebhookView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error processing VIN lookup payment: {e}")
+            logger.error("Error processing VIN lookup payment: %s", e)
             return Response({
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -1913,7 +1920,7 @@ class StripeWebhookView(APIView):
         Sends email and push notification to user.
         """
         from main.models import User, FleetSubscription
-        from main.tasks import send_trial_ending_soon_email, send_push_notification
+        from main.tasks import send_trial_ending_soon_email, enqueue_push
         
         try:
             metadata = subscription.get('metadata', {})
@@ -1921,7 +1928,7 @@ class StripeWebhookView(APIView):
             user_id = metadata.get('user_id')
             
             if not subscription_db_id or not user_id:
-                print("Missing required metadata for trial_will_end")
+                logger.warning("Missing required metadata for trial_will_end")
                 return Response({
                     'error': 'Missing required metadata'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -1930,7 +1937,7 @@ class StripeWebhookView(APIView):
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({
                     'error': 'User not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -1939,7 +1946,7 @@ class StripeWebhookView(APIView):
             try:
                 db_subscription = FleetSubscription.objects.get(id=subscription_db_id)
             except FleetSubscription.DoesNotExist:
-                print(f"Subscription not found: {subscription_db_id}")
+                logger.warning("Subscription not found: %s", subscription_db_id)
                 return Response({
                     'error': 'Subscription not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -1966,18 +1973,18 @@ class StripeWebhookView(APIView):
             )
             
             # Send push notification
-            send_push_notification.delay(
+            enqueue_push(
                 str(user.id),
                 "Trial Ending Soon",
                 f"Your {plan_name} trial ends in 7 days. Billing will start automatically.",
                 "subscription_trial_ending"
             )
             
-            print(f"Trial ending soon notification sent for subscription {subscription_db_id}")
+            logger.debug("Trial ending soon notification sent for subscription %s", subscription_db_id)
             return Response({'status': 'trial ending notification sent'}, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error handling trial_will_end: {e}")
+            logger.error("Error handling trial_will_end: %s", e)
             return Response({
                 'error': f'Failed to process trial_will_end: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1997,7 +2004,7 @@ class StripeWebhookView(APIView):
             user_id = metadata.get('user_id')
             
             if not subscription_db_id or not user_id:
-                print("Missing required metadata for subscription.updated")
+                logger.warning("Missing required metadata for subscription.updated")
                 return Response({
                     'error': 'Missing required metadata'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -2006,7 +2013,7 @@ class StripeWebhookView(APIView):
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({
                     'error': 'User not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2015,7 +2022,7 @@ class StripeWebhookView(APIView):
             try:
                 db_subscription = FleetSubscription.objects.get(id=subscription_db_id)
             except FleetSubscription.DoesNotExist:
-                print(f"Subscription not found: {subscription_db_id}")
+                logger.warning("Subscription not found: %s", subscription_db_id)
                 return Response({
                     'error': 'Subscription not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2039,7 +2046,7 @@ class StripeWebhookView(APIView):
                 old_status = db_subscription.status
                 db_subscription.status = new_status
                 db_subscription.save()
-                print(f"Updated subscription {subscription_db_id} status from {old_status} to {new_status}")
+                logger.debug("Updated subscription %s status from %s to %s", subscription_db_id, old_status, new_status)
             
             # Check if payment method was updated (check if default_payment_method changed)
             # This is a simple check - in production you might want to track this more carefully
@@ -2057,11 +2064,11 @@ class StripeWebhookView(APIView):
                 # We could update the plan here if needed, but Stripe manages billing
                 pass
             
-            print(f"Subscription updated for subscription {subscription_db_id}")
+            logger.debug("Subscription updated for subscription %s", subscription_db_id)
             return Response({'status': 'subscription updated'}, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error handling subscription.updated: {e}")
+            logger.error("Error handling subscription.updated: %s", e)
             return Response({
                 'error': f'Failed to process subscription.updated: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2073,7 +2080,7 @@ class StripeWebhookView(APIView):
         Updates subscription status and sends cancellation email.
         """
         from main.models import User, FleetSubscription
-        from main.tasks import send_subscription_cancelled_email, send_push_notification
+        from main.tasks import send_subscription_cancelled_email, enqueue_push
         from datetime import datetime
         
         try:
@@ -2082,7 +2089,7 @@ class StripeWebhookView(APIView):
             user_id = metadata.get('user_id')
             
             if not subscription_db_id or not user_id:
-                print("Missing required metadata for subscription.deleted")
+                logger.warning("Missing required metadata for subscription.deleted")
                 return Response({
                     'error': 'Missing required metadata'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -2091,7 +2098,7 @@ class StripeWebhookView(APIView):
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({
                     'error': 'User not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2100,7 +2107,7 @@ class StripeWebhookView(APIView):
             try:
                 db_subscription = FleetSubscription.objects.get(id=subscription_db_id)
             except FleetSubscription.DoesNotExist:
-                print(f"Subscription not found: {subscription_db_id}")
+                logger.warning("Subscription not found: %s", subscription_db_id)
                 return Response({
                     'error': 'Subscription not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2135,18 +2142,18 @@ class StripeWebhookView(APIView):
             )
             
             # Send push notification
-            send_push_notification.delay(
+            enqueue_push(
                 str(user.id),
                 "Subscription Cancelled",
                 f"Your {plan_name} subscription has been cancelled. Access continues until {access_until_date.strftime('%B %d, %Y') if access_until_date else 'the end of your billing period'}.",
                 "subscription_cancelled"
             )
             
-            print(f"Subscription cancelled for subscription {subscription_db_id}")
+            logger.debug("Subscription cancelled for subscription %s", subscription_db_id)
             return Response({'status': 'subscription cancelled'}, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error handling subscription.deleted: {e}")
+            logger.error("Error handling subscription.deleted: %s", e)
             return Response({
                 'error': f'Failed to process subscription.deleted: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2157,14 +2164,14 @@ class StripeWebhookView(APIView):
         Updates subscription status, sets grace period, and sends notifications.
         """
         from main.models import User, FleetSubscription
-        from main.tasks import send_payment_failed_email, send_push_notification
+        from main.tasks import send_payment_failed_email, enqueue_push
         from datetime import timedelta
         
         try:
             # Get subscription from invoice
             subscription_id = invoice.get('subscription')
             if not subscription_id:
-                print(f"No subscription ID found in invoice")
+                logger.debug("No subscription ID found in invoice")
                 return Response({
                     'error': 'No subscription ID in invoice'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -2181,11 +2188,11 @@ class StripeWebhookView(APIView):
             subscription_type = metadata.get('type')
             
             if subscription_type != 'fleet_subscription':
-                print(f"Not a fleet subscription, skipping")
+                logger.warning("Not a fleet subscription, skipping")
                 return Response({'status': 'not a fleet subscription'}, status=status.HTTP_200_OK)
             
             if not subscription_db_id or not user_id:
-                print("Missing required metadata for invoice.payment_failed")
+                logger.warning("Missing required metadata for invoice.payment_failed")
                 return Response({
                     'error': 'Missing required metadata'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -2194,7 +2201,7 @@ class StripeWebhookView(APIView):
             try:
                 user = User.objects.get(id=user_id)
             except User.DoesNotExist:
-                print(f"User not found: {user_id}")
+                logger.warning("User not found: %s", user_id)
                 return Response({
                     'error': 'User not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2203,7 +2210,7 @@ class StripeWebhookView(APIView):
             try:
                 subscription = FleetSubscription.objects.get(id=subscription_db_id)
             except FleetSubscription.DoesNotExist:
-                print(f"Subscription not found: {subscription_db_id}")
+                logger.warning("Subscription not found: %s", subscription_db_id)
                 return Response({
                     'error': 'Subscription not found'
                 }, status=status.HTTP_404_NOT_FOUND)
@@ -2240,18 +2247,18 @@ class StripeWebhookView(APIView):
             )
             
             # Send push notification
-            send_push_notification.delay(
+            enqueue_push(
                 str(user.id),
                 "Payment Failed",
                 f"Your {plan_name} subscription payment failed. Please update your payment method to avoid service interruption.",
                 "subscription_payment_failed"
             )
             
-            print(f"Payment failed notification sent for subscription {subscription_db_id}")
+            logger.error("Payment failed notification sent for subscription %s", subscription_db_id)
             return Response({'status': 'payment failure handled'}, status=status.HTTP_200_OK)
             
         except Exception as e:
-            print(f"Error handling invoice.payment_failed: {e}")
+            logger.error("Error handling invoice.payment_failed: %s", e)
             return Response({
                 'error': f'Failed to process invoice.payment_failed: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2261,11 +2268,11 @@ class StripeWebhookView(APIView):
         """Handle payment webhook with old flow (for backward compatibility)"""
         try:
             if not booking_reference:
-                print("No booking reference found in payment intent metadata")
+                logger.debug("No booking reference found in payment intent metadata")
                 return Response({'error': 'No booking reference in metadata'}, status=status.HTTP_400_BAD_REQUEST)
             
             if not user_id:
-                print("No user_id found in payment intent metadata")
+                logger.debug("No user_id found in payment intent metadata")
                 return Response({'error': 'No user_id in metadata'}, status=status.HTTP_400_BAD_REQUEST)
             
             # Check if PaymentTransaction already exists to avoid duplicates
@@ -2275,24 +2282,24 @@ class StripeWebhookView(APIView):
             ).first()
             
             if existing_transaction:
-                print(f"Payment transaction already exists for payment intent: {payment_intent_id}, transaction ID: {existing_transaction.id}")
+                logger.debug("Payment transaction already exists for payment intent: %s, transaction ID: %s", payment_intent_id, existing_transaction.id)
                 return Response({'status': 'payment already recorded'}, status=status.HTTP_200_OK)
             
             # Get user from metadata
             try:
                 user = User.objects.get(id=user_id)
-                print(f"Found user: {user.id}")
+                logger.debug("Found user: %s", user.id)
             except User.DoesNotExist:
-                print(f"User not found for ID: {user_id}")
+                logger.warning("User not found for ID: %s", user_id)
                 return Response({'error': 'User not found'}, status=status.HTTP_400_BAD_REQUEST)
             
             # Try to get booking if it exists (may not exist yet)
             booking = None
             try:
                 booking = BookedAppointment.objects.get(booking_reference=booking_reference)
-                print(f"Found booking: {booking.id}, user: {booking.user.id}, amount: {booking.total_amount}")
+                logger.debug("Found booking: %s, user: %s, amount: %s", booking.id, booking.user.id, booking.total_amount)
             except BookedAppointment.DoesNotExist:
-                print(f"Booking not yet created for reference: {booking_reference} - will create payment transaction without booking")
+                logger.debug("Booking not yet created for reference: %s - will create payment transaction without booking", booking_reference)
             
             # Safely get payment method details (may not exist)
             last_4_digits = None
@@ -2303,10 +2310,10 @@ class StripeWebhookView(APIView):
                 last_4_digits = card_details.get('last4')
                 card_brand = card_details.get('brand')
             except (AttributeError, KeyError, TypeError) as e:
-                print(f"Could not extract card details: {e}")
+                logger.error("Could not extract card details: %s", e)
             
             # Create payment transaction record (booking may be None)
-            print(f"Creating payment transaction for booking reference: {booking_reference}")
+            logger.debug("Creating payment transaction for booking reference: %s", booking_reference)
             payment_transaction = PaymentTransaction.objects.create(
                 booking=booking,  # May be None if booking doesn't exist yet
                 user=user,
@@ -2319,22 +2326,22 @@ class StripeWebhookView(APIView):
                 card_brand=card_brand,
                 status='succeeded'
             )
-            print(f"Payment transaction created successfully: {payment_transaction.id}")
-            print(f"Payment transaction details - Amount: {payment_transaction.amount}, Currency: {payment_transaction.currency}, Status: {payment_transaction.status}")
+            logger.debug("Payment transaction created successfully: %s", payment_transaction.id)
+            logger.debug("Payment transaction details - Amount: %s, Currency: %s, Status: %s", payment_transaction.amount, payment_transaction.currency, payment_transaction.status)
             
             # If booking exists, save it to trigger any signals
             if booking:
                 booking.save()
-                print(f"Booking saved after payment transaction creation")
+                logger.debug("Booking saved after payment transaction creation")
             
-            print(f"Payment recorded successfully for booking reference: {booking_reference}")
+            logger.debug("Payment recorded successfully for booking reference: %s", booking_reference)
             return Response({'status': 'payment recorded'}, status=status.HTTP_200_OK)
         except Exception as e:
-            print(f"Error processing old payment flow: {e}")
+            logger.error("Error processing old payment flow: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def _handle_refund_updated(self, refund):
-        print(f"Handling refund updated: {refund}")
+        logger.debug("Handling refund updated: %s", refund)
         """Handle updated refunds"""
         # try:
         #     refund_record = RefundRecord.objects.filter(
@@ -2351,7 +2358,7 @@ class StripeWebhookView(APIView):
         #     print(f"Error handling refund updated: {str(e)}")
 
     def _handle_dispute(self, dispute):
-        print(f"Handling dispute: {dispute}")
+        logger.debug("Handling dispute: %s", dispute)
         """Handle charge disputes"""
         try:
             # Find the refund record by metadata
@@ -2367,10 +2374,10 @@ class StripeWebhookView(APIView):
                 # Send the dispute created email and notification to the user
                 
         except Exception as e:
-            print(f"Error handling dispute: {e}")
+            logger.error("Error handling dispute: %s", e)
 
     def _handle_refund_success(self, refund):
-        print(f"Handling refund success: {refund}")
+        logger.debug("Handling refund success: %s", refund)
         """Handle successful refunds"""
         try:
             refund_record = RefundRecord.objects.filter(
@@ -2396,12 +2403,12 @@ class StripeWebhookView(APIView):
                     refund_date=timezone.now()
                 )
                 
-                print(f"Refund success email queued for user {refund_record.user.email}")
+                logger.debug("Refund success email queued for user %s", refund_record.user.email)
         except Exception as e:
-            print(f"Error handling refund success: {e}")
+            logger.error("Error handling refund success: %s", e)
 
     def _handle_refund_failure(self, refund):
-        print(f"Handling refund failure: {refund}")
+        logger.debug("Handling refund failure: %s", refund)
         """Handle failed refunds"""
         try:
             refund_record = RefundRecord.objects.filter(
@@ -2428,7 +2435,7 @@ class StripeWebhookView(APIView):
                 #     failure_reason=refund.failure_reason or "Unknown failure"
                 # )
                 
-                print(f"Refund failure email queued for user {refund_record.user.email}")
+                logger.debug("Refund failure email queued for user %s", refund_record.user.email)
                 
         except Exception as e:
-            print(f"Error handling refund failure: {e}")
\ No newline at end of file
+            logger.error("Error handling refund failure: %s", e)
\ No newline at end of file
@@ -2,7 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
-from main.models import Address, BookedAppointment, User, Fleet, Branch, FleetMember
+from main.models import Address, BookedAppointment, User, Branch, FleetMember
 
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
@@ -248,7 +248,7 @@ class ProfileView(APIView):
             # Check if user is a fleet owner
             if request.user.is_fleet_owner:
                 # Get all branches from the fleet owner's fleet
-                fleet = Fleet.objects.filter(owner=request.user).first()
+                fleet = request.scope.fleet
                 if fleet:
                     branches = Branch.objects.filter(fleet=fleet)
                     for branch in branches:
@@ -265,7 +265,7 @@ class ProfileView(APIView):
             # Check if user is a fleet admin (branch admin)
             elif request.user.is_branch_admin:
                 # Get the managed branch for the fleet admin
-                branch = request.user.get_managed_branch()
+                branch = request.scope.managed_branch
                 if branch:
                     addresses_list.append({
                         'id': str(branch.id),
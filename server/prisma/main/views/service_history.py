@@ -2,10 +2,56 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from main.models import BookedAppointment, BookedAppointmentImage, FleetVehicle, Fleet
+from main.models import BookedAppointment, BookedAppointmentImage, FleetVehicle
 from django.db.models import Q
+from main.utils.booking_serialization import serialize_service_history
+from main.utils.conditional import conditional_action, queryset_version
+from main.utils.pagination import InvalidPageRequest, keyset_page, wants_page
 import logging
 
+logger = logging.getLogger(__name__)
+
+
+def _service_history_filter(request):
+    """Completed/cancelled bookings visible to the caller (own, plus branch or fleet scope)."""
+    # Build the base query filter
+    query_filter = Q(status__in=["completed", "cancelled"])
+    
+    # Start with bookings where user is the current user
+    user_filter = Q(user=request.user)
+    
+    # If user is a branch admin, also include bookings for vehicles in their branch
+    if request.user.is_branch_admin:
+        scope = request.scope
+        if scope.branch_id:
+            # Add filter for bookings with vehicles in this branch
+            user_filter |= Q(branch_id=scope.branch_id)
+            # Include bulk order appointments for this branch
+            user_filter |= Q(bulk_order__branch_id=scope.branch_id)
+    
+    # If user is a fleet owner, also include bookings for vehicles in their fleet
+    elif request.user.is_fleet_owner:
+        fleet_id = request.scope.fleet_id
+        if fleet_id:
+            # Add filter for bookings with vehicles in this fleet (across all branches)
+            user_filter |= Q(fleet_id=fleet_id)
+            # Include bulk order appointments for this fleet
+            user_filter |= Q(bulk_order__fleet_id=fleet_id)
+    else:
+        # Regular user: include their bulk order appointments
+        user_filter |= Q(bulk_order__user=request.user)
+    
+    # Combine filters
+    query_filter &= user_filter
+    return query_filter
+
+
+def _service_history_version(request):
+    return queryset_version(
+        BookedAppointment.objects.filter(_service_history_filter(request)),
+        'updated_at', 'vehicle__updated_at', 'detailer__updated_at',
+    )
+
 
 class ServiceHistoryView(APIView):
     permission_classes = [IsAuthenticated]
@@ -24,6 +70,7 @@ class ServiceHistoryView(APIView):
         handler = getattr(self, self.action_handlers[action])
         return handler(request)
 
+    @conditional_action(_service_history_version)
     def get_service_history(self, request):
         """
         Get all service history (completed and cancelled bookings) for the authenticated user.
@@ -31,126 +78,29 @@ class ServiceHistoryView(APIView):
         For branch admins: includes bookings for vehicles in their managed branch
         For regular users: only their own bookings
         Returns appointments ordered by appointment_date in descending order (most recent first).
+        Optional cursor / page_size query params return one page plus next_cursor (null on the last page);
+        without them the full history is returned.
         """
         try:
-            # Build the base query filter
-            query_filter = Q(status__in=["completed", "cancelled"])
-            
-            # Start with bookings where user is the current user
-            user_filter = Q(user=request.user)
-            
-            # If user is a branch admin, also include bookings for vehicles in their branch
-            if request.user.is_branch_admin:
-                managed_branch = request.user.get_managed_branch()
-                if managed_branch:
-                    # Get vehicles in the managed branch
-                    branch_vehicles = FleetVehicle.objects.filter(
-                        fleet=managed_branch.fleet,
-                        branch=managed_branch
-                    ).values_list('vehicle_id', flat=True)
-                    
-                    # Add filter for bookings with vehicles in this branch
-                    user_filter |= Q(vehicle_id__in=branch_vehicles)
-                    # Include bulk order appointments for this branch
-                    user_filter |= Q(bulk_order__branch=managed_branch)
-            
-            # If user is a fleet owner, also include bookings for vehicles in their fleet
-            elif request.user.is_fleet_owner:
-                fleet = Fleet.objects.filter(owner=request.user).first()
-                if fleet:
-                    # Get all vehicles in the fleet (across all branches)
-                    fleet_vehicles = FleetVehicle.objects.filter(
-                        fleet=fleet
-                    ).values_list('vehicle_id', flat=True)
-                    
-                    # Add filter for bookings with vehicles in this fleet
-                    user_filter |= Q(vehicle_id__in=fleet_vehicles)
-                    # Include bulk order appointments for this fleet
-                    user_filter |= Q(bulk_order__fleet=fleet)
-            else:
-                # Regular user: include their bulk order appointments
-                user_filter |= Q(bulk_order__user=request.user)
-            
-            # Combine filters
-            query_filter &= user_filter
-            
-            # Get all booked appointments matching the filter
-            # Include related data to avoid N+1 queries
+            query_filter = _service_history_filter(request)
+            appointments = BookedAppointment.objects.filter(query_filter)
+
+            if wants_page(request):
+                page, next_cursor = keyset_page(appointments, request, ('-appointment_date', '-id'))
+                return Response({
+                    'service_history': serialize_service_history(page),
+                    'next_cursor': next_cursor,
+                }, status=status.HTTP_200_OK)
+
+            # Get all booked appointments matching the filter as a single values() projection
             # Order by appointment_date in descending order (most recent first)
-            appointments = BookedAppointment.objects.filter(
-                query_filter
-            ).select_related(
-                'service_type',
-                'valet_type',
-                'vehicle',
-                'address',
-                'detailer',
-                'bulk_order',
-            ).order_by('-appointment_date')
-            
-            service_history = []
-            
-            for appointment in appointments:
-                try:
-                    # Format the service history data to match MyServiceHistoryProps interface
-                    if appointment.vehicle:
-                        vehicle_reg = appointment.vehicle.registration_number or 'Unknown'
-                    elif appointment.bulk_order_id and appointment.booking_reference:
-                        # Bulk slot: e.g. BULKxxx-3 -> "Vehicle 3"
-                        ref = appointment.booking_reference
-                        if '-' in ref:
-                            suffix = ref.split('-')[-1]
-                            vehicle_reg = f"Vehicle {suffix}" if suffix.isdigit() else ref
-                        else:
-                            vehicle_reg = 'Bulk'
-                    else:
-                        vehicle_reg = 'Unknown'
-                    service_history_item = {
-                        'id': str(appointment.id),
-                        'booking_date': appointment.booking_date.isoformat(),
-                        'appointment_date': appointment.appointment_date.isoformat(),
-                        'service_type': appointment.service_type.name if appointment.service_type else 'Unknown',
-                        'valet_type': appointment.valet_type.name if appointment.valet_type else 'Unknown',
-                        'vehicle_reg': vehicle_reg,
-                        'address': {
-                            'id': str(appointment.address.id) if appointment.address else '',
-                            'address': appointment.address.address if appointment.address else '',
-                            'post_code': appointment.address.post_code if appointment.address else '',
-                            'city': appointment.address.city if appointment.address else '',
-                            'country': appointment.address.country if appointment.address else ''
-                        },
-                        # Return detailers as array for backward compatibility and express service support
-                        'detailers': [
-                            {
-                                'id': str(appointment.detailer.id) if appointment.detailer else '',
-                                'name': appointment.detailer.name if appointment.detailer else 'Unknown',
-                                'rating': float(appointment.detailer.rating) if appointment.detailer and appointment.detailer.rating else 0.0,
-                                'phone': appointment.detailer.phone if appointment.detailer else '',
-                            }
-                        ] if appointment.detailer else [],
-                        # Keep detailer for backward compatibility
-                        'detailer': {
-                            'id': str(appointment.detailer.id) if appointment.detailer else '',
-                            'name': appointment.detailer.name if appointment.detailer else 'Unknown',
-                            'rating': float(appointment.detailer.rating) if appointment.detailer and appointment.detailer.rating else 0.0,
-                            'phone': appointment.detailer.phone if appointment.detailer else '',
-                        },
-                        'status': appointment.status,
-                        'total_amount': float(appointment.total_amount),
-                        'rating': float(appointment.review_rating) if appointment.review_rating else 0.0,
-                        'is_reviewed': appointment.review_rating is not None and appointment.review_rating > 0,
-                        'booking_reference': str(appointment.booking_reference),
-                    }
-                    
-                    service_history.append(service_history_item)
-                except Exception as item_error:
-                    # Log the error for individual items but continue processing
-                    print(f"Error processing appointment {appointment.id}: {str(item_error)}")
-                    continue
+            service_history = serialize_service_history(appointments.order_by('-appointment_date', '-id'))
             
             return Response({'service_history': service_history}, status=status.HTTP_200_OK)
+        except InvalidPageRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Service history error: {str(e)}")
+            logger.error("Service history error: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def get_booking_images(self, request):
@@ -187,20 +137,15 @@ class ServiceHistoryView(APIView):
                 has_access = True
             # Branch admin - check if vehicle is in their branch
             elif request.user.is_branch_admin:
-                managed_branch = request.user.get_managed_branch()
-                if managed_branch and booking.vehicle:
-                    has_access = FleetVehicle.objects.filter(
-                        fleet=managed_branch.fleet,
-                        branch=managed_branch,
-                        vehicle=booking.vehicle
-                    ).exists()
+                if request.scope.branch_id and booking.vehicle_id:
+                    has_access = str(booking.vehicle_id) in request.scope.branch_vehicle_ids
             # Fleet owner - check if vehicle is in their fleet
             elif request.user.is_fleet_owner:
-                fleet = Fleet.objects.filter(owner=request.user).first()
-                if fleet and booking.vehicle:
+                fleet_id = request.scope.fleet_id
+                if fleet_id and booking.vehicle_id:
                     has_access = FleetVehicle.objects.filter(
-                        fleet=fleet,
-                        vehicle=booking.vehicle
+                        fleet_id=fleet_id,
+                        vehicle_id=booking.vehicle_id
                     ).exists()
             # Bulk order appointments: check access via bulk_order
             if not has_access and booking.vehicle is None and getattr(booking, 'bulk_order', None):
@@ -208,12 +153,12 @@ class ServiceHistoryView(APIView):
                 if request.user == bulk_order.user:
                     has_access = True
                 elif request.user.is_branch_admin:
-                    managed_branch = request.user.get_managed_branch()
-                    if managed_branch and bulk_order.branch_id == managed_branch.id:
+                    branch_id = request.scope.branch_id
+                    if branch_id and str(bulk_order.branch_id) == branch_id:
                         has_access = True
                 elif request.user.is_fleet_owner:
-                    fleet = Fleet.objects.filter(owner=request.user).first()
-                    if fleet and bulk_order.fleet_id == fleet.id:
+                    fleet_id = request.scope.fleet_id
+                    if fleet_id and str(bulk_order.fleet_id) == fleet_id:
                         has_access = True
             
             if not has_access:
@@ -222,7 +167,7 @@ class ServiceHistoryView(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
             
             # Check if user can view vehicle details (subscription check for fleet users)
-            can_view = request.user.can_view_vehicle_details(booking.vehicle)
+            can_view = request.scope.can_view_vehicle_details()
             if not can_view:
                 # Return empty arrays with access_denied flag for fleet users without subscription
                 return Response({
@@ -8,12 +8,16 @@ from main.models import (
     FleetSubscription, SubscriptionBilling, PaymentTransaction
 )
 from main.serializer import FleetSubscriptionSerializer, SubscriptionBillingSerializer
+from main.utils.response_cache import TAG_SUBSCRIPTION_PLANS, cached_action
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 import stripe
 from django.conf import settings
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Set Stripe API key
 stripe.api_key = settings.STRIPE_SECRET_KEY
@@ -55,6 +59,7 @@ class SubscriptionView(APIView):
         handler = getattr(self, self.action_handlers[action])
         return handler(request)
 
+    @cached_action(ttl=3600, tags=(TAG_SUBSCRIPTION_PLANS,))
     def get_plans(self, request):
         """Get all active subscription tiers"""
         try:
@@ -81,9 +86,7 @@ class SubscriptionView(APIView):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            import traceback
-            print(f"Error getting plans: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error getting plans: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -183,9 +186,7 @@ class SubscriptionView(APIView):
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error getting current subscription: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error getting current subscription: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -247,9 +248,7 @@ class SubscriptionView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error getting billing history: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error getting billing history: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -439,9 +438,7 @@ class SubscriptionView(APIView):
             return Response(response_data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
-            import traceback
-            print(f"Error creating subscription: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error creating subscription: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -623,7 +620,7 @@ class SubscriptionView(APIView):
                         billing.transaction_id = payment_intent.id if hasattr(payment_intent, 'id') else payment_intent
                         billing.save()
                 except stripe.error.InvalidRequestError as e:
-                    print(f"Invoice finalize failed (may already be final): {e}")
+                    logger.error("Invoice finalize failed (may already be final): %s", e)
             
             if not payment_intent:
                 if is_trial_subscription:
@@ -659,9 +656,7 @@ class SubscriptionView(APIView):
                         }
                         
                     except Exception as e:
-                        print(f"Error creating SetupIntent: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        logger.exception("Error creating SetupIntent: %s", e)
                         return {
                             'success': False,
                             'error': f'Failed to create setup intent: {str(e)}',
@@ -690,9 +685,7 @@ class SubscriptionView(APIView):
                         billing.save()
                         
                     except Exception as e:
-                        print(f"Error creating PaymentIntent: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        logger.exception("Error creating PaymentIntent: %s", e)
                         return {
                             'success': False,
                             'error': f'Failed to create payment intent: {str(e)}',
@@ -714,9 +707,7 @@ class SubscriptionView(APIView):
             }
             
         except Exception as e:
-            print(f"Error creating subscription: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating subscription: %s", e)
             return {
                 'success': False,
                 'error': str(e),
@@ -779,9 +770,7 @@ class SubscriptionView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error updating payment method: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error updating payment method: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -846,9 +835,7 @@ class SubscriptionView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error cancelling subscription: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error cancelling subscription: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
@@ -917,9 +904,7 @@ class SubscriptionView(APIView):
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
-            import traceback
-            print(f"Error creating setup intent: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Error creating setup intent: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
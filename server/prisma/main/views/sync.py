@@ -0,0 +1,67 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from main.utils.sync import (
+    SYNC_DEFAULT_LIMIT, SYNC_MAX_LIMIT, SYNC_RESOURCES, Cursor, InvalidCursor, sync_resource,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    """ Define a set of action handlers that would be used to route the url to the appropriate function """
+    action_handlers = {
+        "sync": "sync",
+    }
+
+    def get(self, request, *args, **kwargs):
+        action = kwargs.get('action')
+        if action not in self.action_handlers:
+            return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
+
+        handler = getattr(self, self.action_handlers[action])
+        return handler(request)
+
+    def sync(self, request):
+        """
+        Delta sync of the client's local store.
+        Query params:
+            resources: comma separated subset of notifications,bookings,vehicles,addresses,promotions (default all)
+            cursor.<resource>: cursor returned by the previous sync for that resource; omit for a full sync
+            limit: max updated (and max deleted) rows per resource, default 500, max 1000
+        Returns:
+            {"resources": {"<resource>": {"updated": [...], "deleted": [ids], "cursor": "...",
+                                          "has_more": bool, "reset": bool}}}
+            Clients repeat the call with the new cursors while has_more is true. reset means the cursor
+            was too old and the resource was resent in full, so the local copy should be replaced.
+        """
+        requested = request.query_params.get('resources')
+        names = [n.strip() for n in requested.split(',') if n.strip()] if requested else list(SYNC_RESOURCES)
+        unknown = [n for n in names if n not in SYNC_RESOURCES]
+        if unknown:
+            return Response({'error': f"Unknown resources: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', SYNC_DEFAULT_LIMIT)), SYNC_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursors = {}
+        for name in names:
+            raw = request.query_params.get(f'cursor.{name}')
+            try:
+                cursors[name] = Cursor.decode(raw) if raw else None
+            except InvalidCursor:
+                return Response({'error': f'Invalid cursor for {name}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resources = {name: sync_resource(request, name, cursors[name], limit) for name in names}
+            return Response({'resources': resources}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error("Sync error: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from main.models import TermsAndConditions, PrivacyPolicy
+from main.utils.response_cache import TAG_PRIVACY_POLICY, TAG_TERMS, cached_action
 
 class TermsView(APIView):
     permission_classes = [AllowAny]
@@ -26,6 +27,7 @@ class TermsView(APIView):
         handler = getattr(self, self.action_handler[action])
         return handler(request)
 
+    @cached_action(ttl=3600, tags=(TAG_TERMS,))
     def get_terms(self, request):
         """Returns the latest Terms and Conditions from the TermsAndConditions model."""
         try:
@@ -101,6 +103,7 @@ class TermsView(APIView):
     
 
 
+    @cached_action(ttl=3600, tags=(TAG_PRIVACY_POLICY,))
     def get_privacy_policy(self, request):
         """Returns the latest Privacy Policy from the PrivacyPolicy model."""
         try:
@@ -3,6 +3,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from main.models import Vehicle, VehicleEvent, VinLookupPurchase, PaymentTransaction, VehicleOwnership
+from main.utils import vin_bloom
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
@@ -23,6 +24,7 @@ class VinLookupView(APIView):
     Supports both registered and unregistered users.
     """
     permission_classes = [AllowAny]  # Supports unregistered users
+    throttle_scope = 'vin'
 
     action_handlers = {
         'check_vin_exists': 'check_vin_exists',
@@ -76,6 +78,14 @@ class VinLookupView(APIView):
                 'error': 'VIN contains invalid characters (I, O, Q are not allowed)'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Definite misses from the bloom filter never reach the database
+        might_exist = vin_bloom.might_contain(vin)
+        if might_exist is False:
+            return Response({
+                'exists': False,
+                'error': 'Vehicle not found with this VIN'
+            }, status=status.HTTP_404_NOT_FOUND)
+
         try:
             vehicle = Vehicle.objects.get(vin=vin)
             return Response({
@@ -92,6 +102,8 @@ class VinLookupView(APIView):
                 'currency': 'eur',
             }, status=status.HTTP_200_OK)
         except Vehicle.DoesNotExist:
+            if might_exist:
+                vin_bloom.record_false_positive()
             return Response({
                 'exists': False,
                 'error': 'Vehicle not found with this VIN'
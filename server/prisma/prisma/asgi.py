@@ -1,15 +1,21 @@
 # client/server/prisma/prisma/asgi.py
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prisma.settings')
+
+# Set up Django before the routing imports consumers (and through them, models)
+django_asgi_app = get_asgi_application()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
+from main.middleware import JWTWebSocketMiddleware
 from .routing import websocket_urlpatterns
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prisma.settings')
-
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
+    # JWT runs inside the session stack so a valid token takes precedence over the session user
     "websocket": AuthMiddlewareStack(
-        URLRouter(websocket_urlpatterns)
+        JWTWebSocketMiddleware(URLRouter(websocket_urlpatterns))
     ),
 })
@@ -1,6 +1,6 @@
 import os
 from celery import Celery
-from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prisma.settings')
@@ -14,17 +14,18 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
-# Configure periodic tasks
-app.conf.beat_schedule = {
-    'send-service-reminders': {
-        'task': 'main.tasks.send_service_reminders',
-        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
-    },
-}
+# Periodic tasks are configured in CELERY_BEAT_SCHEDULE (prisma/settings.py)
 
 app.conf.timezone = 'UTC'
 
 
+@worker_process_init.connect
+def preload_email_templates(**kwargs):
+    # Compile email templates once per worker process instead of on the first send
+    from main.services.EmailRendering import renderer
+    renderer.preload()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Non-blocking structured logging.
+Request threads only enqueue records; a QueueListener thread formats them as JSON
+and does the file/console I/O. Hot loggers can be sampled below WARNING.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes present on every LogRecord; anything else was passed via extra= and is emitted as a field
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, location, exception and extra fields."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG/INFO records for the configured logger prefixes.
+    rates maps logger name prefix -> keep ratio (0.0-1.0); WARNING and above always pass.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # Longest prefix first so 'main.views.dashboard' wins over 'main.views'
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return random.random() < rate
+        return True
+
+
+def _resolve_handlers(handlers):
+    # dictConfig hands us a ConvertingList of cfg:// references; indexing resolves them to handler instances
+    if isinstance(handlers, ConvertingList):
+        return [handlers[i] for i in range(len(handlers))]
+    return list(handlers)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that owns its QueueListener. The target handlers are other handlers from the same
+    LOGGING dict referenced as 'cfg://handlers.<name>'. A full queue drops records instead of blocking.
+    """
+
+    def __init__(self, handlers, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+        self.queue_size = queue_size
+        self.target_handlers = _resolve_handlers(handlers)
+        self.respect_handler_level = respect_handler_level
+        self._start_listener()
+        atexit.register(self._stop_listener)
+        # Forked children (Celery prefork workers) inherit the queue but not the listener thread
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_listener(self):
+        self.listener = QueueListener(
+            self.queue, *self.target_handlers, respect_handler_level=self.respect_handler_level
+        )
+        self.listener.start()
+        self._listener_running = True
+
+    def _stop_listener(self):
+        if self._listener_running:
+            self._listener_running = False
+            self.listener.stop()
+
+    def _after_fork(self):
+        # Records the parent had queued but not written stay with the parent
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.dropped = 0
+        self._start_listener()
+
+    def prepare(self, record):
+        # Merge args and render the traceback now (the record leaves this thread), but leave
+        # final formatting to the target handlers so they can emit JSON.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
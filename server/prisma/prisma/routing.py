@@ -1,4 +1,8 @@
 # client/server/prisma/prisma/routing.py
 from django.urls import re_path
 
-websocket_urlpatterns = []
+from main.consumers import NotificationConsumer
+
+websocket_urlpatterns = [
+    re_path(r'^ws/notifications/$', NotificationConsumer.as_asgi()),
+]
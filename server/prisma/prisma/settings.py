@@ -53,12 +53,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.ActionMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.ScopeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -150,10 +152,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON; the browsable API is only served in development
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        ('main.renderers.FastJSONRenderer', 'rest_framework.renderers.BrowsableAPIRenderer')
+        if DEBUG else ('main.renderers.FastJSONRenderer',)
     ),
+    # Token buckets in Redis for views that declare a throttle_scope (see main.throttling)
+    'DEFAULT_THROTTLE_CLASSES': (
+        'main.throttling.TokenBucketThrottle',
+    ),
+    # nginx appends the client address to X-Forwarded-For; only that last hop is trusted for per-IP
+    # buckets, so clients cannot pick a new bucket by sending their own header
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
     'DEFAULT_PARSER_CLASSES': (
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
@@ -223,7 +233,11 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_BEAT_SCHEDULE = {
     'send-service-reminders': {
         'task': 'main.tasks.send_service_reminders',
-        'schedule': 300.0,  # Run every 5 minutes (300 seconds)
+        'schedule': 60.0,  # Run every minute; only reads reminder timers that are due
+    },
+    'sync-service-reminders': {
+        'task': 'main.tasks.sync_service_reminders',
+        'schedule': crontab(minute=15)  # Run at quarter past every hour
     },
     'send-promotion-expiration': {
         'task': 'main.tasks.send_promotion_expiration',
@@ -233,8 +247,31 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'main.tasks.check_loyalty_decay',
         'schedule': crontab(hour=3, minute=0)  # Run at 3:00 AM every day
     },
+    'prune-sync-tombstones': {
+        'task': 'main.tasks.prune_sync_tombstones',
+        'schedule': crontab(hour=4, minute=0)  # Run at 4:00 AM every day
+    },
+    'process-push-receipts': {
+        'task': 'main.tasks.process_push_receipts',
+        'schedule': 900.0,  # Run every 15 minutes
+    },
+    'rebuild-vin-bloom': {
+        'task': 'main.tasks.rebuild_vin_bloom',
+        'schedule': crontab(hour=4, minute=30)  # Run at 4:30 AM every day
+    },
+    'archive-read-notifications': {
+        'task': 'main.tasks.archive_read_notifications',
+        'schedule': crontab(hour=4, minute=45)  # Run at 4:45 AM every day
+    },
+    'resume-stalled-campaigns': {
+        'task': 'main.tasks.resume_stalled_campaigns',
+        'schedule': 600.0,  # Run every 10 minutes
+    },
 }
 
+# Read notifications older than this move to NotificationArchive
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))
+
 AUTH_USER_MODEL = 'main.User'
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -272,6 +309,15 @@ VIN_LOOKUP_ACCESS_DURATION_HOURS = int(os.getenv('VIN_LOOKUP_ACCESS_DURATION_HOU
 # or https://detailer.yourdomain.com (no trailing slash).
 DETAILER_APP_URL = os.getenv('DETAILER_APP_URL', '').strip() or None
 
+# Shared secret for the internal Prometheus endpoint (api/v1/internal/metrics/, X-Metrics-Token header).
+# The endpoint returns 404 when unset.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Home screen section threads. HOME_POOL_WORKERS is per server process, so keep it around the number of
+# home requests a process serves at once times HOME_REQUEST_WORKERS; each thread holds its own DB connection.
+HOME_POOL_WORKERS = int(os.getenv('HOME_POOL_WORKERS', '4'))
+HOME_REQUEST_WORKERS = int(os.getenv('HOME_REQUEST_WORKERS', '2'))
+
 # AWS Configuration (commented out - using local media storage)
 # AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 # AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -284,6 +330,10 @@ DETAILER_APP_URL = os.getenv('DETAILER_APP_URL', '').strip() or None
 # DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
 # Logging Configuration
+# Handlers behind 'queue' run on a QueueListener thread, so request threads never block on log I/O.
+# DEBUG/INFO from hot view loggers is sampled at LOG_SAMPLE_RATE_HOT; WARNING and above is always kept.
+LOG_SAMPLE_RATE_HOT = float(os.getenv('LOG_SAMPLE_RATE_HOT', '0.1'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -296,43 +346,56 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'prisma.log_handlers.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sampling': {
+            '()': 'prisma.log_handlers.SamplingFilter',
+            'rates': {
+                'main.views.dashboard': LOG_SAMPLE_RATE_HOT,
+                'main.views.garage': LOG_SAMPLE_RATE_HOT,
+                'main.views.service_history': LOG_SAMPLE_RATE_HOT,
+            },
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'error_file': {
             'level': 'ERROR',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django_error.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'queue': {
+            '()': 'prisma.log_handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file', 'cfg://handlers.error_file'],
+            'filters': ['sampling'],
+        },
     },
     'root': {
-        'handlers': ['console', 'file', 'error_file'],
+        'handlers': ['queue'],
         'level': 'INFO',
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'main': {
-            'handlers': ['console', 'file', 'error_file'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'main.views.booking': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },